@@ -18,6 +18,16 @@ PROCESSED_DATA_DIR = DATA_DIR / "processed"
 EXTERNAL_DATA_DIR = DATA_DIR / "external"
 TEMP_DIR = Path(os.environ.get("TEMP_DIR", "/tmp/cats_dogs"))
 
+# Préparation des données d'entraînement (répertoire de travail, validation des images)
+DATA_PREP_CONFIG = {
+    "staging_mode": os.getenv("DATA_STAGING_MODE", "hardlink"), # hardlink | symlink | copy | inplace (lecture directe de data/raw)
+    "workers": int(os.getenv("DATA_PREP_WORKERS", os.cpu_count() or 1)), # Processus de validation des images
+    "manifest_path": Path(os.getenv("DATA_PREP_MANIFEST", TEMP_DIR / "validation_manifest.json")), # Verdicts (taille, mtime) : fichiers inchangés non revérifiés
+    "quarantine_dir": Path(os.getenv("DATA_PREP_QUARANTINE_DIR", TEMP_DIR / "quarantine")), # Images invalides (déplacées, non supprimées)
+    "shards_dir": Path(os.getenv("DATA_SHARDS_DIR", PROCESSED_DATA_DIR / "shards")), # Images préprocessées (scripts/build_shards.py), utilisées par l'entraînement si présentes
+    "shard_size": int(os.getenv("DATA_SHARD_SIZE", 2048)), # Images par shard (2048 x 128 x 128 x 3 octets = 96 Mo)
+}
+
 # Base de données
 ## Récupération des variables d'environnement et Construction de l'URL PostgreSQL
 DB_HOST = os.getenv('DB_HOST')
@@ -27,9 +37,18 @@ DB_USER = os.getenv('DB_USER')
 DB_PWD = os.getenv('DB_PWD')
 DB_PWD_ENCODED = quote_plus(DB_PWD) if DB_PWD else None # Encodage du mot de passe pour les caractères spéciaux
 DB_URL = f"postgresql://{DB_USER}:{DB_PWD_ENCODED}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DB_ASYNC_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PWD_ENCODED}@{DB_HOST}:{DB_PORT}/{DB_NAME}" # Pilote asynchrone (routes de l'API)
 DB_URL_MASKED = DB_URL.replace(DB_PWD_ENCODED, '***') if DB_PWD_ENCODED else DB_URL # Masquage du mdp dans l'URL (sert uniquement pour l'affichage dans le terminal, de manière sécurisée)
 DB_TABLE_MONITORING = os.getenv('DB_TABLE_MONITORING')
 
+# Pool de connexions (appliqué aux moteurs synchrone et asynchrone, chacun ayant son propre pool)
+DB_POOL_CONFIG = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", 10)), # Connexions supplémentaires au-delà de pool_size
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT_S", 30)), # Attente maximale d'une connexion libre
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_S", 1800)), # Renouvellement des connexions anciennes
+}
+
 
 # Modèles
 MODELS_DIR = PROCESSED_DATA_DIR / "models" # SRC_DIR / "models/trained"
@@ -40,6 +59,18 @@ MODEL_CONFIG = {
     "batch_size": 64,
     "epochs": 3, #10, # Optimized for speed-up
     "learning_rate": 0.001,
+    "fast_decode": os.getenv("FAST_DECODE", "false").lower() == "true", # Décodage JPEG réduit (DCT) directement proche de image_size
+}
+
+# Pipeline d'entrée de l'entraînement (tf.data) : décodage et augmentation parallèles sur CPU
+PIPELINE_CONFIG = {
+    "parallel_calls": int(os.getenv("PIPELINE_PARALLEL_CALLS", 0)), # Appels parallèles des map (0 : AUTOTUNE)
+    "cache": os.getenv("PIPELINE_CACHE", "memory"), # memory | file (jeux plus grands que la RAM) | none
+    "cache_dir": Path(os.getenv("PIPELINE_CACHE_DIR", TEMP_DIR / "tfdata_cache")),
+    "shuffle_buffer": int(os.getenv("PIPELINE_SHUFFLE_BUFFER", 2048)),
+    "augment": os.getenv("PIPELINE_AUGMENT", "true").lower() == "true",
+    "deterministic": os.getenv("PIPELINE_DETERMINISTIC", "true").lower() == "true", # false : ordre libre, débit supérieur
+    "seed": int(os.getenv("PIPELINE_SEED", 1337)), # Découpage train/val, mélange et répartition entre workers
 }
 
 # Configuration API
@@ -51,6 +82,87 @@ API_CONFIG = {
     "model_path": MODELS_DIR / "cats_dogs_model.keras",
 }
 
+# Registre de modèles versionnés (un sous-répertoire par version) et rechargement à chaud
+REGISTRY_CONFIG = {
+    "dir": Path(os.getenv("MODEL_REGISTRY_DIR", MODELS_DIR / "registry")),
+    "watch": os.getenv("MODEL_REGISTRY_WATCH", "false").lower() == "true", # Chargement automatique des nouvelles versions
+    "watch_interval_s": float(os.getenv("MODEL_REGISTRY_WATCH_INTERVAL_S", 10)),
+}
+
+# Configuration de l'executor d'inférence (pool de threads hors de la boucle asyncio)
+INFERENCE_CONFIG = {
+    "backend": os.getenv("INFERENCE_BACKEND", "keras"), # keras | tflite | tflite_int8 | onnx (artefacts : scripts/export_model.py)
+    # Buckets de taille de batch de la fonction compilée Keras (vide = model.predict)
+    "batch_buckets": [int(b) for b in os.getenv("INFERENCE_BATCH_BUCKETS", "1,2,4,8,16,32").split(",") if b.strip()],
+    "max_workers": int(os.getenv("INFERENCE_MAX_WORKERS", 4)),
+    "max_queue_size": int(os.getenv("INFERENCE_MAX_QUEUE_SIZE", 64)), # Au-delà : refus immédiat (503 + Retry-After)
+    "retry_after_s": int(os.getenv("INFERENCE_RETRY_AFTER_S", 1)),
+}
+
+# Configuration du micro-batching (regroupement des requêtes d'inférence concurrentes)
+BATCHING_CONFIG = {
+    "enabled": os.getenv("BATCHING_ENABLED", "true").lower() == "true",
+    "max_batch_size": int(os.getenv("BATCHING_MAX_BATCH_SIZE", 32)),
+    "max_wait_ms": float(os.getenv("BATCHING_MAX_WAIT_MS", 5)), # Budget d'attente maximal avant exécution du batch
+}
+
+# Cache des prédictions (clé : hash des octets de l'image + version du modèle)
+CACHE_CONFIG = {
+    "enabled": os.getenv("CACHE_ENABLED", "true").lower() == "true",
+    "max_entries": int(os.getenv("CACHE_MAX_ENTRIES", 10000)),
+    "max_bytes": int(os.getenv("CACHE_MAX_MB", 64)) * 1024 * 1024,
+    "ttl_s": float(os.getenv("CACHE_TTL_S", 3600)),
+}
+
+# Écriture différée des prédictions en base (INSERT multi-lignes par lots)
+WRITE_BEHIND_CONFIG = {
+    "enabled": os.getenv("WRITE_BEHIND_ENABLED", "true").lower() == "true",
+    "max_batch_size": int(os.getenv("WRITE_BEHIND_MAX_BATCH_SIZE", 500)),
+    "flush_interval_s": float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_S", 0.5)),
+    "id_block_size": int(os.getenv("WRITE_BEHIND_ID_BLOCK_SIZE", 1000)), # Identifiants réservés par requête à la séquence
+    "max_buffer": int(os.getenv("WRITE_BEHIND_MAX_BUFFER", 50000)),
+}
+
+# Spool local des prédictions lorsque la base est indisponible ou trop lente (rejeu idempotent)
+SPOOL_CONFIG = {
+    "dir": Path(os.getenv("SPOOL_DIR", DATA_DIR / "spool")),
+    "replay_interval_s": float(os.getenv("SPOOL_REPLAY_INTERVAL_S", 5)),
+    "replay_batch_size": int(os.getenv("SPOOL_REPLAY_BATCH_SIZE", 500)),
+    "db_latency_budget_ms": float(os.getenv("DB_LATENCY_BUDGET_MS", 1000)), # Au-delà, la base est contournée
+}
+
+# Graphiques du dashboard : période par défaut et nombre maximal de points par courbe
+DASHBOARD_CONFIG = {
+    "default_range": os.getenv("DASHBOARD_DEFAULT_RANGE", "24h"), # 1h, 24h, 7d, 30d ou all
+    "max_buckets": int(os.getenv("DASHBOARD_MAX_BUCKETS", 240)), # Intervalles agrégés en SQL
+    "max_points": int(os.getenv("DASHBOARD_MAX_POINTS", 1000)), # Points bruts conservés par LTTB
+    "snapshot_ttl_s": float(os.getenv("DASHBOARD_SNAPSHOT_TTL_S", 10)), # Durée de fraîcheur d'un instantané
+    "snapshot_max_stale_s": float(os.getenv("DASHBOARD_SNAPSHOT_MAX_STALE_S", 300)), # Au-delà, reconstruit pendant la requête
+    "live_flush_interval_s": float(os.getenv("DASHBOARD_LIVE_FLUSH_INTERVAL_S", 1)), # Envoi des nouvelles prédictions (SSE)
+    "live_kpi_interval_s": float(os.getenv("DASHBOARD_LIVE_KPI_INTERVAL_S", 5)), # Envoi des KPI mis à jour (SSE)
+}
+
+# Centiles de latence : sketches de quantiles (DDSketch) fusionnés périodiquement en base
+SKETCH_CONFIG = {
+    "flush_interval_s": float(os.getenv("SKETCH_FLUSH_INTERVAL_S", 10)),
+    "relative_accuracy": float(os.getenv("SKETCH_RELATIVE_ACCURACY", 0.01)), # Erreur relative des centiles
+}
+
+# Agrégats incrémentaux des prédictions (KPI du dashboard), compactés en arrière-plan
+ROLLUP_CONFIG = {
+    "enabled": os.getenv("ROLLUP_ENABLED", "true").lower() == "true", # false : compaction par cron (scripts/compact_rollups.py)
+    "interval_s": float(os.getenv("ROLLUP_INTERVAL_S", 60)),
+    "batch_size": int(os.getenv("ROLLUP_BATCH_SIZE", 50000)), # Prédictions agrégées par transaction
+}
+
+# Mode de service du modèle : "inprocess" (modèle chargé dans l'API) ou "process_pool" (N processus workers)
+SERVING_CONFIG = {
+    "mode": os.getenv("SERVING_MODE", "inprocess"),
+    "num_workers": int(os.getenv("SERVING_NUM_WORKERS", os.cpu_count() or 1)),
+    "request_timeout_s": float(os.getenv("SERVING_REQUEST_TIMEOUT_S", 30)),
+    "health_interval_s": float(os.getenv("SERVING_HEALTH_INTERVAL_S", 1)),
+}
+
 # URLs de données
 DATA_URLS = {
     "kaggle_cats_dogs": "https://download.microsoft.com/download/3/E/1/3E1C3F21-ECDB-4869-8368-6DEBA77B919F/kagglecatsanddogs_5340.zip"
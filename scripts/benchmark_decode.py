@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark du décodage des images : chemin standard vs décodage JPEG réduit (fast_decode)
+
+Chaque mode est exécuté dans un sous-processus séparé afin de mesurer un pic de
+mémoire (RSS) propre à chaque mode. Le rapport compare :
+- la latence de préprocessing (moyenne, p50, p95)
+- le pic de RSS du processus
+- l'écart des pixels et l'accord des prédictions (si --with-model)
+
+Usage :
+    python scripts/benchmark_decode.py --limit 500 --with-model
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import RAW_DATA_DIR
+
+MODES = {"standard": False, "fast": True}
+
+
+def list_images(data_dir: Path, limit: int):
+    """Liste des images Cat/Dog (ordre déterministe)"""
+    files = sorted(p for folder in ("Cat", "Dog") for p in (data_dir / folder).glob("*") if p.is_file())
+    return files[:limit] if limit else files
+
+
+def run_worker(args):
+    """Exécution d'un mode dans le processus courant et écriture des résultats"""
+    from src.models.predictor import CatDogPredictor
+
+    predictor = CatDogPredictor(load=args.with_model)
+    fast_decode = MODES[args.worker]
+    payloads = [p.read_bytes() for p in list_images(Path(args.data_dir), args.limit)]
+
+    latencies, arrays, skipped = [], [], 0
+    for data in payloads:
+        try:
+            start = time.perf_counter()
+            array = predictor.preprocess_image(data, fast_decode=fast_decode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            arrays.append(array[0])
+        except Exception:
+            skipped += 1
+
+    images = np.stack(arrays) if arrays else np.zeros((0,) + predictor.image_size + (3,), dtype=np.uint8)
+    scores = [r["raw_score"] for r in predictor.predict_batch(images)] if args.with_model and len(images) else []
+    np.save(args.output, images)
+
+    print(json.dumps({
+        "images": len(latencies),
+        "skipped": skipped,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 3) if latencies else None,
+            "p50": round(float(np.percentile(latencies, 50)), 3) if latencies else None,
+            "p95": round(float(np.percentile(latencies, 95)), 3) if latencies else None,
+        },
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # ru_maxrss en Ko sous Linux
+        "scores": scores,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du décodage rapide des JPEG")
+    parser.add_argument("--data-dir", default=str(RAW_DATA_DIR / "PetImages"), help="Répertoire contenant Cat/ et Dog/")
+    parser.add_argument("--limit", type=int, default=0, help="Nombre maximal d'images (0 = toutes)")
+    parser.add_argument("--with-model", action="store_true", help="Comparer aussi les prédictions du modèle")
+    parser.add_argument("--report", help="Fichier JSON où écrire le rapport")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"Benchmark du décodage sur {args.data_dir}")
+    results, arrays = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            output = Path(tmp) / f"{mode}.npy"
+            cmd = [sys.executable, __file__, "--worker", mode, "--output", str(output),
+                   "--data-dir", args.data_dir, "--limit", str(args.limit)]
+            if args.with_model:
+                cmd.append("--with-model")
+            completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+            arrays[mode] = np.load(output)
+
+    standard, fast = results["standard"], results["fast"]
+    report = {
+        "images": standard["images"],
+        "standard": {k: v for k, v in standard.items() if k != "scores"},
+        "fast": {k: v for k, v in fast.items() if k != "scores"},
+    }
+    if len(arrays["standard"]) and arrays["standard"].shape == arrays["fast"].shape:
+        diff = np.abs(arrays["standard"].astype(np.int16) - arrays["fast"].astype(np.int16))
+        report["pixel_mean_abs_diff"] = round(float(diff.mean()), 3)
+    if standard["scores"] and fast["scores"]:
+        s, f = np.array(standard["scores"]), np.array(fast["scores"])
+        report["prediction_agreement"] = round(float(np.mean((s > 0.5) == (f > 0.5))) * 100, 2)
+        report["score_mean_abs_diff"] = round(float(np.mean(np.abs(s - f))), 5)
+    if standard["latency_ms"]["mean"] and fast["latency_ms"]["mean"]:
+        report["speedup"] = round(standard["latency_ms"]["mean"] / fast["latency_ms"]["mean"], 2)
+
+    print(json.dumps(report, indent=2))
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+        print(f"Rapport écrit: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
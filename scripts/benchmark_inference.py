@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la latence par appel du modèle
+
+Compare, pour plusieurs tailles de batch :
+- keras-predict  : `model.predict` à chaque appel (comportement historique)
+- keras-compiled : fonction compilée par bucket de taille de batch, réchauffée au chargement
+- et, si leurs artefacts existent, les backends tflite / tflite_int8 / onnx
+
+Usage :
+    python scripts/benchmark_inference.py --iterations 200 --batch-sizes 1 4 32
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import API_CONFIG, INFERENCE_CONFIG, MODEL_CONFIG
+from src.models.backends import get_backend
+
+
+def benchmark(backend, batch_size: int, iterations: int):
+    """Latences (ms) de `iterations` appels sur un batch aléatoire"""
+    images = np.random.default_rng(0).integers(0, 256, (batch_size,) + MODEL_CONFIG["image_size"] + (3,), dtype=np.uint8)
+    backend.predict(images)  # Premier appel exclu des mesures
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        backend.predict(images)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean": round(float(np.mean(latencies)), 3),
+        "p50": round(float(np.percentile(latencies, 50)), 3),
+        "p99": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la latence par appel du modèle")
+    parser.add_argument("--model-path", default=str(API_CONFIG["model_path"]), help="Modèle .keras")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--output", help="Fichier JSON où écrire le rapport")
+    args = parser.parse_args()
+
+    model_path = Path(args.model_path)
+    variants = {
+        "keras-predict": get_backend("keras", model_path),
+        "keras-compiled": get_backend("keras", model_path, batch_buckets=INFERENCE_CONFIG["batch_buckets"] or [1, 2, 4, 8, 16, 32]),
+    }
+    for name in ("tflite", "tflite_int8", "onnx"):
+        backend = get_backend(name, model_path)
+        if backend.model_path.exists():
+            variants[name] = backend
+
+    report = {}
+    for name, backend in variants.items():
+        start = time.perf_counter()
+        try:
+            backend.load()
+        except Exception as e:
+            print(f"⚠️  {name}: chargement impossible ({e})")
+            continue
+        load_s = round(time.perf_counter() - start, 3)
+        report[name] = {"load_s": load_s, "latency_ms": {}}
+        for batch_size in args.batch_sizes:
+            report[name]["latency_ms"][batch_size] = benchmark(backend, batch_size, args.iterations)
+
+    print(f"{'Variante':<16} {'Chargement':>11} " + " ".join(f"{'b' + str(b) + ' p50/p99 (ms)':>22}" for b in args.batch_sizes))
+    for name, r in report.items():
+        cells = " ".join(f"{r['latency_ms'][b]['p50']:>10} / {r['latency_ms'][b]['p99']:<9}" for b in args.batch_sizes)
+        print(f"{name:<16} {r['load_s']:>10}s {cells}")
+
+    if "keras-predict" in report and "keras-compiled" in report:
+        for b in args.batch_sizes:
+            before = report["keras-predict"]["latency_ms"][b]["p50"]
+            after = report["keras-compiled"]["latency_ms"][b]["p50"]
+            print(f"Batch {b}: gain p50 compilé vs predict = x{before / after:.1f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Rapport écrit: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
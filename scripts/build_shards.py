@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Construction du cache préprocessé du jeu de données (shards numpy mappés en mémoire)
+
+Synchronise le répertoire de travail, met en quarantaine les images invalides,
+puis décode chaque image une seule fois en image_size uint8. Les entraînements
+suivants (scripts/train.py) lisent directement les shards, sans décodage JPEG.
+À relancer lorsque les données sources ou MODEL_CONFIG["image_size"] changent.
+
+Usage :
+    python scripts/build_shards.py --shard-size 2048 --val-split 0.2
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import DATA_PREP_CONFIG
+from src.data.preprocessing import clean_corrupted_images, setup_data_directory
+from src.data.shards import build_shards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construction des shards préprocessés")
+    parser.add_argument("--data-dir", default=None, help="Répertoire contenant Cat/ et Dog/ (défaut : répertoire de travail)")
+    parser.add_argument("--output-dir", default=str(DATA_PREP_CONFIG["shards_dir"]), help="Répertoire des shards")
+    parser.add_argument("--shard-size", type=int, default=DATA_PREP_CONFIG["shard_size"], help="Images par shard")
+    parser.add_argument("--val-split", type=float, default=0.2, help="Fraction des images en validation")
+    parser.add_argument("--seed", type=int, default=1337, help="Graine du découpage train/val")
+    parser.add_argument("--workers", type=int, default=DATA_PREP_CONFIG["workers"], help="Processus de décodage")
+    args = parser.parse_args()
+
+    data_path = Path(args.data_dir) if args.data_dir else setup_data_directory()
+    clean_corrupted_images(data_path, workers=args.workers)
+    index = build_shards(data_path, Path(args.output_dir), shard_size=args.shard_size,
+                         val_split=args.val_split, seed=args.seed, workers=args.workers)
+    print(f"✅ Index des shards: {Path(args.output_dir) / 'index.json'} "
+          f"({sum(split['count'] for split in index['splits'].values())} images)")
+
+
+if __name__ == "__main__":
+    main()
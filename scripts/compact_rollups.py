@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Compaction des prédictions en agrégats (table predictions_rollup)
+
+À utiliser lorsque la compaction en arrière-plan de l'API est désactivée
+(ROLLUP_ENABLED=false), par exemple depuis cron :
+
+    * * * * * cd /app && python scripts/compact_rollups.py
+
+Plusieurs compactions simultanées sont sans danger : un verrou consultatif
+PostgreSQL n'en laisse travailler qu'une à la fois.
+
+Usage :
+    python scripts/compact_rollups.py --batch-size 50000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import ROLLUP_CONFIG
+from src.database.db_connector import SessionLocal
+from src.monitoring.rollups import RollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compaction des prédictions en agrégats")
+    parser.add_argument("--batch-size", type=int, default=ROLLUP_CONFIG["batch_size"],
+                        help="Nombre de prédictions agrégées par transaction")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        compacted = RollupService.compact_all(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"✅ {compacted} prédictions agrégées en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Export du modèle Keras vers les backends d'inférence alternatifs
+
+Produit, à côté de cats_dogs_model.keras :
+- cats_dogs_model.tflite       (TFLite float32)
+- cats_dogs_model_int8.tflite  (TFLite quantifié int8, calibré sur un échantillon de PetImages)
+- cats_dogs_model.onnx         (ONNX, via tf2onnx)
+- export_report.json           (comparaison précision / latence / taille de chaque backend)
+
+Usage :
+    python scripts/export_model.py --calibration-samples 200 --eval-samples 500
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import API_CONFIG, RAW_DATA_DIR
+from src.models.backends import BACKENDS, artifact_path
+from src.models.predictor import CatDogPredictor
+
+
+def load_samples(data_dir: Path, count: int, seed: int, exclude=()):
+    """Échantillon aléatoire (déterministe) d'images préprocessées et de leurs labels (0=Cat, 1=Dog)"""
+    files = [(p, label) for label, folder in enumerate(("Cat", "Dog"))
+             for p in sorted((data_dir / folder).glob("*")) if p.is_file() and p not in exclude]
+    random.Random(seed).shuffle(files)
+
+    preprocessor = CatDogPredictor(load=False, backend="keras")
+    images, labels, used = [], [], []
+    for path, label in files:
+        if len(images) >= count:
+            break
+        try:
+            images.append(preprocessor.preprocess_image(path.read_bytes())[0])
+        except Exception:
+            continue  # Image corrompue
+        labels.append(label)
+        used.append(path)
+    return np.stack(images), np.array(labels), used
+
+
+def export_saved_model(model_path: Path, saved_model_dir: Path):
+    """Export du modèle Keras au format SavedModel (entrée commune aux convertisseurs)"""
+    import tensorflow as tf
+    model = tf.keras.models.load_model(model_path)
+    model.export(str(saved_model_dir))
+    return model
+
+
+def export_tflite(saved_model_dir: Path, output: Path, calibration: np.ndarray = None):
+    """Conversion TFLite, quantifiée int8 si un jeu de calibration est fourni"""
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_saved_model(str(saved_model_dir))
+    if calibration is not None:
+        def representative_dataset():
+            for image in calibration:
+                yield [image[np.newaxis].astype(np.float32)]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    output.write_bytes(converter.convert())
+    print(f"✅ Export TFLite{' int8' if calibration is not None else ''}: {output}")
+
+
+def export_onnx(saved_model_dir: Path, output: Path, opset: int):
+    """Conversion ONNX via tf2onnx (dépendance optionnelle)"""
+    cmd = [sys.executable, "-m", "tf2onnx.convert", "--saved-model", str(saved_model_dir),
+           "--output", str(output), "--opset", str(opset)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"❌ Export ONNX impossible (tf2onnx installé ?): {result.stderr.strip().splitlines()[-1:]}")
+        return False
+    print(f"✅ Export ONNX: {output}")
+    return True
+
+
+def evaluate_backend(name: str, model_path: Path, images: np.ndarray, labels: np.ndarray, reference=None):
+    """Précision, accord avec Keras et latence (batch de 1 et batch complet) d'un backend"""
+    predictor = CatDogPredictor(model_path=model_path, backend=name)
+    if not predictor.is_loaded():
+        return None
+
+    backend = predictor.model
+    backend.predict(images[:1])  # Warm-up
+
+    single = []
+    for image in images[:100]:
+        start = time.perf_counter()
+        backend.predict(image[np.newaxis])
+        single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    scores = np.concatenate([backend.predict(images[i:i + 32]) for i in range(0, len(images), 32)])
+    batch_ms = (time.perf_counter() - start) * 1000 / len(images)
+
+    report = {
+        "artifact": str(predictor.model_path),
+        "size_kb": round(predictor.model_path.stat().st_size / 1024, 1),
+        "accuracy": round(float(np.mean((scores > 0.5) == labels)) * 100, 2),
+        "latency_batch1_ms": {"p50": round(float(np.percentile(single, 50)), 3),
+                              "p95": round(float(np.percentile(single, 95)), 3)},
+        "latency_per_image_batch32_ms": round(batch_ms, 3),
+    }
+    if reference is not None:
+        report["agreement_with_keras"] = round(float(np.mean((scores > 0.5) == (reference > 0.5))) * 100, 2)
+        report["score_max_abs_diff"] = round(float(np.max(np.abs(scores - reference))), 5)
+    return report, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export du modèle vers TFLite / TFLite int8 / ONNX")
+    parser.add_argument("--model-path", default=str(API_CONFIG["model_path"]), help="Modèle .keras source")
+    parser.add_argument("--data-dir", default=str(RAW_DATA_DIR / "PetImages"), help="Répertoire contenant Cat/ et Dog/")
+    parser.add_argument("--calibration-samples", type=int, default=200, help="Images de calibration int8")
+    parser.add_argument("--eval-samples", type=int, default=500, help="Images d'évaluation (disjointes de la calibration)")
+    parser.add_argument("--opset", type=int, default=13, help="Opset ONNX")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    model_path = Path(args.model_path)
+    data_dir = Path(args.data_dir)
+    if not model_path.exists():
+        print(f"❌ Modèle non trouvé: {model_path}")
+        sys.exit(1)
+
+    print("=== Export du modèle ===")
+    calibration, _, calibration_files = load_samples(data_dir, args.calibration_samples, args.seed)
+    eval_images, eval_labels, _ = load_samples(data_dir, args.eval_samples, args.seed + 1, exclude=set(calibration_files))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saved_model_dir = Path(tmp) / "saved_model"
+        export_saved_model(model_path, saved_model_dir)
+        export_tflite(saved_model_dir, artifact_path(model_path, "tflite"))
+        export_tflite(saved_model_dir, artifact_path(model_path, "tflite_int8"), calibration=calibration)
+        export_onnx(saved_model_dir, artifact_path(model_path, "onnx"), args.opset)
+
+    print("\n=== Comparaison des backends ===")
+    report = {"eval_samples": len(eval_images), "calibration_samples": len(calibration), "backends": {}}
+    reference = None
+    for name in BACKENDS:
+        try:
+            evaluation = evaluate_backend(name, model_path, eval_images, eval_labels, reference)
+        except Exception as e:
+            print(f"⚠️  {name}: évaluation impossible ({e})")
+            continue
+        if evaluation is None:
+            print(f"⚠️  {name}: artefact non disponible")
+            continue
+        report["backends"][name], scores = evaluation
+        if name == "keras":
+            reference = scores
+
+    print(f"{'Backend':<12} {'Taille (Ko)':>12} {'Précision':>10} {'Accord':>8} {'p50 b1 (ms)':>12} {'b32 (ms/img)':>13}")
+    for name, r in report["backends"].items():
+        print(f"{name:<12} {r['size_kb']:>12} {r['accuracy']:>9}% {r.get('agreement_with_keras', 100.0):>7}% "
+              f"{r['latency_batch1_ms']['p50']:>12} {r['latency_per_image_batch32_ms']:>13}")
+
+    report_path = model_path.parent / "export_report.json"
+    report_path.write_text(json.dumps(report, indent=2))
+    print(f"\nRapport écrit: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
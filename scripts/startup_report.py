@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Rapport de temps d'import et de démarrage de l'API
+
+Mesures (chacune dans un processus neuf) :
+- import_s        : durée de `import src.api.main`
+- top_imports     : modules les plus coûteux à l'import (python -X importtime)
+- live_s          : délai entre le lancement d'uvicorn et la première réponse de /health/live
+- ready_s         : délai jusqu'à ce que /health/ready réponde 200 (modèle chargé)
+
+Avec --baseline, compare au rapport de référence et échoue (code 1) si une mesure
+régresse de plus de --tolerance (en %).
+
+Usage :
+    python scripts/startup_report.py --output startup_report.json
+    python scripts/startup_report.py --baseline startup_report.json
+"""
+
+import argparse
+import json
+import re
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def measure_import():
+    """Durée d'import de l'application et modules les plus coûteux"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.api.main"],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # Format : "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        # Indentation = profondeur d'import : on garde les trois premiers niveaux
+        if match and len(match.group(3)) <= 5 and match.group(4) != "src.api.main":
+            modules.append((match.group(4), int(match.group(2)) / 1e6))
+    modules.sort(key=lambda m: m[1], reverse=True)
+
+    return round(elapsed, 3), [{"module": name, "cumulative_s": round(s, 3)} for name, s in modules[:15]]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, process, timeout: float, expected_status: int = 200):
+    """Attente de la première réponse `expected_status` de l'URL (None si timeout)"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Le serveur s'est arrêté pendant le démarrage")
+        try:
+            if requests.get(url, timeout=0.5).status_code == expected_status:
+                return time.perf_counter()
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def measure_startup(timeout: float):
+    """Délais de liveness et de readiness d'un serveur uvicorn neuf"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        live = wait_for(f"{base_url}/health/live", process, timeout)
+        ready = wait_for(f"{base_url}/health/ready", process, timeout)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    return (
+        round(live - start, 3) if live else None,
+        round(ready - start, 3) if ready else None,
+    )
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+    """Affiche l'écart avec la référence ; retourne False en cas de régression"""
+    ok = True
+    for key in ("import_s", "live_s", "ready_s"):
+        current, reference = report.get(key), baseline.get(key)
+        if current is None or not reference:
+            continue
+        delta = (current - reference) / reference * 100
+        regression = delta > tolerance
+        ok = ok and not regression
+        print(f"{'❌' if regression else '✅'} {key}: {current}s (référence {reference}s, {delta:+.1f}%)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rapport de temps d'import et de démarrage de l'API")
+    parser.add_argument("--output", help="Fichier JSON où écrire le rapport")
+    parser.add_argument("--baseline", help="Rapport de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="Régression tolérée (%%)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Délai maximal d'attente du serveur (s)")
+    args = parser.parse_args()
+
+    import_s, top_imports = measure_import()
+    live_s, ready_s = measure_startup(args.timeout)
+    report = {"import_s": import_s, "live_s": live_s, "ready_s": ready_s, "top_imports": top_imports}
+
+    print("=== Temps de démarrage de l'API ===")
+    print(f"Import src.api.main : {import_s}s")
+    print(f"/health/live        : {f'{live_s}s' if live_s is not None else 'non atteint'}")
+    print(f"/health/ready       : {f'{ready_s}s' if ready_s is not None else 'non atteint'}")
+    print("\nModules les plus coûteux à l'import :")
+    for module in top_imports:
+        print(f"  {module['cumulative_s']:>7.3f}s  {module['module']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nRapport écrit: {args.output}")
+
+    if args.baseline:
+        print("\n=== Comparaison avec la référence ===")
+        if not compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,19 @@
 #!/usr/bin/env python3
-"""Script d'entraînement du modèle"""
+"""
+Script d'entraînement du modèle
 
+Usage :
+    python scripts/train.py                                   # Entraînement complet (+ training_profile.json)
+    python scripts/train.py --benchmark --steps 200           # Benchmark à nombre de pas fixe (+ goulot :
+                                                              #     pipeline d'entrée ou calcul)
+    python scripts/train.py --benchmark --save-baseline       # ... enregistré comme référence
+    python scripts/train.py --benchmark --baseline ref.json   # ... comparé à une référence (code 1 si régression,
+                                                              #     2 si configuration différente)
+"""
+
+import argparse
+import json
+import shutil
 import sys
 from pathlib import Path
 
@@ -8,15 +21,57 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from src.models.trainer import CatDogTrainer
+from config.settings import MODELS_DIR
+from src.models.profiler import compare_with_baseline
+
+DEFAULT_BASELINE = MODELS_DIR / "benchmark_baseline.json"
 
 def main():
-    print("Début de l'entraînement du modèle Cats vs Dogs")
-    
+    parser = argparse.ArgumentParser(description="Entraînement du modèle Cats vs Dogs")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark de débit à nombre de pas fixe (modèle non sauvegardé)")
+    parser.add_argument("--steps", type=int, default=100, help="Nombre de pas du benchmark")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Rapport de référence à comparer")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer le benchmark comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Baisse de débit tolérée (fraction)")
+    args = parser.parse_args()
+
+    from src.models.trainer import CatDogTrainer
     trainer = CatDogTrainer()
-    model, history = trainer.train()
-    
-    print("Entraînement terminé avec succès!")
+
+    if not args.benchmark:
+        print("Début de l'entraînement du modèle Cats vs Dogs")
+        model, history = trainer.train()
+        print("Entraînement terminé avec succès!")
+        return 0
+
+    report_path = MODELS_DIR / "benchmark_profile.json"
+    report = trainer.benchmark(steps=args.steps, report_path=report_path)
+    summary = report["summary"]
+    print(f"Débit: {summary['steady_images_per_s']} images/s (pas médian {summary['step_ms']['p50']} ms, "
+          f"attente des données ~{summary['input_wait_ms']} ms), pic RSS {summary['peak_rss_mb']} Mo, "
+          f"CPU {summary['cpu_percent']} %")
+
+    if args.save_baseline:
+        shutil.copyfile(report_path, args.baseline)
+        print(f"✅ Référence enregistrée: {args.baseline}")
+        return 0
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        print(f"Aucune référence ({baseline_path}) : relancer avec --save-baseline pour en créer une")
+        return 0
+
+    comparison = compare_with_baseline(report, json.loads(baseline_path.read_text()), args.tolerance)
+    print(json.dumps(comparison, indent=2))
+    if not comparison["comparable"]:
+        print(f"⚠️  Référence d'une autre configuration ({', '.join(comparison['mismatches'])}) : débits non comparés, "
+              f"relancer avec --save-baseline pour la remplacer")
+        return 2
+    if comparison["regression"]:
+        print(f"❌ Régression de débit: {comparison['steady_images_per_s']['change']:+.1%} par rapport à la référence")
+        return 1
+    print("✅ Pas de régression de débit")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -1,13 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Ajouter le répertoire racine au path
 ROOT_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from .routes import router
+from .routes import router, batcher, inference_executor, worker_pool, model_registry, prediction_logger, prediction_spool, rollup_compactor, latency_recorder, dashboard_snapshots, live_broadcaster
+from config.settings import REGISTRY_CONFIG
+from src.monitoring.metrics import HTTP_LATENCY, HTTP_REQUESTS
 
 app = FastAPI(
     title="🐱🐶 Cats vs Dogs Classifier",
@@ -47,9 +51,11 @@ Format : `Authorization: Bearer <votre_token>`
 **Routes API**
 * `POST /api/predict` - Endpoint de prédiction
 * `GET /api/statistics` - Statistiques du monitoring
-* `GET /api/recent-predictions` - Dernières prédictions
+* `GET /api/recent-predictions` - Dernières prédictions (pagination par curseur)
+* `GET /api/predictions/export` - Export en flux de l'historique (CSV ou NDJSON)
 * `POST /api/update-feedback` - Mise à jour du feedback
 * `GET /health` - État de santé de l'API
+* `GET /metrics` - Métriques Prometheus
 
 ## 🛡️ RGPD
 
@@ -80,6 +86,65 @@ Le système respecte le RGPD :
 # Ajouter les routes
 app.include_router(router)
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Nombre de requêtes et latence par route (modèle de chemin, pas l'URL brute)"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_LATENCY.labels(request.method, path).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(request.method, path, status).inc()
+
+@app.on_event("startup")
+async def startup():
+    """
+    Chargement du modèle en arrière-plan : l'API répond immédiatement,
+    /health/ready passe à 200 une fois le modèle chargé
+    """
+    # Rejeu des prédictions conservées dans le spool local (y compris celles d'une exécution précédente)
+    prediction_spool.start()
+    if prediction_logger is not None:
+        prediction_logger.start()
+    if rollup_compactor is not None:
+        rollup_compactor.start()
+    latency_recorder.start()
+    dashboard_snapshots.start()
+    live_broadcaster.start()
+    
+    if worker_pool is not None:
+        worker_pool.start()
+    else:
+        threading.Thread(target=model_registry.load, name="model-loader", daemon=True).start()
+    
+    # Surveillance du registre : toute nouvelle version est chargée puis basculée à chaud
+    if REGISTRY_CONFIG["watch"]:
+        model_registry.start_watcher(REGISTRY_CONFIG["watch_interval_s"])
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Arrêt propre des tâches de fond"""
+    model_registry.stop()
+    await dashboard_snapshots.close()
+    await live_broadcaster.close()
+    if rollup_compactor is not None:
+        rollup_compactor.stop()
+    await batcher.close()
+    inference_executor.shutdown()
+    if worker_pool is not None:
+        worker_pool.close()
+    
+    # Écriture des prédictions encore en tampon
+    if prediction_logger is not None:
+        prediction_logger.close()
+    latency_recorder.close()
+    prediction_spool.close()
+
 # Optionnel : servir des fichiers statiques
 STATIC_DIR = ROOT_DIR / "src" / "web" / "static"
 if STATIC_DIR.exists():
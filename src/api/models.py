@@ -19,7 +19,7 @@ class PredictionResponse(BaseModel):
     prediction_result: str
     proba_cat: float
     proba_dog: float
-    inference_time_ms: int
+    inference_time_ms: float
     success: bool
     timestamp: datetime
 
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request, Form, Query
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 import sys
+import uuid
+from datetime import datetime
 from pathlib import Path
+from typing import Optional, Tuple
 import time
 
 # Ajouter le répertoire racine au path
@@ -11,14 +16,28 @@ ROOT_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
 from .auth import verify_token
-from src.models.predictor import CatDogPredictor
+from src.models.registry import ModelRegistry
+from src.models.batching import MicroBatcher
+from src.models.executor import InferenceExecutor, ExecutorSaturatedError
+from src.models.worker_pool import ModelWorkerPool
+from src.models.cache import PredictionCache
+from config.settings import BATCHING_CONFIG, INFERENCE_CONFIG, SERVING_CONFIG, MODEL_CONFIG, API_CONFIG, CACHE_CONFIG, REGISTRY_CONFIG, WRITE_BEHIND_CONFIG, SPOOL_CONFIG, ROLLUP_CONFIG, SKETCH_CONFIG, DASHBOARD_CONFIG
 
 # Imports pour la base de données
-from src.database.db_connector import get_db
-from src.database.feedback_service import FeedbackService
+from src.database.db_connector import get_async_db, engine, async_engine, SessionLocal
+from src.database.feedback_service import FeedbackService, AsyncFeedbackService
+from src.database.write_behind import PredictionLogWriter
+from src.database.spool import PredictionSpool
+from src.database.export import EXPORT_FORMATS, export_predictions
 
 # Imports pour le monitoring
 from src.monitoring.dashboard_service import DashboardService
+from src.monitoring.downsampling import resolve_range
+from src.monitoring.snapshot_cache import DashboardSnapshotCache
+from src.monitoring.live import LiveBroadcaster
+from src.monitoring.rollups import RollupCompactor, RollupService
+from src.monitoring.sketch import LatencySketchRecorder
+from src.monitoring.metrics import CONTENT_TYPE_LATEST, MODEL_BATCH_SIZE, PREDICTION_LATENCY, PREDICTIONS, STAGE_LATENCY, register_callback, render as render_metrics
 
 # Configuration des templates
 TEMPLATES_DIR = ROOT_DIR / "src" / "web" / "templates"
@@ -26,20 +45,204 @@ templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 router = APIRouter()
 
-# Initialisation du prédicteur
-predictor = CatDogPredictor()
+# Registre des versions du modèle (le modèle est chargé en arrière-plan au démarrage)
+# En mode "process_pool", le modèle est chargé par les workers : l'API ne fait que le préprocessing
+USE_WORKER_POOL = SERVING_CONFIG["mode"] == "process_pool"
+model_registry = ModelRegistry(
+    registry_dir=REGISTRY_CONFIG["dir"],
+    default_model_path=API_CONFIG["model_path"],
+    load_in_process=not USE_WORKER_POOL,
+)
+
+worker_pool = ModelWorkerPool(
+    num_workers=SERVING_CONFIG["num_workers"],
+    model_path=model_registry.active_model_path,
+    model_version=model_registry.active_version,
+    max_batch_size=BATCHING_CONFIG["max_batch_size"],
+    image_size=MODEL_CONFIG["image_size"],
+    request_timeout_s=SERVING_CONFIG["request_timeout_s"],
+    health_interval_s=SERVING_CONFIG["health_interval_s"],
+) if USE_WORKER_POOL else None
+
+if USE_WORKER_POOL:
+    # Nouvelle version du registre : rechargement progressif des workers
+    model_registry.on_swap = worker_pool.reload
+
+def predict_batch(images):
+    """Prédiction d'un batch par la version active (référence prise une seule fois par batch)"""
+    MODEL_BATCH_SIZE.observe(len(images))
+    return model_registry.active.predict_batch(images)
+
+def pool_predict_batch(images):
+    """Prédiction d'un batch par le premier worker disponible du pool"""
+    MODEL_BATCH_SIZE.observe(len(images))
+    return worker_pool.predict_batch(images)
+
+# Executor dédié : décodage et inférence hors de la boucle asyncio, admission bornée
+inference_executor = InferenceExecutor(
+    max_workers=INFERENCE_CONFIG["max_workers"],
+    max_queue_size=INFERENCE_CONFIG["max_queue_size"],
+    retry_after_s=INFERENCE_CONFIG["retry_after_s"],
+)
+
+# Micro-batching : les requêtes concurrentes partagent un même appel au modèle
+batcher = MicroBatcher(
+    pool_predict_batch if USE_WORKER_POOL else predict_batch,
+    max_batch_size=BATCHING_CONFIG["max_batch_size"],
+    max_wait_ms=BATCHING_CONFIG["max_wait_ms"],
+    executor=inference_executor.pool,
+    max_concurrent_batches=SERVING_CONFIG["num_workers"] if USE_WORKER_POOL else 1,
+)
+
+# Cache des prédictions adressé par le contenu des images
+prediction_cache = PredictionCache(
+    max_entries=CACHE_CONFIG["max_entries"],
+    max_bytes=CACHE_CONFIG["max_bytes"],
+    ttl_s=CACHE_CONFIG["ttl_s"],
+)
+
+# Spool local : les prédictions sont conservées sur disque si la base est indisponible, puis rejouées
+prediction_spool = PredictionSpool(
+    spool_dir=SPOOL_CONFIG["dir"],
+    session_factory=SessionLocal,
+    replay_interval_s=SPOOL_CONFIG["replay_interval_s"],
+    replay_batch_size=SPOOL_CONFIG["replay_batch_size"],
+    latency_budget_ms=SPOOL_CONFIG["db_latency_budget_ms"],
+)
+
+# Écriture différée des prédictions : INSERT multi-lignes en arrière-plan, identifiants pré-réservés
+prediction_logger = PredictionLogWriter(
+    session_factory=SessionLocal,
+    max_batch_size=WRITE_BEHIND_CONFIG["max_batch_size"],
+    flush_interval_s=WRITE_BEHIND_CONFIG["flush_interval_s"],
+    id_block_size=WRITE_BEHIND_CONFIG["id_block_size"],
+    max_buffer=WRITE_BEHIND_CONFIG["max_buffer"],
+    spool=prediction_spool,
+    latency_budget_ms=SPOOL_CONFIG["db_latency_budget_ms"],
+    retry_interval_s=SPOOL_CONFIG["replay_interval_s"],
+) if WRITE_BEHIND_CONFIG["enabled"] else None
+
+# Centiles de latence : sketch de quantiles du processus, fusionné périodiquement en base
+latency_recorder = LatencySketchRecorder(
+    session_factory=SessionLocal,
+    flush_interval_s=SKETCH_CONFIG["flush_interval_s"],
+    relative_accuracy=SKETCH_CONFIG["relative_accuracy"],
+)
+
+def _build_dashboard(time_range: str, mode: str):
+    """Construction du dashboard (requêtes + rendu Plotly) dans un thread, hors de la boucle asyncio"""
+    db = SessionLocal()
+    try:
+        return DashboardService.get_dashboard_data(db, time_range, mode, latency_recorder.pending())
+    finally:
+        db.close()
+
+async def _load_dashboard(time_range: str, mode: str):
+    return await run_in_threadpool(_build_dashboard, time_range, mode)
+
+# Instantanés du dashboard : partagés entre les lecteurs, rafraîchis en arrière-plan
+dashboard_snapshots = DashboardSnapshotCache(
+    loader=_load_dashboard,
+    ttl_s=DASHBOARD_CONFIG["snapshot_ttl_s"],
+    max_stale_s=DASHBOARD_CONFIG["snapshot_max_stale_s"],
+)
+
+def _build_live_kpis():
+    """KPI diffusés en direct (agrégats et sketch : quelques requêtes légères)"""
+    db = SessionLocal()
+    try:
+        totals = RollupService.get_totals(db)
+        return {
+            'kpi_inference': DashboardService.get_kpi_inference_time(db, totals),
+            'kpi_percentiles': DashboardService.get_kpi_latency_percentiles(db, latency_recorder.pending()),
+            'kpi_satisfaction': DashboardService.get_kpi_user_satisfaction(db, totals)
+        }
+    finally:
+        db.close()
+
+async def _load_live_kpis():
+    return await run_in_threadpool(_build_live_kpis)
+
+# Monitoring en direct (SSE) : nouvelles prédictions et KPI poussés à la page /monitoring
+live_broadcaster = LiveBroadcaster(
+    kpi_loader=_load_live_kpis,
+    flush_interval_s=DASHBOARD_CONFIG["live_flush_interval_s"],
+    kpi_interval_s=DASHBOARD_CONFIG["live_kpi_interval_s"],
+    max_points=DASHBOARD_CONFIG["max_points"],
+)
+
+# Compaction périodique des prédictions en agrégats (KPI du dashboard)
+rollup_compactor = RollupCompactor(
+    session_factory=SessionLocal,
+    interval_s=ROLLUP_CONFIG["interval_s"],
+    batch_size=ROLLUP_CONFIG["batch_size"],
+) if ROLLUP_CONFIG["enabled"] else None
+
+# Métriques calculées à la collecte (/metrics) : aucun coût par requête
+register_callback("inference_executor_in_flight", "Requêtes admises par l'executor d'inférence", lambda: inference_executor.in_flight)
+register_callback("inference_executor_queue_depth", "Requêtes admises en attente d'un thread d'inférence", lambda: inference_executor.queue_depth)
+register_callback("inference_executor_capacity", "Nombre maximal de requêtes admises", lambda: inference_executor.capacity)
+# Pools de connexions : "async" pour les routes, "sync" pour l'écriture différée et le spool
+DB_POOLS = {"async": async_engine.sync_engine.pool, "sync": engine.pool}
+register_callback("db_pool_size", "Taille du pool de connexions PostgreSQL",
+                           lambda: {name: pool.size() for name, pool in DB_POOLS.items()}, labelnames=["engine"])
+register_callback("db_pool_checked_out", "Connexions PostgreSQL en cours d'utilisation",
+                           lambda: {name: pool.checkedout() for name, pool in DB_POOLS.items()}, labelnames=["engine"])
+register_callback("db_pool_overflow", "Connexions PostgreSQL ouvertes au-delà de la taille du pool",
+                           lambda: {name: max(0, pool.overflow()) for name, pool in DB_POOLS.items()}, labelnames=["engine"])
+register_callback("prediction_cache_entries", "Entrées du cache de prédictions", lambda: prediction_cache.stats()["entries"])
+register_callback("prediction_cache_bytes", "Mémoire (estimée) occupée par le cache de prédictions", lambda: prediction_cache.stats()["bytes"])
+register_callback(
+    "prediction_cache_events_total", "Événements du cache de prédictions",
+    lambda: {event: prediction_cache.stats()[event] for event in ("hits", "coalesced", "misses", "evictions", "expirations")},
+    type_name="counter", labelnames=["event"]
+)
+if prediction_logger is not None:
+    register_callback("prediction_log_buffered", "Prédictions en attente d'écriture en base", lambda: prediction_logger.buffered)
+    register_callback("prediction_log_last_flush_seconds", "Durée de la dernière écriture par lot",
+                               lambda: prediction_logger.last_flush_ms / 1000 if prediction_logger.last_flush_ms is not None else None)
+    register_callback(
+        "prediction_log_events_total", "Écritures différées des prédictions",
+        lambda: {event: prediction_logger.stats()[event] for event in ("flushes", "failed_flushes", "rows_written", "dropped")},
+        type_name="counter", labelnames=["event"]
+    )
+register_callback("prediction_spool_pending_bytes", "Taille des segments du spool en attente de rejeu", lambda: prediction_spool.pending_bytes)
+register_callback(
+    "prediction_spool_events_total", "Prédictions écrites, rejouées, refusées ou perdues par le spool local",
+    lambda: {event: getattr(prediction_spool, event) for event in ("spooled", "replayed", "rejected", "write_errors")},
+    type_name="counter", labelnames=["event"]
+)
+register_callback(
+    "dashboard_snapshot_events_total", "Lectures et rafraîchissements des instantanés du dashboard",
+    lambda: {event: getattr(dashboard_snapshots, event) for event in ("hits", "stale_hits", "misses", "refreshes", "refresh_errors")},
+    type_name="counter", labelnames=["event"]
+)
+register_callback("monitoring_stream_subscribers", "Clients abonnés au flux de monitoring en direct", lambda: live_broadcaster.subscribers)
+if rollup_compactor is not None:
+    register_callback("prediction_rollup_compacted_total", "Prédictions agrégées par la compaction",
+                               lambda: rollup_compactor.compacted, type_name="counter")
+if USE_WORKER_POOL:
+    register_callback("inference_workers_ready", "Workers d'inférence prêts", lambda: sum(w["ready"] for w in worker_pool.health()))
+    register_callback("inference_workers_restarts_total", "Relances des workers d'inférence", lambda: sum(w["restarts"] for w in worker_pool.health()), type_name="counter")
+
+def model_ready() -> bool:
+    """Le modèle est-il prêt à servir (dans l'API ou dans au moins un worker) ?"""
+    if USE_WORKER_POOL:
+        return worker_pool.is_ready()
+    return model_registry.active.is_loaded()
 
 @router.get("/", response_class=HTMLResponse, tags=["🌐 Page Web"])
 async def welcome(request: Request):
     """Page d'accueil avec interface web qui présente les principales fonctionnalités de l'application"""
     return templates.TemplateResponse("index.html", {
         "request": request,
-        "model_loaded": predictor.is_loaded()
+        "model_loaded": model_ready()
     })
 
 @router.get("/info", response_class=HTMLResponse, tags=["🌐 Page Web"])
 async def info_page(request: Request):
     """Page d'informations"""
+    predictor = model_registry.active
     model_info = {
         "name": "Cats vs Dogs Classifier",
         "version": "1.0.0",
@@ -47,7 +250,7 @@ async def info_page(request: Request):
         "parameters": predictor.model.count_params() if predictor.is_loaded() else 0,
         "classes": ["Cat", "Dog"],
         "input_size": f"{predictor.image_size[0]}x{predictor.image_size[1]}",
-        "model_loaded": predictor.is_loaded()
+        "model_loaded": model_ready()
     }
     return templates.TemplateResponse("info.html", {
         "request": request, 
@@ -59,7 +262,7 @@ async def inference_page(request: Request):
     """Page d'inférence"""
     return templates.TemplateResponse("inference.html", {
         "request": request,
-        "model_loaded": predictor.is_loaded()
+        "model_loaded": model_ready()
     })
 
 @router.post("/api/predict", tags=["🧠 Inférence"])
@@ -67,7 +270,7 @@ async def predict_api(
     file: UploadFile = File(...),
     rgpd_consent: bool = Form(False),
     token: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     API de prédiction avec enregistrement en base de données
@@ -78,33 +281,119 @@ async def predict_api(
         token: Token d'authentification
         db: Session de base de données
     """
-    if not predictor.is_loaded():
+    if not model_ready():
         raise HTTPException(status_code=503, detail="Modèle non disponible")
     
     if not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="Format d'image invalide")
     
+    try:
+        with inference_executor.admission():
+            return await _predict_and_log(file, rgpd_consent, db)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Service d'inférence saturé, réessayez plus tard",
+            headers={"Retry-After": str(e.retry_after_s)}
+        )
+
+async def _run_inference(image_data: bytes, timings: dict):
+    """Décodage et prédiction hors de la boucle asyncio (durées des étapes ajoutées à timings)"""
+    predictor = model_registry.active
+    processed_image = await inference_executor.run(predictor.preprocess_image, image_data, timings=timings)
+    
+    # Prédiction regroupée avec les requêtes concurrentes si le micro-batching est actif
+    if BATCHING_CONFIG["enabled"] or USE_WORKER_POOL:
+        return await batcher.submit(processed_image, timings=timings)
+    
+    submitted = time.perf_counter()
+    def predict():
+        started = time.perf_counter()
+        result = predictor.predict_batch(processed_image)[0]
+        timings["queue_wait_ms"] = (started - submitted) * 1000
+        timings["model_ms"] = (time.perf_counter() - started) * 1000
+        return result
+    return await inference_executor.run(predict)
+
+async def _log_prediction(db: AsyncSession, **fields) -> Tuple[Optional[int], str]:
+    """
+    Enregistrement d'une prédiction : mise en tampon (écriture différée par lots)
+    ou écriture synchrone si WRITE_BEHIND_ENABLED=false
+    
+    La durée de l'écriture côté requête est enregistrée dans les métriques (étape db_write) ;
+    en écriture différée elle est aussi stockée dans la ligne (db_write_ms), l'écriture
+    synchrone ne pouvant pas contenir la durée de son propre INSERT.
+    
+    Returns:
+        Tuple (identifiant de l'enregistrement ou None si la base est indisponible,
+        request_uuid) : l'un ou l'autre désigne la prédiction pour update_feedback
+    """
+    request_uuid = str(uuid.uuid4())
+    fields["request_uuid"] = request_uuid
+    start = time.perf_counter()
+    if prediction_logger is not None:
+        record_id = await run_in_threadpool(prediction_logger.log, FeedbackService.build_record(**fields))
+        STAGE_LATENCY.labels("db_write").observe(time.perf_counter() - start)
+        return record_id, request_uuid
+    try:
+        record = await AsyncFeedbackService.save_prediction_feedback(db, **fields)
+        STAGE_LATENCY.labels("db_write").observe(time.perf_counter() - start)
+        return record.id, request_uuid
+    except Exception as e:
+        # Base indisponible : enregistrement conservé dans le spool local et rejoué plus tard
+        print(f"⚠️  Écriture en base impossible, prédiction placée dans le spool: {e}")
+        await db.rollback()
+        await run_in_threadpool(prediction_spool.append, [FeedbackService.build_record(**fields)])
+        return None, request_uuid
+
+async def _predict_and_log(file: UploadFile, rgpd_consent: bool, db: AsyncSession):
+    """Prédiction (hors boucle asyncio) et enregistrement en base de données"""
     # Mesure du temps de début
     start_time = time.perf_counter()
+    timings = {}  # Durées (ms) par étape : read, decode, resize, queue_wait, model
     
     try:
         # Lecture de l'image
         image_data = await file.read()
+        timings["read_ms"] = (time.perf_counter() - start_time) * 1000
         
-        # Prédiction
-        result = predictor.predict(image_data)
+        # Prédiction (servie par le cache si la même image a déjà été traitée par ce modèle)
+        # En cas de hit, les étapes decode/resize/model ne sont pas exécutées (NULL en base)
+        if CACHE_CONFIG["enabled"]:
+            # Le résultat n'est mis en cache que s'il a été produit par la version de la clé : pendant un
+            # rechargement progressif (process_pool), des workers servent encore l'ancien modèle
+            model_version = model_registry.active_version
+            cache_key = await inference_executor.run(PredictionCache.make_key, image_data, model_version)
+            result, cache_hit = await prediction_cache.get_or_compute(
+                cache_key,
+                lambda: _run_inference(image_data, timings),
+                cacheable=lambda computed: computed.get("model_version") == model_version
+            )
+        else:
+            result, cache_hit = await _run_inference(image_data, timings), False
         
-        # Calcul du temps d'inférence en millisecondes
+        # Calcul du temps de traitement en millisecondes (résolution sub-milliseconde)
         end_time = time.perf_counter()
-        inference_time_ms = int((end_time - start_time) * 1000)
+        inference_time_ms = round((end_time - start_time) * 1000, 3)
+        
+        PREDICTION_LATENCY.labels(str(cache_hit).lower()).observe(end_time - start_time)
+        latency_recorder.observe(inference_time_ms)
+        live_broadcaster.publish_point({
+            "t": datetime.now().isoformat(timespec="milliseconds"),
+            "ms": inference_time_ms,
+            "cache_hit": cache_hit
+        })
+        PREDICTIONS.labels(result["prediction"].lower()).inc()
+        for stage, value in timings.items():
+            STAGE_LATENCY.labels(stage.replace("_ms", "")).observe(value / 1000)
         
         # Extraction des probabilités
         proba_cat = result['probabilities']['cat'] * 100  # Conversion en pourcentage
         proba_dog = result['probabilities']['dog'] * 100
         
-        # Enregistrement en base de données
-        feedback_record = FeedbackService.save_prediction_feedback(
-            db=db,
+        # Enregistrement en base de données (écriture différée, hors du chemin de la réponse)
+        feedback_id, request_uuid = await _log_prediction(
+            db,
             inference_time_ms=inference_time_ms,
             success=True,
             prediction_result=result["prediction"].lower(),  # 'cat' ou 'dog'
@@ -113,7 +402,10 @@ async def predict_api(
             rgpd_consent=rgpd_consent,
             filename=file.filename if rgpd_consent else None,
             user_feedback=None,  # Sera mis à jour plus tard
-            user_comment=None    # Sera mis à jour plus tard
+            user_comment=None,   # Sera mis à jour plus tard
+            cache_hit=cache_hit,
+            model_version=result.get("model_version", model_registry.active_version),
+            timings=timings
         )
         
         # Préparation de la réponse
@@ -126,7 +418,11 @@ async def predict_api(
                 "dog": f"{result['probabilities']['dog']:.2%}"
             },
             "inference_time_ms": inference_time_ms,
-            "feedback_id": feedback_record.id  # ID pour les mises à jour ultérieures
+            "timings_ms": {stage: round(value, 3) for stage, value in timings.items()},
+            "cache_hit": cache_hit,
+            "model_version": result.get("model_version", model_registry.active_version),
+            "feedback_id": feedback_id,  # ID pour les mises à jour ultérieures
+            "request_uuid": request_uuid  # Alternative à feedback_id (None si la base est indisponible)
         }
         
         return response_data
@@ -134,12 +430,13 @@ async def predict_api(
     except Exception as e:
         # En cas d'erreur, enregistrer quand même
         end_time = time.perf_counter()
-        inference_time_ms = int((end_time - start_time) * 1000)
+        inference_time_ms = round((end_time - start_time) * 1000, 3)
+        PREDICTIONS.labels("error").inc()
         
         # Enregistrement de l'erreur en base
         try:
-            FeedbackService.save_prediction_feedback(
-                db=db,
+            await _log_prediction(
+                db,
                 inference_time_ms=inference_time_ms,
                 success=False,
                 prediction_result="error",
@@ -148,36 +445,55 @@ async def predict_api(
                 rgpd_consent=False,
                 filename=None,
                 user_feedback=None,
-                user_comment=str(e)
+                user_comment=str(e),
+                model_version=model_registry.active_version,
+                timings=timings
             )
-        except:
-            pass  # Si l'enregistrement échoue, on continue quand même
+        except Exception as log_error:
+            print(f"❌ Enregistrement de l'erreur de prédiction impossible: {log_error}")
         
         raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
 
 @router.post("/api/update-feedback", tags=["📊 Monitoring"])
 async def update_feedback(
-    feedback_id: int = Form(...),
+    feedback_id: int = Form(None),
+    request_uuid: str = Form(None),
     user_feedback: int = Form(None),
     user_comment: str = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mise à jour du feedback utilisateur (satisfaction et commentaire)
     
     Args:
         feedback_id: ID de l'enregistrement à mettre à jour
+        request_uuid: request_uuid de la prédiction (si feedback_id est absent de la réponse)
         user_feedback: Satisfaction utilisateur (0 ou 1)
         user_comment: Commentaire optionnel
         db: Session de base de données
     """
+    if feedback_id is None and not request_uuid:
+        raise HTTPException(status_code=400, detail="feedback_id ou request_uuid requis")
+    key = feedback_id if feedback_id is not None else request_uuid
+    
     try:
-        from src.database.models import PredictionFeedback
+        # Enregistrement encore dans le tampon d'écriture différée : écriture immédiate
+        if prediction_logger is not None and prediction_logger.is_pending(key):
+            await run_in_threadpool(prediction_logger.flush)
         
-        # Récupération de l'enregistrement
-        record = db.query(PredictionFeedback).filter(
-            PredictionFeedback.id == feedback_id
-        ).first()
+        # Enregistrement dans le spool local (base indisponible) : pas encore modifiable
+        if prediction_spool.is_spooled(key):
+            raise HTTPException(
+                status_code=503,
+                detail="Enregistrement en attente d'écriture en base, réessayez plus tard",
+                headers={"Retry-After": str(int(SPOOL_CONFIG["replay_interval_s"]))}
+            )
+        
+        # Récupération de l'enregistrement (verrouillé : exclut une compaction concurrente des agrégats)
+        if feedback_id is not None:
+            record = await AsyncFeedbackService.get_prediction(db, feedback_id, for_update=True)
+        else:
+            record = await AsyncFeedbackService.get_prediction_by_uuid(db, request_uuid, for_update=True)
         
         if not record:
             raise HTTPException(
@@ -193,6 +509,7 @@ async def update_feedback(
             )
         
         # Mise à jour des champs
+        old_feedback = record.user_feedback
         if user_feedback is not None:
             if user_feedback not in [0, 1]:
                 raise HTTPException(
@@ -204,8 +521,11 @@ async def update_feedback(
         if user_comment:
             record.user_comment = user_comment
         
+        # Prédiction déjà agrégée : correction des compteurs de feedback de son agrégat
+        await db.run_sync(RollupService.apply_feedback_change, record, old_feedback)
+        
         # Sauvegarde en base
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -215,14 +535,14 @@ async def update_feedback(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Erreur lors de la mise à jour: {str(e)}"
         )
 
 @router.get("/api/statistics", tags=["📊 Monitoring"])
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: AsyncSession = Depends(get_async_db)):
     """
     Récupération des statistiques de prédiction
     
@@ -230,7 +550,7 @@ async def get_statistics(db: Session = Depends(get_db)):
         Statistiques globales sur les prédictions
     """
     try:
-        stats = FeedbackService.get_statistics(db)
+        stats = await AsyncFeedbackService.get_statistics(db, latency_recorder.pending())
         return stats
     except Exception as e:
         raise HTTPException(
@@ -238,50 +558,118 @@ async def get_statistics(db: Session = Depends(get_db)):
             detail=f"Erreur lors de la récupération des statistiques: {str(e)}"
         )
 
+@router.get("/api/cache/stats", tags=["📊 Monitoring"])
+async def get_cache_stats():
+    """
+    Compteurs du cache de prédictions (hits, misses, évictions...)
+    
+    Permet de dimensionner le cache (CACHE_MAX_ENTRIES, CACHE_MAX_MB, CACHE_TTL_S)
+    """
+    return {
+        "enabled": CACHE_CONFIG["enabled"],
+        "model_version": model_registry.active_version,
+        **prediction_cache.stats()
+    }
+
+@router.get("/metrics", tags=["📊 Monitoring"])
+async def metrics():
+    """
+    Métriques au format Prometheus (à scraper par le système d'alerting)
+    
+    Latences HTTP par route, latences d'inférence par étape, taille des batchs,
+    saturation de l'executor, pool de connexions PostgreSQL et cache.
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 @router.get("/api/recent-predictions", tags=["📊 Monitoring"])
 async def get_recent_predictions(
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=1000, description="Nombre de prédictions par page"),
+    cursor: str = Query(None, description="Curseur de la page suivante (next_cursor de la page précédente)"),
+    start: datetime = Query(None, description="Début de période (created_at >= start)"),
+    end: datetime = Query(None, description="Fin de période (created_at <= end)"),
+    result: str = Query(None, pattern="^(cat|dog|error)$", description="Filtre sur le résultat"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Récupération des prédictions récentes
+    Récupération des prédictions récentes (les plus récentes d'abord)
     
+    Pagination par curseur : la réponse contient next_cursor, à renvoyer pour
+    obtenir la page suivante (null sur la dernière page).
+
     Args:
-        limit: Nombre de prédictions à récupérer (défaut: 10)
+        limit: Nombre de prédictions par page (défaut: 10, maximum: 1000)
+        cursor: next_cursor de la page précédente (absent : première page) ; curseur
+            invalide : erreur 400
+        start: Début de période, inclus (created_at >= start)
+        end: Fin de période, incluse (created_at <= end)
+        result: Filtre sur le résultat ('cat', 'dog' ou 'error')
+        db: Session de base de données
+
+    Returns:
+        Dict {'predictions', 'count', 'next_cursor'} : next_cursor est à passer en
+        paramètre cursor pour la page suivante, avec les mêmes filtres (null sur la
+        dernière page)
     """
     try:
-        predictions = FeedbackService.get_recent_predictions(db, limit=limit)
-        
-        # Formatage des résultats
-        results = []
-        for pred in predictions:
-            results.append({
-                "id": pred.id,
-                "timestamp": pred.timestamp.isoformat() if pred.timestamp else None,
-                "prediction_result": pred.prediction_result,
-                "proba_cat": float(pred.proba_cat),
-                "proba_dog": float(pred.proba_dog),
-                "inference_time_ms": pred.inference_time_ms,
-                "success": pred.success,
-                "rgpd_consent": pred.rgpd_consent,
-                "user_feedback": pred.user_feedback,
-                "filename": pred.filename if pred.rgpd_consent else None
-            })
-        
-        return {"predictions": results, "count": len(results)}
-        
+        predictions, next_cursor = await AsyncFeedbackService.get_recent_predictions(
+            db, limit=limit, cursor=cursor, start=start, end=end, result=result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erreur lors de la récupération des prédictions: {str(e)}"
         )
+    
+    # Formatage des résultats
+    results = []
+    for pred in predictions:
+        results.append({
+            "id": pred.id,
+            "timestamp": pred.created_at.isoformat() if pred.created_at else None,
+            "prediction_result": pred.prediction_result,
+            "proba_cat": float(pred.proba_cat),
+            "proba_dog": float(pred.proba_dog),
+            "inference_time_ms": pred.inference_time_ms,
+            "success": pred.success,
+            "rgpd_consent": pred.rgpd_consent,
+            "user_feedback": pred.user_feedback,
+            "filename": pred.filename if pred.rgpd_consent else None
+        })
+    
+    return {"predictions": results, "count": len(results), "next_cursor": next_cursor}
+
+@router.get("/api/predictions/export", tags=["📊 Monitoring"])
+async def export_prediction_history(
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Format : csv ou ndjson"),
+    start: datetime = Query(None, description="Début de période (created_at >= start)"),
+    end: datetime = Query(None, description="Fin de période (created_at <= end)"),
+    result: str = Query(None, pattern="^(cat|dog|error)$", description="Filtre sur le résultat"),
+    token: str = Depends(verify_token)
+):
+    """
+    Export de l'historique des prédictions en flux (ordre chronologique)
+    
+    Les lignes sont lues par un curseur côté serveur et envoyées au fil de
+    l'eau : mémoire constante, quel que soit le volume exporté.
+    """
+    filename = f"predictions-{datetime.now():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        export_predictions(SessionLocal, format, start=start, end=end, result=result),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.get("/api/info", tags=["🧠 Inférence"])
 async def api_info():
     """Informations API JSON"""
+    predictor = model_registry.active
     return {
-        "model_loaded": predictor.is_loaded(),
+        "model_loaded": model_ready(),
         "model_path": str(predictor.model_path),
+        "model_version": predictor.model_version,
+        "serving_mode": SERVING_CONFIG["mode"],
         "version": "2.0.0",  # Version mise à jour
         "parameters": predictor.model.count_params() if predictor.is_loaded() else 0,
         "features": [
@@ -292,25 +680,63 @@ async def api_info():
         ]
     }
 
+@router.get("/api/models", tags=["🧠 Inférence"])
+async def list_models():
+    """Versions disponibles dans le registre de modèles et version active"""
+    return model_registry.status()
+
+@router.post("/api/admin/reload", status_code=202, tags=["🧠 Inférence"])
+async def reload_model(
+    version: str = Form(None),
+    token: str = Depends(verify_token)
+):
+    """
+    Rechargement à chaud du modèle (sans interruption de service)
+    
+    La version est chargée et réchauffée en arrière-plan, puis basculée atomiquement :
+    les requêtes en cours terminent sur l'ancienne version.
+    
+    Args:
+        version: Version du registre à charger (défaut : ACTIVE ou la plus récente)
+    """
+    if version is not None and version not in model_registry.list_versions():
+        raise HTTPException(status_code=404, detail=f"Version de modèle introuvable: {version}")
+    if not model_registry.reload_async(version):
+        raise HTTPException(status_code=409, detail="Un chargement de modèle est déjà en cours")
+    return {"message": "Chargement lancé", **model_registry.status()}
+
 @router.get("/monitoring", response_class=HTMLResponse, tags=["📊 Monitoring"])
-async def monitoring_dashboard(request: Request, db: Session = Depends(get_db)):
+async def monitoring_dashboard(
+    request: Request,
+    time_range: str = Query(None, alias="range", description="Période des graphiques : 1h, 24h, 7d, 30d ou all"),
+    mode: str = Query("buckets", pattern="^(buckets|raw)$", description="Courbe agrégée par intervalle ou points bruts (LTTB)")
+):
     """
     📊 Dashboard de monitoring
     
     Affiche les métriques et graphiques de surveillance :
     - KPI temps d'inférence moyen
-    - Courbe temporelle des temps d'inférence
+    - Courbe temporelle des temps d'inférence (moyenne, p50, p95, max par intervalle)
+    - Décomposition du temps de traitement par étape
     - KPI taux de satisfaction
     - Scatter plot de la satisfaction utilisateur
+    
+    Les données sont servies depuis un instantané (rafraîchi toutes les
+    DASHBOARD_SNAPSHOT_TTL_S secondes) ; 304 si l'ETag du navigateur est à jour.
     """
     try:
-        # Récupération des données du dashboard
-        dashboard_data = DashboardService.get_dashboard_data(db)
+        # Récupération des données du dashboard (instantané partagé)
+        time_range, _ = resolve_range(time_range, DASHBOARD_CONFIG["default_range"])
+        snapshot = await dashboard_snapshots.get(time_range, mode)
+        headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+        
+        if request.headers.get("if-none-match") == snapshot.etag:
+            return Response(status_code=304, headers=headers)
         
         return templates.TemplateResponse("monitoring.html", {
             "request": request,
-            **dashboard_data
-        })
+            **snapshot.data
+        }, headers=headers)
     except Exception as e:
         return templates.TemplateResponse("monitoring.html", {
             "request": request,
@@ -318,19 +744,51 @@ async def monitoring_dashboard(request: Request, db: Session = Depends(get_db)):
         })
 
 
+@router.get("/monitoring/stream", tags=["📊 Monitoring"])
+async def monitoring_stream():
+    """
+    Flux Server-Sent Events du monitoring en direct
+    
+    Événements : "points" (nouvelles prédictions) et "kpi" (KPI mis à jour).
+    Utilisé par la page /monitoring pour compléter ses graphiques sans rechargement.
+    """
+    return StreamingResponse(
+        live_broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/health/live", tags=["💚 Santé système"])
+async def liveness():
+    """Liveness : le processus répond (indépendamment du modèle et de la base)"""
+    return {"status": "alive"}
+
+@router.get("/health/ready", tags=["💚 Santé système"])
+async def readiness():
+    """Readiness : le modèle est chargé et prêt à servir (503 tant qu'il est en chargement)"""
+    if not model_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "loading", "model_loaded": False},
+            headers={"Retry-After": "1"}
+        )
+    return {"status": "ready", "model_loaded": True}
+
 @router.get("/health", tags=["💚 Santé système"])
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """Vérification de l'état de l'API et de la base de données"""
     db_status = "connected"
     try:
         # Test de connexion à la base de données
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
     except Exception as e:
         db_status = f"error: {str(e)}"
     
-    return {
+    health = {
         "status": "healthy" if db_status == "connected" else "degraded",
-        "model_loaded": predictor.is_loaded(),
+        "model_loaded": model_ready(),
         "database": db_status
-    }
\ No newline at end of file
+    }
+    if USE_WORKER_POOL:
+        health["workers"] = worker_pool.health()
+    return health
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Pipeline d'entrée de l'entraînement (tf.data)
+
+Le décodage et l'augmentation (retournement, rotation, zoom) sont exécutés
+sur CPU par des map parallèles, en amont du pas d'entraînement : le modèle
+entraîné (et exporté pour l'API) ne contient plus de couches d'augmentation.
+
+    fichiers (ordre trié) -> shard(worker) -> décodage // -> cache -> shuffle
+        -> batch -> augmentation // -> prefetch
+
+- Le cache est placé avant le mélange et l'augmentation : les images décodées
+  sont réutilisées à chaque époque, l'augmentation reste différente. Cache en
+  mémoire ou dans un fichier (jeux plus grands que la RAM). Le nom du fichier
+  de cache contient une empreinte de la liste des fichiers, de la graine et de
+  val_split : tf.data réutilise un cache existant sans vérifier ce qui
+  l'alimente, un jeu modifié doit donc changer de fichier.
+- Un cache n'est finalisé qu'après une lecture complète du dataset : les
+  mesures sur quelques batches (benchmarks) utilisent un pipeline sans cache.
+- Le découpage train/val (hash graine + chemin, comme les shards) et la
+  répartition entre workers (Dataset.shard sur une liste triée) sont
+  déterministes : chaque worker lit toujours les mêmes fichiers.
+- Avec des shards préprocessés (src/data/shards.py), seules l'augmentation et
+  le prefetch sont ajoutés.
+
+TensorFlow n'est importé qu'à l'appel des fonctions.
+"""
+
+import hashlib
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import sys
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import PIPELINE_CONFIG
+from src.data.shards import CLASSES, assign_split
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif"}
+
+
+def list_files(data_path: Path, seed: int, val_split: float) -> Dict[str, Tuple[List[str], List[int]]]:
+    """Fichiers et labels de chaque split (ordre trié, découpage déterministe)"""
+    splits = {"train": ([], []), "val": ([], [])}
+    for label, class_name in enumerate(CLASSES):
+        folder = data_path / class_name
+        if not folder.exists():
+            continue
+        for path in sorted(folder.iterdir()):
+            if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+                paths, labels = splits[assign_split(f"{class_name}/{path.name}", seed, val_split)]
+                paths.append(str(path))
+                labels.append(label)
+    return splits
+
+
+def create_augmentation():
+    """Augmentation des images (anciennement en tête du modèle), appliquée par batch dans le pipeline"""
+    import tensorflow as tf
+    from keras import layers
+
+    seed = PIPELINE_CONFIG["seed"]
+    return tf.keras.Sequential([
+        layers.RandomFlip("horizontal", seed=seed),
+        layers.RandomRotation(0.1, seed=seed),
+        layers.RandomZoom(0.1, seed=seed),
+    ], name="data_augmentation")
+
+
+def _options(deterministic: bool):
+    import tensorflow as tf
+
+    options = tf.data.Options()
+    options.deterministic = deterministic
+    return options
+
+
+def cache_fingerprint(paths: List[str], labels: List[int], image_size: Tuple[int, int], seed: int, val_split: float) -> str:
+    """Empreinte du contenu d'un cache : fichiers et labels, taille d'image, graine et val_split"""
+    digest = hashlib.sha1(f"{tuple(image_size)}|{seed}|{val_split}".encode())
+    for path, label in zip(paths, labels):
+        digest.update(f"\n{path}|{label}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _cache(dataset, cache: str, prefix: str, fingerprint: str, cache_dir: Path = None):
+    if cache == "memory":
+        return dataset.cache()
+    if cache == "file":
+        cache_dir = Path(cache_dir or PIPELINE_CONFIG["cache_dir"])
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Caches du même split construits pour un autre jeu de fichiers : supprimés
+        for stale in cache_dir.glob(f"{prefix}-*"):
+            if not stale.name.startswith(f"{prefix}-{fingerprint}"):
+                stale.unlink()
+        return dataset.cache(str(cache_dir / f"{prefix}-{fingerprint}"))
+    return dataset
+
+
+def finalize(dataset, training: bool, config: Dict = None):
+    """Augmentation parallèle (entraînement) et prefetch d'un dataset de batches (images float32 0-255, labels)"""
+    import tensorflow as tf
+
+    config = {**PIPELINE_CONFIG, **(config or {})}
+    parallel_calls = config["parallel_calls"] or tf.data.AUTOTUNE
+    if training and config["augment"]:
+        augmentation = create_augmentation()
+        dataset = dataset.map(
+            lambda images, labels: (augmentation(images, training=True), labels),
+            num_parallel_calls=parallel_calls
+        )
+    return dataset.prefetch(tf.data.AUTOTUNE).with_options(_options(config["deterministic"]))
+
+
+def build_datasets(data_path: Path, image_size: Tuple[int, int], batch_size: int, val_split: float = 0.2,
+                   num_shards: int = 1, shard_index: int = 0, config: Dict = None):
+    """
+    Datasets d'entraînement et de validation à partir des images d'un répertoire Cat/Dog
+
+    Args:
+        data_path: Répertoire contenant Cat/ et Dog/
+        image_size: Taille des images (hauteur, largeur)
+        batch_size: Taille des batches
+        val_split: Fraction des images en validation
+        num_shards: Nombre de workers d'entraînement se partageant les fichiers
+        shard_index: Indice de ce worker
+        config: Surcharge de PIPELINE_CONFIG
+
+    Returns:
+        (train_ds, val_ds)
+    """
+    import tensorflow as tf
+
+    config = {**PIPELINE_CONFIG, **(config or {})}
+    parallel_calls = config["parallel_calls"] or tf.data.AUTOTUNE
+    splits = list_files(data_path, config["seed"], val_split)
+
+    def decode(path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        image = tf.image.resize(image, image_size)
+        return image, label
+
+    datasets = []
+    for split in ("train", "val"):
+        paths, labels = splits[split]
+        dataset = tf.data.Dataset.from_tensor_slices((paths, tf.constant(labels, dtype=tf.int32)))
+        if num_shards > 1:
+            dataset = dataset.shard(num_shards, shard_index)
+        dataset = dataset.map(decode, num_parallel_calls=parallel_calls)
+        fingerprint = cache_fingerprint(paths, labels, image_size, config["seed"], val_split)
+        dataset = _cache(dataset, config["cache"], f"{split}-{shard_index}of{num_shards}", fingerprint, config["cache_dir"])
+        if split == "train":
+            dataset = dataset.shuffle(config["shuffle_buffer"], seed=config["seed"], reshuffle_each_iteration=True)
+        dataset = dataset.batch(batch_size)
+        datasets.append(finalize(dataset, training=split == "train", config=config))
+    return tuple(datasets)
+
+
+def benchmark_input(dataset, steps: int = 50) -> Dict:
+    """
+    Débit du pipeline d'entrée seul (aucun calcul du modèle)
+
+    Lecture partielle : un cache du dataset ne serait jamais finalisé (tf.data
+    l'abandonne), mesurer un pipeline construit avec cache="none".
+
+    Returns:
+        Dict {'steps', 'images', 'batch_ms', 'images_per_s'} (premier batch exclu : démarrage)
+    """
+    iterator = iter(dataset)
+    next(iterator)
+    steps_done, images = 0, 0
+    start = time.perf_counter()
+    for batch, _ in iterator:
+        steps_done += 1
+        images += int(batch.shape[0])
+        if steps_done >= steps:
+            break
+    elapsed = time.perf_counter() - start
+    return {
+        "steps": steps_done,
+        "images": images,
+        "batch_ms": round(elapsed / max(steps_done, 1) * 1000, 3),
+        "images_per_s": round(images / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def benchmark_compute(model, dataset, steps: int = 20) -> Dict:
+    """Débit du pas d'entraînement seul, sur un batch déjà en mémoire (aucune attente du pipeline)"""
+    images, labels = next(iter(dataset))
+    model.train_on_batch(images, labels)  # Compilation / démarrage
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.train_on_batch(images, labels)
+    elapsed = time.perf_counter() - start
+    return {
+        "steps": steps,
+        "batch_ms": round(elapsed / steps * 1000, 3),
+        "images_per_s": round(steps * int(images.shape[0]) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def bottleneck_report(input_stats: Dict, compute_stats: Dict) -> Dict:
+    """Pipeline d'entrée ou calcul : le plus lent des deux fixe le débit de l'entraînement"""
+    input_ms, compute_ms = input_stats["batch_ms"], compute_stats["batch_ms"]
+    bound = "input" if input_ms > compute_ms else "compute"
+    return {
+        "bound": bound,
+        "input_batch_ms": input_ms,
+        "compute_batch_ms": compute_ms,
+        "input_images_per_s": input_stats["images_per_s"],
+        "compute_images_per_s": compute_stats["images_per_s"],
+        # Part du pas d'entraînement passée à attendre les données si rien ne se recouvrait
+        "input_share": round(input_ms / (input_ms + compute_ms), 3) if input_ms + compute_ms else None,
+    }
@@ -1,59 +1,278 @@
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from PIL import Image, ImageFile
 from pathlib import Path
 import shutil
 import sys
+from typing import Dict, Optional, Tuple
 
 # Ajouter le répertoire config au path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from config.settings import RAW_DATA_DIR, TEMP_DIR
+from config.settings import DATA_PREP_CONFIG, RAW_DATA_DIR, TEMP_DIR
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
-def clean_corrupted_images(data_path: Path) -> int:
-    """Nettoyage des images corrompues"""
-    num_skipped = 0
-    total_files = 0
-    
+MANIFEST_VERSION = 1
+
+def validate_image(fpath: str) -> Tuple[str, Optional[str]]:
+    """
+    Vérification d'une image (exécutée dans un processus du pool)
+
+    Returns:
+        (chemin, None) si l'image est valide, (chemin, motif du rejet) sinon
+    """
+    try:
+        with Image.open(fpath) as img:
+            img.verify()
+
+        if Path(fpath).suffix.lower() in ['.jpg', '.jpeg']:
+            with open(fpath, 'rb') as f:
+                content = f.read(20)
+                if not (b"JFIF" in content or b"Exif" in content):
+                    raise Exception("JPEG invalide")
+        return fpath, None
+    except Exception as e:
+        return fpath, f"{type(e).__name__}: {e}"
+
+def load_manifest(manifest_path: Path) -> Dict[str, list]:
+    """Verdicts des validations précédentes {chemin: [taille, mtime_ns, verdict]} (vide si absent ou illisible)"""
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest["files"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+def save_manifest(manifest_path: Path, files: Dict[str, list]):
+    """Écriture atomique du manifeste (fichier temporaire puis renommage)"""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f)
+    os.replace(tmp_path, manifest_path)
+
+def quarantine_file(fpath: Path, quarantine_dir: Path, reason: str) -> Path:
+    """Déplacement d'une image invalide dans quarantine_dir/<classe>/ (motif ajouté à reasons.jsonl)"""
+    target_dir = quarantine_dir / fpath.parent.name
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / fpath.name
+    counter = 1
+    while target.exists():
+        target = target_dir / f"{fpath.stem}.{counter}{fpath.suffix}"
+        counter += 1
+    shutil.move(str(fpath), str(target))
+    with open(quarantine_dir / "reasons.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"source": str(fpath), "quarantined": str(target), "reason": reason,
+                            "at": datetime.now().isoformat()}) + "\n")
+    return target
+
+def validate_dataset(data_path: Path, workers: int = None, manifest_path: Path = None,
+                     quarantine_dir: Path = None, chunksize: int = 64) -> Dict:
+    """
+    Validation parallèle et incrémentale des images de Cat/ et Dog/
+
+    Les fichiers dont la taille et la date de modification n'ont pas changé
+    depuis la dernière validation (manifeste) ne sont pas rouverts. Les autres
+    sont vérifiés par un pool de processus ; les images invalides sont mises
+    en quarantaine (déplacées, pas supprimées).
+
+    Args:
+        data_path: Répertoire contenant Cat/ et Dog/
+        workers: Nombre de processus (1 : validation dans le processus courant)
+        manifest_path: Manifeste des verdicts (défaut : DATA_PREP_CONFIG)
+        quarantine_dir: Répertoire de quarantaine (défaut : DATA_PREP_CONFIG)
+        chunksize: Fichiers envoyés à un processus par tâche
+
+    Returns:
+        Dict des compteurs (total, unchanged, checked, quarantined) et du débit
+    """
+    workers = workers or DATA_PREP_CONFIG["workers"]
+    manifest_path = Path(manifest_path or DATA_PREP_CONFIG["manifest_path"])
+    quarantine_dir = Path(quarantine_dir or DATA_PREP_CONFIG["quarantine_dir"])
+    start = time.perf_counter()
+
+    previous = load_manifest(manifest_path)
+    files: Dict[str, list] = {}
+    to_check: Dict[str, list] = {}
     for folder_name in ("Cat", "Dog"):
         folder_path = data_path / folder_name
         if not folder_path.exists():
             continue
-            
-        files = list(folder_path.glob("*"))
-        total_files += len(files)
-        
-        for fpath in files:
-            try:
-                with Image.open(fpath) as img:
-                    img.verify()
-                
-                if fpath.suffix.lower() in ['.jpg', '.jpeg']:
-                    with open(fpath, 'rb') as f:
-                        content = f.read(20)
-                        if not (b"JFIF" in content or b"Exif" in content):
-                            raise Exception("JPEG invalide")
-                            
-            except Exception:
-                num_skipped += 1
-                fpath.unlink()
-                if num_skipped % 100 == 0:
-                    print(f"Nettoyage: {num_skipped} images supprimées")
-    
-    print(f"Nettoyage terminé: {num_skipped}/{total_files} images supprimées")
-    return num_skipped
-
-def setup_data_directory() -> Path:
-    """Configuration du répertoire de données"""
-    # Créer le répertoire temporaire
-    TEMP_DIR.mkdir(parents=True, exist_ok=True)
-    
+        for fpath in folder_path.iterdir():
+            if not fpath.is_file():
+                continue
+            key = str(fpath.absolute())
+            stat = fpath.stat()
+            entry = previous.get(key)
+            if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns and entry[2] == "ok":
+                files[key] = entry
+            else:
+                to_check[key] = [stat.st_size, stat.st_mtime_ns, None]
+
+    total = len(files) + len(to_check)
+    unchanged = len(files)
+    checked_bytes = sum(entry[0] for entry in to_check.values())
+    paths = sorted(to_check)
+    if workers > 1 and len(paths) > chunksize:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            verdicts = list(pool.map(validate_image, paths, chunksize=chunksize))
+    else:
+        verdicts = [validate_image(path) for path in paths]
+
+    quarantined = 0
+    for key, reason in verdicts:
+        if reason is None:
+            files[key] = to_check[key][:2] + ["ok"]
+            continue
+        quarantine_file(Path(key), quarantine_dir, reason)
+        quarantined += 1
+        if quarantined % 100 == 0:
+            print(f"Nettoyage: {quarantined} images mises en quarantaine")
+
+    save_manifest(manifest_path, files)
+    elapsed_s = time.perf_counter() - start
+    return {
+        "total": total,
+        "unchanged": unchanged,
+        "checked": len(paths),
+        "quarantined": quarantined,
+        "workers": workers if workers > 1 and len(paths) > chunksize else 1,
+        "elapsed_s": round(elapsed_s, 3),
+        "files_per_s": round(len(paths) / elapsed_s, 1) if elapsed_s > 0 else None,
+        "mb_per_s": round(checked_bytes / 1024 / 1024 / elapsed_s, 1) if elapsed_s > 0 else None,
+    }
+
+def clean_corrupted_images(data_path: Path, workers: int = None, manifest_path: Path = None,
+                           quarantine_dir: Path = None) -> int:
+    """Nettoyage des images corrompues (mises en quarantaine), voir validate_dataset"""
+    report = validate_dataset(data_path, workers, manifest_path, quarantine_dir)
+    print(f"Nettoyage terminé: {report['quarantined']}/{report['total']} images mises en quarantaine "
+          f"({report['checked']} vérifiées, {report['unchanged']} inchangées)")
+    if report["checked"]:
+        print(f"Débit de validation: {report['files_per_s']} fichiers/s, {report['mb_per_s']} Mo/s "
+              f"({report['workers']} processus, {report['elapsed_s']} s)")
+    return report["quarantined"]
+
+STAGING_MODES = ("hardlink", "symlink", "copy", "inplace")
+
+def _stage_file(source: Path, target: Path, mode: str) -> str:
+    """Pose d'un fichier source dans le répertoire de travail, retourne le mode effectivement utilisé"""
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    if mode == "hardlink":
+        try:
+            os.link(source, target)
+            return mode
+        except OSError:
+            # Autre système de fichiers (EXDEV) ou liens interdits : copie
+            mode = "copy"
+    if mode == "symlink":
+        os.symlink(source.resolve(), target)
+    else:
+        shutil.copy2(source, target)
+    return mode
+
+def stage_dataset(source_path: Path, target_path: Path, mode: str = "hardlink",
+                  manifest_path: Path = None) -> Dict:
+    """
+    Synchronisation incrémentale du répertoire de travail avec les données sources
+
+    Seuls les fichiers ajoutés ou modifiés (taille, mtime) depuis la dernière
+    synchronisation sont liés ou copiés, et les fichiers retirés de la source
+    sont supprimés : le coût dépend du nombre de changements, pas de la taille
+    du jeu de données. Un fichier déjà synchronisé puis mis en quarantaine par
+    la validation n'est pas reposé tant que sa source ne change pas.
+
+    Args:
+        source_path: Répertoire source contenant Cat/ et Dog/ (non modifié)
+        target_path: Répertoire de travail
+        mode: hardlink (copie si liens impossibles), symlink ou copy
+        manifest_path: Manifeste de synchronisation (défaut : à côté de target_path)
+
+    Returns:
+        Dict des compteurs (total, added, updated, removed, unchanged) et de la durée
+    """
+    if mode not in STAGING_MODES[:3]:
+        raise ValueError(f"Mode de préparation inconnu: {mode} (attendu : {', '.join(STAGING_MODES[:3])})")
+    manifest_path = Path(manifest_path or target_path.parent / f"{target_path.name}.staging.json")
+    start = time.perf_counter()
+
+    previous = {}
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # Changement de mode ou de source : tout est reposé
+        if (manifest.get("version") == MANIFEST_VERSION and manifest.get("mode") == mode
+                and manifest.get("source") == str(source_path.resolve())):
+            previous = manifest["files"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    files: Dict[str, list] = {}
+    counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "copied": 0}
+    for folder_name in ("Cat", "Dog"):
+        source_folder = source_path / folder_name
+        target_folder = target_path / folder_name
+        target_folder.mkdir(parents=True, exist_ok=True)
+        sources = {p.name: p for p in source_folder.iterdir() if p.is_file()} if source_folder.exists() else {}
+
+        for name, source in sources.items():
+            key = f"{folder_name}/{name}"
+            stat = source.stat()
+            entry = [stat.st_size, stat.st_mtime_ns]
+            files[key] = entry
+            if previous.get(key) == entry:
+                counts["unchanged"] += 1
+                continue
+            counts["updated" if key in previous else "added"] += 1
+            if _stage_file(source, target_folder / name, mode) != mode:
+                counts["copied"] += 1
+
+        for target in target_folder.iterdir():
+            if target.name not in sources:
+                target.unlink()
+                counts["removed"] += 1
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "mode": mode, "source": str(source_path.resolve()), "files": files}, f)
+    os.replace(tmp_path, manifest_path)
+
+    return {"total": len(files), **counts, "elapsed_s": round(time.perf_counter() - start, 3)}
+
+def setup_data_directory(mode: str = None) -> Path:
+    """
+    Configuration du répertoire de données
+
+    Args:
+        mode: hardlink, symlink, copy ou inplace (lecture directe de data/raw, sans
+              répertoire de travail ; la quarantaine déplace alors les fichiers sources).
+              Défaut : DATA_PREP_CONFIG["staging_mode"]
+    """
+    mode = mode or DATA_PREP_CONFIG["staging_mode"]
+    if mode not in STAGING_MODES:
+        raise ValueError(f"Mode de préparation inconnu: {mode} (attendu : {', '.join(STAGING_MODES)})")
+
     # Chemin source et destination
     source_path = RAW_DATA_DIR / "PetImages"
     target_path = TEMP_DIR / "PetImages"
-    
-    if source_path.exists() and not target_path.exists():
-        shutil.copytree(source_path, target_path)
-        print(f"Données copiées vers {target_path}")
-    
-    return target_path if target_path.exists() else source_path
\ No newline at end of file
+
+    if mode == "inplace" or not source_path.exists():
+        return source_path if source_path.exists() or not target_path.exists() else target_path
+
+    # Créer le répertoire temporaire
+    TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    report = stage_dataset(source_path, target_path, mode)
+    print(f"Données synchronisées vers {target_path} ({mode}): {report['added']} ajoutées, "
+          f"{report['updated']} modifiées, {report['removed']} supprimées, "
+          f"{report['unchanged']} inchangées en {report['elapsed_s']} s")
+    if report["copied"]:
+        print(f"⚠️  {report['copied']} fichiers copiés (liens physiques impossibles vers {TEMP_DIR})")
+
+    return target_path
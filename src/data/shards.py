@@ -0,0 +1,272 @@
+"""
+Cache du jeu de données préprocessé : shards de tableaux numpy mappés en mémoire
+
+Chaque image est décodée une seule fois (mêmes étapes que le préprocessing de
+l'API : RGB puis redimensionnement à image_size) et écrite en uint8 dans des
+shards de taille fixe :
+
+    data/processed/shards/
+    ├── index.json                 (taille d'image, classes, shards de chaque split)
+    ├── split.json                 (fichiers sources de chaque split, dans l'ordre des shards)
+    ├── train-00000.npy            (N, H, W, 3) uint8
+    ├── train-00000.labels.npy     (N,) uint8 (0 : Cat, 1 : Dog)
+    └── val-00000.npy ...
+
+Le découpage train/val est déterministe : il dépend d'un hash (graine, chemin
+relatif) et non de l'ordre des fichiers, si bien qu'une image ajoutée au jeu ne
+fait pas changer de split les autres. Les shards sont relus avec
+np.load(mmap_mode='r') : les lectures séquentielles sont des vues sans copie et
+le cache de pages du système est partagé entre les entraînements.
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageFile
+
+import sys
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import DATA_PREP_CONFIG, MODEL_CONFIG
+
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+SHARD_VERSION = 1
+CLASSES = ("Cat", "Dog")  # Ordre alphabétique, comme image_dataset_from_directory
+SPLITS = ("train", "val")
+
+
+def decode_image(data: bytes, image_size: Tuple[int, int]) -> np.ndarray:
+    """Décodage d'une image en tableau (H, W, 3) uint8 (mêmes étapes que CatDogPredictor.preprocess_image)"""
+    image = Image.open(io.BytesIO(data))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image.resize(image_size), dtype=np.uint8)
+
+
+def assign_split(relative_path: str, seed: int, val_split: float) -> str:
+    """Split d'un fichier : hash (graine, chemin relatif) comparé à la fraction de validation"""
+    digest = hashlib.sha1(f"{seed}/{relative_path}".encode()).digest()
+    return "val" if int.from_bytes(digest[:8], "big") / 2 ** 64 < val_split else "train"
+
+
+def _write_shard(task: Tuple[Path, str, List[str], List[int], Tuple[int, int]]) -> Tuple[str, List[str], List[int], List[str]]:
+    """
+    Décodage et écriture d'un shard (exécuté dans un processus du pool)
+
+    Returns:
+        (nom du shard, fichiers écrits, labels écrits, fichiers illisibles)
+    """
+    output_dir, name, paths, labels, image_size = task
+    images = np.empty((len(paths),) + tuple(image_size)[::-1] + (3,), dtype=np.uint8)
+    written, written_labels, failed = [], [], []
+    for path, label in zip(paths, labels):
+        try:
+            images[len(written)] = decode_image(Path(path).read_bytes(), image_size)
+        except Exception:
+            failed.append(path)
+            continue
+        written.append(path)
+        written_labels.append(label)
+
+    # Écriture atomique : un shard interrompu n'est jamais relu
+    for suffix, array in ((".npy", images[:len(written)]), (".labels.npy", np.asarray(written_labels, dtype=np.uint8))):
+        tmp_path = output_dir / f"{name}{suffix}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, output_dir / f"{name}{suffix}")
+    return name, written, written_labels, failed
+
+
+def build_shards(data_path: Path, output_dir: Path = None, image_size: Tuple[int, int] = None,
+                 shard_size: int = None, val_split: float = 0.2, seed: int = 1337,
+                 workers: int = None) -> Dict:
+    """
+    Décodage du jeu Cat/Dog en shards uint8 mappables en mémoire
+
+    Args:
+        data_path: Répertoire contenant Cat/ et Dog/ (images validées)
+        output_dir: Répertoire des shards (défaut : DATA_PREP_CONFIG["shards_dir"])
+        image_size: Taille (largeur, hauteur) des images (défaut : MODEL_CONFIG)
+        shard_size: Nombre d'images par shard (défaut : DATA_PREP_CONFIG["shard_size"])
+        val_split: Fraction des images en validation
+        seed: Graine du découpage train/val et du mélange des shards
+        workers: Processus de décodage (un shard par tâche)
+
+    Returns:
+        Index des shards (contenu de index.json)
+    """
+    output_dir = Path(output_dir or DATA_PREP_CONFIG["shards_dir"])
+    image_size = tuple(image_size or MODEL_CONFIG["image_size"])
+    shard_size = shard_size or DATA_PREP_CONFIG["shard_size"]
+    workers = workers or DATA_PREP_CONFIG["workers"]
+    start = time.perf_counter()
+
+    # Fichiers de chaque split, mélangés (graine) pour que chaque shard mélange les classes
+    files: Dict[str, List[Tuple[str, int]]] = {split: [] for split in SPLITS}
+    for label, class_name in enumerate(CLASSES):
+        folder = data_path / class_name
+        if not folder.exists():
+            continue
+        for path in sorted(folder.iterdir()):
+            if path.is_file():
+                files[assign_split(f"{class_name}/{path.name}", seed, val_split)].append((str(path), label))
+
+    tasks = []
+    rng = np.random.RandomState(seed)
+    for split in SPLITS:
+        entries = [files[split][i] for i in rng.permutation(len(files[split]))]
+        for number, offset in enumerate(range(0, len(entries), shard_size)):
+            chunk = entries[offset:offset + shard_size]
+            tasks.append((output_dir, f"{split}-{number:05d}", [p for p, _ in chunk], [l for _, l in chunk], image_size))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # Index retiré en premier : des shards partiellement remplacés ne sont jamais relus
+    for stale in [output_dir / "index.json"] + list(output_dir.glob("*.npy")):
+        if stale.exists():
+            stale.unlink()
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_write_shard, tasks))
+    else:
+        results = [_write_shard(task) for task in tasks]
+
+    index = {
+        "version": SHARD_VERSION,
+        "image_size": list(image_size),
+        "classes": list(CLASSES),
+        "seed": seed,
+        "val_split": val_split,
+        "source": str(data_path),
+        "created_at": datetime.now().isoformat(),
+        "splits": {split: {"count": 0, "shards": []} for split in SPLITS},
+    }
+    split_manifest = {split: [] for split in SPLITS}
+    failed = []
+    for name, written, labels, shard_failed in results:
+        split = name.split("-")[0]
+        index["splits"][split]["count"] += len(written)
+        index["splits"][split]["shards"].append({"images": f"{name}.npy", "labels": f"{name}.labels.npy", "count": len(written)})
+        split_manifest[split].extend(
+            {"path": os.path.relpath(path, data_path), "label": label} for path, label in zip(written, labels)
+        )
+        failed.extend(shard_failed)
+
+    with open(output_dir / "split.json", "w", encoding="utf-8") as f:
+        json.dump(split_manifest, f)
+    # index.json en dernier : sa présence signale des shards complets
+    tmp_path = output_dir / "index.json.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, output_dir / "index.json")
+
+    elapsed_s = time.perf_counter() - start
+    total = sum(index["splits"][split]["count"] for split in SPLITS)
+    print(f"Shards écrits dans {output_dir}: {index['splits']['train']['count']} train, "
+          f"{index['splits']['val']['count']} val ({len(tasks)} shards, {len(failed)} images illisibles) "
+          f"en {elapsed_s:.1f} s ({total / max(elapsed_s, 1e-9):.0f} images/s)")
+    return index
+
+
+class ShardedDataset:
+    """Lecture des shards (mappés en mémoire) d'un jeu de données préprocessé"""
+
+    def __init__(self, shards_dir: Path):
+        """
+        Raises:
+            FileNotFoundError: index.json absent (shards non construits)
+            ValueError: Version d'index non supportée
+        """
+        self.shards_dir = Path(shards_dir)
+        with open(self.shards_dir / "index.json", encoding="utf-8") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != SHARD_VERSION:
+            raise ValueError(f"Version de shards non supportée: {self.index.get('version')}")
+        self.image_size = tuple(self.index["image_size"])
+        self.classes = self.index["classes"]
+        self._shards: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+
+    def count(self, split: str) -> int:
+        return self.index["splits"][split]["count"]
+
+    def shards(self, split: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(images mappées en mémoire, labels) de chaque shard du split"""
+        if split not in self._shards:
+            self._shards[split] = [
+                (np.load(self.shards_dir / shard["images"], mmap_mode="r"), np.load(self.shards_dir / shard["labels"]))
+                for shard in self.index["splits"][split]["shards"] if shard["count"]
+            ]
+        return self._shards[split]
+
+    def iter_batches(self, split: str, batch_size: int, shuffle: bool = False,
+                     seed: int = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Batches (images uint8, labels) du split
+
+        Sans mélange, les batches sont des vues des shards (aucune copie). Avec
+        mélange, l'ordre des shards et des images de chaque shard est tiré au
+        hasard ; les indices d'un batch sont triés pour garder des lectures
+        croissantes dans le fichier. Un batch ne chevauche pas deux shards.
+        """
+        rng = np.random.default_rng(seed)
+        shards = self.shards(split)
+        order = rng.permutation(len(shards)) if shuffle else range(len(shards))
+        for shard_index in order:
+            images, labels = shards[shard_index]
+            if not shuffle:
+                for offset in range(0, len(labels), batch_size):
+                    yield images[offset:offset + batch_size], labels[offset:offset + batch_size]
+                continue
+            permutation = rng.permutation(len(labels))
+            for offset in range(0, len(labels), batch_size):
+                indices = np.sort(permutation[offset:offset + batch_size])
+                yield images[indices], labels[indices]
+
+    def to_tf_dataset(self, split: str, batch_size: int, shuffle: bool = False, seed: int = 1337):
+        """
+        tf.data.Dataset des batches (images float32 0-255, labels int32), mélange renouvelé à chaque époque
+
+        Augmentation et prefetch : voir src.data.pipeline.finalize
+        """
+        import tensorflow as tf
+
+        height, width = self.image_size[1], self.image_size[0]
+        epoch = [0]
+
+        def generator():
+            epoch[0] += 1
+            yield from self.iter_batches(split, batch_size, shuffle, seed + epoch[0] if shuffle else None)
+
+        dataset = tf.data.Dataset.from_generator(
+            generator,
+            output_signature=(
+                tf.TensorSpec((None, height, width, 3), tf.uint8),
+                tf.TensorSpec((None,), tf.uint8),
+            )
+        )
+        return dataset.map(
+            lambda images, labels: (tf.cast(images, tf.float32), tf.cast(labels, tf.int32)),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+
+
+def load_shards(shards_dir: Path = None, image_size: Sequence[int] = None) -> Optional[ShardedDataset]:
+    """Shards disponibles pour cette taille d'image (None si absents, incomplets ou d'une autre taille)"""
+    shards_dir = Path(shards_dir or DATA_PREP_CONFIG["shards_dir"])
+    try:
+        dataset = ShardedDataset(shards_dir)
+    except (OSError, ValueError, KeyError):
+        return None
+    if image_size is not None and dataset.image_size != tuple(image_size):
+        return None
+    return dataset
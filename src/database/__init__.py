@@ -9,9 +9,12 @@ Ce fichier __init__.py permet de :
 4. Améliorer l'auto-complétion des IDE
 """
 
-from .db_connector import Base, engine, get_db, get_db_session
+from .db_connector import Base, engine, async_engine, get_db, get_async_db, get_db_session
 from .models import PredictionFeedback
-from .feedback_service import FeedbackService
+from .feedback_service import FeedbackService, AsyncFeedbackService
+from .write_behind import PredictionLogWriter
+from .spool import PredictionSpool
+from .export import export_predictions
 
 # Liste des symboles exportés publiquement
 # Permet de contrôler ce qui est importé avec "from src.database import *"
@@ -19,14 +22,20 @@ __all__ = [
     # Connexion et session
     'Base',              # Base SQLAlchemy pour les modèles
     'engine',            # Moteur de connexion PostgreSQL
+    'async_engine',      # Moteur de connexion PostgreSQL asynchrone (asyncpg)
     'get_db',            # Dépendance FastAPI pour obtenir une session
+    'get_async_db',      # Dépendance FastAPI pour obtenir une session asynchrone
     'get_db_session',    # Fonction pour obtenir une session directement
     
     # Modèles
     'PredictionFeedback',  # Modèle de la table predictions_feedback
     
     # Services
-    'FeedbackService'    # Service métier pour gérer les feedbacks
+    'FeedbackService',   # Service métier pour gérer les feedbacks
+    'AsyncFeedbackService',  # Variante asynchrone du service de feedbacks
+    'PredictionLogWriter',  # Écriture différée des prédictions par lots
+    'PredictionSpool',   # Spool local et rejeu en cas d'indisponibilité de la base
+    'export_predictions'  # Export en flux de l'historique (CSV, NDJSON)
 ]
 
 __version__ = '2.0.0'
\ No newline at end of file
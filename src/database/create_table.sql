@@ -5,8 +5,18 @@
 CREATE TABLE IF NOT EXISTS predictions_feedback (
     id SERIAL PRIMARY KEY,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    inference_time_ms INTEGER NOT NULL,
+    inference_time_ms DOUBLE PRECISION NOT NULL,
     success BOOLEAN NOT NULL,
+    cache_hit BOOLEAN NOT NULL DEFAULT FALSE,
+    model_version VARCHAR(64) NULL,
+    request_uuid VARCHAR(36) NULL,
+    rolled_up BOOLEAN NOT NULL DEFAULT FALSE,
+    read_ms DOUBLE PRECISION NULL,
+    decode_ms DOUBLE PRECISION NULL,
+    resize_ms DOUBLE PRECISION NULL,
+    queue_wait_ms DOUBLE PRECISION NULL,
+    model_ms DOUBLE PRECISION NULL,
+    db_write_ms DOUBLE PRECISION NULL,
     prediction_result VARCHAR(10) NOT NULL CHECK (prediction_result IN ('cat', 'dog', 'error')),
     proba_cat DECIMAL(5,2) NOT NULL CHECK (proba_cat >= 0 AND proba_cat <= 100),
     proba_dog DECIMAL(5,2) NOT NULL CHECK (proba_dog >= 0 AND proba_dog <= 100),
@@ -16,6 +26,53 @@ CREATE TABLE IF NOT EXISTS predictions_feedback (
     user_comment TEXT NULL
 );
 
+-- Mise à jour des tables existantes
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS model_version VARCHAR(64) NULL;
+ALTER TABLE predictions_feedback ALTER COLUMN inference_time_ms TYPE DOUBLE PRECISION;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS read_ms DOUBLE PRECISION NULL;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS decode_ms DOUBLE PRECISION NULL;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS resize_ms DOUBLE PRECISION NULL;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS queue_wait_ms DOUBLE PRECISION NULL;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS model_ms DOUBLE PRECISION NULL;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS db_write_ms DOUBLE PRECISION NULL;
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS request_uuid VARCHAR(36) NULL;
+-- Unicité de request_uuid (clé d'idempotence du rejeu) : index unique, installation neuve ou table existante
+CREATE UNIQUE INDEX IF NOT EXISTS idx_predictions_request_uuid ON predictions_feedback(request_uuid);
+ALTER TABLE predictions_feedback ADD COLUMN IF NOT EXISTS rolled_up BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Agrégats par minute et par heure (alimentés par le job de compaction)
+CREATE TABLE IF NOT EXISTS predictions_rollup (
+    id SERIAL PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL CHECK (granularity IN ('minute', 'hour')),
+    bucket_start TIMESTAMP NOT NULL,
+    total_count BIGINT NOT NULL DEFAULT 0,
+    success_count BIGINT NOT NULL DEFAULT 0,
+    rgpd_consent_count BIGINT NOT NULL DEFAULT 0,
+    cache_hit_count BIGINT NOT NULL DEFAULT 0,
+    feedback_count BIGINT NOT NULL DEFAULT 0,
+    feedback_positive_count BIGINT NOT NULL DEFAULT 0,
+    latency_sum_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_min_ms DOUBLE PRECISION NULL,
+    latency_max_ms DOUBLE PRECISION NULL,
+    latency_histogram JSON NOT NULL,
+    CONSTRAINT uq_rollup_bucket UNIQUE (granularity, bucket_start)
+);
+
+-- Sketches de quantiles des temps d'inférence (centiles p50/p90/p99 en temps constant)
+CREATE TABLE IF NOT EXISTS latency_sketches (
+    id SERIAL PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL CHECK (granularity IN ('hour', 'total')),
+    window_start TIMESTAMP NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    sketch JSON NOT NULL,
+    CONSTRAINT uq_latency_sketch_window UNIQUE (granularity, window_start)
+);
+
 -- Index pour améliorer les performances des requêtes
-CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions_feedback(timestamp);
-CREATE INDEX IF NOT EXISTS idx_predictions_result ON predictions_feedback(prediction_result);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_predictions_result ON predictions_feedback(prediction_result);
+CREATE INDEX IF NOT EXISTS idx_predictions_model_version ON predictions_feedback(model_version);
+CREATE INDEX IF NOT EXISTS idx_predictions_not_rolled_up ON predictions_feedback(id) WHERE NOT rolled_up;
+-- Pagination par clé (created_at, id) et filtrage par période
+DROP INDEX IF EXISTS idx_predictions_created_at;
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at_id ON predictions_feedback(created_at, id);
\ No newline at end of file
@@ -2,6 +2,7 @@ import os
 import sys
 from pathlib import Path
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 #from urllib.parse import quote_plus
 
@@ -10,17 +11,26 @@ ROOT_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
 # Import de la configuration
-from config.settings import DB_URL, DB_URL_MASKED
+from config.settings import DB_URL, DB_ASYNC_URL, DB_URL_MASKED, DB_POOL_CONFIG
 
 # Configuration encodage pour Windows
 if sys.platform.startswith('win'):
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
-# Moteur SQLAlchemy
+# Moteur SQLAlchemy synchrone (scripts, threads d'écriture différée et de rejeu du spool)
 engine = create_engine(
     DB_URL,
     pool_pre_ping=True,  # Vérifier la connexion avant utilisation
-    echo=False  # True pour voir les requêtes SQL (à activer en développement)
+    echo=False,  # True pour voir les requêtes SQL (à activer en développement)
+    **DB_POOL_CONFIG
+)
+
+# Moteur SQLAlchemy asynchrone (asyncpg) : les routes async n'attendent jamais la base en bloquant la boucle
+async_engine = create_async_engine(
+    DB_ASYNC_URL,
+    pool_pre_ping=True,
+    echo=False,
+    **DB_POOL_CONFIG
 )
 
 print(f"🔗 Configuration de connexion : {DB_URL_MASKED}")
@@ -28,6 +38,9 @@ print(f"🔗 Configuration de connexion : {DB_URL_MASKED}")
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Session factory asynchrone (pas d'expiration au commit : pas de rechargement implicite après await)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base pour les modèles ORM
 Base = declarative_base()
 
@@ -39,6 +52,11 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dépendance pour obtenir une session asynchrone (routes async de FastAPI)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def get_db_session():
     """Obtenir une session de base de données (utilisation directe)"""
     return SessionLocal()
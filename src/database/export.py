@@ -0,0 +1,94 @@
+"""
+Export en flux de l'historique des prédictions (CSV ou NDJSON)
+
+Les lignes sont lues par un curseur côté serveur (stream_results) et
+sérialisées par paquets : la mémoire utilisée par l'API reste constante, quel
+que soit le nombre de lignes exportées. Le générateur est consommé par la
+réponse HTTP (StreamingResponse) au fil de l'envoi au client.
+
+Conformité RGPD : le nom de fichier et le commentaire ne sont exportés que
+pour les prédictions avec consentement.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Callable, Iterator
+
+from .feedback_service import FeedbackService
+from .models import PredictionFeedback
+
+EXPORT_COLUMNS = (
+    "id", "created_at", "prediction_result", "proba_cat", "proba_dog", "inference_time_ms",
+    "success", "cache_hit", "model_version", "rgpd_consent", "user_feedback", "filename", "user_comment",
+    *FeedbackService.STAGES,
+)
+
+# Colonnes exportées uniquement avec consentement RGPD
+RGPD_COLUMNS = ("filename", "user_comment")
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _row(record) -> dict:
+    row = dict(record._mapping)
+    if not row["rgpd_consent"]:
+        row.update({column: None for column in RGPD_COLUMNS})
+    row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+    for column in ("proba_cat", "proba_dog"):
+        row[column] = float(row[column]) if row[column] is not None else None
+    return row
+
+
+def export_predictions(
+    session_factory: Callable,
+    export_format: str = "csv",
+    start: datetime = None,
+    end: datetime = None,
+    result: str = None,
+    batch_size: int = 1000,
+) -> Iterator[str]:
+    """
+    Génère l'export des prédictions, par ordre chronologique, par paquets de batch_size lignes
+
+    Args:
+        session_factory: Fabrique de sessions SQLAlchemy (SessionLocal)
+        export_format: 'csv' ou 'ndjson'
+        start, end: Bornes de created_at (incluses)
+        result: Filtre sur prediction_result
+        batch_size: Lignes lues par aller-retour avec le curseur serveur
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export non supporté: {export_format}")
+
+    db = session_factory()
+    try:
+        # Colonnes seules (pas d'objets ORM) : rien n'est retenu par la session
+        query = FeedbackService.history_query(start, end, result, descending=False).with_only_columns(
+            *[getattr(PredictionFeedback, column) for column in EXPORT_COLUMNS]
+        )
+        records = db.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+        if export_format == "csv":
+            writer.writeheader()
+
+        for partition in records.partitions(batch_size):
+            for record in partition:
+                if export_format == "csv":
+                    writer.writerow(_row(record))
+                else:
+                    buffer.write(json.dumps(_row(record), ensure_ascii=False) + "\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
@@ -1,14 +1,40 @@
+import base64
+import json
 from datetime import datetime
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from .models import PredictionFeedback # Import relatif ici car l'appel se fait à l'intérieur du module 
 
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """Curseur opaque de pagination : position (created_at, id) du dernier élément renvoyé"""
+    payload = json.dumps({"t": created_at.isoformat(), "id": record_id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Position (created_at, id) d'un curseur
+    
+    Raises:
+        ValueError: Curseur invalide
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+
+
 class FeedbackService:
     """Service pour gérer les enregistrements de feedback"""
     
+    # Étapes du traitement d'une prédiction dont la durée est enregistrée (colonnes *_ms)
+    STAGES = ("read_ms", "decode_ms", "resize_ms", "queue_wait_ms", "model_ms", "db_write_ms")
+    
     @staticmethod
-    def save_prediction_feedback(
-        db: Session,
-        inference_time_ms: int,
+    def build_record(
+        inference_time_ms: float,
         success: bool,
         prediction_result: str,
         proba_cat: float,
@@ -16,14 +42,18 @@ class FeedbackService:
         rgpd_consent: bool,
         filename: str = None,
         user_feedback: int = None,
-        user_comment: str = None
-    ) -> PredictionFeedback:
+        user_comment: str = None,
+        cache_hit: bool = False,
+        model_version: str = None,
+        timings: dict = None,
+        request_uuid: str = None,
+        created_at: datetime = None
+    ) -> dict:
         """
-        Enregistre une prédiction avec feedback dans la base de données
+        Prépare les valeurs des colonnes d'un enregistrement de prédiction
         
         Args:
-            db: Session SQLAlchemy
-            inference_time_ms: Temps d'inférence en millisecondes
+            inference_time_ms: Temps total de traitement en millisecondes
             success: Succès de la prédiction
             prediction_result: Résultat ('cat' ou 'dog')
             proba_cat: Probabilité classe chat (0-100)
@@ -32,9 +62,15 @@ class FeedbackService:
             filename: Nom du fichier (si RGPD OK)
             user_feedback: Satisfaction utilisateur 0/1 (si RGPD OK)
             user_comment: Commentaire utilisateur (si RGPD OK)
+            cache_hit: Résultat servi par le cache de prédictions
+            model_version: Version du modèle ayant produit la prédiction
+            timings: Durées (ms) par étape (clés de STAGES)
+            request_uuid: Identifiant de la requête, connu du client avant l'insertion
+            created_at: Heure de la prédiction (défaut : maintenant, horloge de l'API,
+                quel que soit le chemin d'écriture : synchrone, différé ou spool)
         
         Returns:
-            PredictionFeedback: Objet créé
+            dict: Valeurs des colonnes de predictions_feedback
         """
         # Si pas de consentement RGPD, on ne stocke pas les données personnelles
         if not rgpd_consent:
@@ -42,18 +78,40 @@ class FeedbackService:
             user_feedback = None
             user_comment = None
         
+        return {
+            'created_at': created_at or datetime.now(),
+            'inference_time_ms': inference_time_ms,
+            'success': success,
+            'cache_hit': cache_hit,
+            'model_version': model_version,
+            'prediction_result': prediction_result,
+            'proba_cat': round(proba_cat, 2),
+            'proba_dog': round(proba_dog, 2),
+            'rgpd_consent': rgpd_consent,
+            'filename': filename,
+            'user_feedback': user_feedback,
+            'user_comment': user_comment,
+            'request_uuid': request_uuid,
+            **{stage: (timings or {}).get(stage) for stage in FeedbackService.STAGES}
+        }
+    
+    @staticmethod
+    def save_prediction_feedback(db: Session, timings: dict = None, **fields) -> PredictionFeedback:
+        """
+        Enregistre une prédiction avec feedback dans la base de données (écriture synchrone)
+        
+        Args:
+            db: Session SQLAlchemy
+            timings: Durées (ms) par étape (db_write_ms absent : une ligne ne peut pas contenir
+                la durée de sa propre écriture, mesurée par l'appelant dans les métriques)
+            **fields: Champs de l'enregistrement (voir build_record)
+        
+        Returns:
+            PredictionFeedback: Objet créé
+        """
+        
         # Création de l'enregistrement
-        feedback = PredictionFeedback(
-            inference_time_ms=inference_time_ms,
-            success=success,
-            prediction_result=prediction_result,
-            proba_cat=round(proba_cat, 2),
-            proba_dog=round(proba_dog, 2),
-            rgpd_consent=rgpd_consent,
-            filename=filename,
-            user_feedback=user_feedback,
-            user_comment=user_comment
-        )
+        feedback = PredictionFeedback(**FeedbackService.build_record(timings=timings, **fields))
         
         # Enregistrement en base
         db.add(feedback)
@@ -63,25 +121,140 @@ class FeedbackService:
         return feedback
     
     @staticmethod
-    def get_recent_predictions(db: Session, limit: int = 10):
-        """Récupère les dernières prédictions"""
-        return db.query(PredictionFeedback)\
-            .order_by(PredictionFeedback.timestamp.desc())\
-            .limit(limit)\
-            .all()
+    def history_query(start: datetime = None, end: datetime = None, result: str = None,
+                      after=None, descending: bool = True):
+        """
+        Requête de l'historique des prédictions, ordonnée par (created_at, id)
+        
+        La pagination par clé (keyset) reprend après la position du curseur au lieu
+        d'un OFFSET : coût constant quelle que soit la page (index (created_at, id)).
+        
+        Args:
+            start, end: Bornes de created_at (incluses)
+            result: Filtre sur prediction_result ('cat', 'dog' ou 'error')
+            after: Position (created_at, id) du dernier élément déjà renvoyé
+            descending: Plus récentes d'abord
+        """
+        query = select(PredictionFeedback).where(PredictionFeedback.created_at.isnot(None))
+        if start is not None:
+            query = query.where(PredictionFeedback.created_at >= start)
+        if end is not None:
+            query = query.where(PredictionFeedback.created_at <= end)
+        if result is not None:
+            query = query.where(PredictionFeedback.prediction_result == result)
+        
+        key = tuple_(PredictionFeedback.created_at, PredictionFeedback.id)
+        if after is not None:
+            query = query.where(key < tuple(after) if descending else key > tuple(after))
+        if descending:
+            return query.order_by(PredictionFeedback.created_at.desc(), PredictionFeedback.id.desc())
+        return query.order_by(PredictionFeedback.created_at, PredictionFeedback.id)
+    
+    @staticmethod
+    def get_recent_predictions(db: Session, limit: int = 10, cursor: str = None,
+                               start: datetime = None, end: datetime = None, result: str = None):
+        """
+        Récupère les dernières prédictions (page suivante avec le curseur de la page précédente)
+        
+        Returns:
+            Tuple (prédictions, curseur de la page suivante ou None)
+        """
+        after = decode_cursor(cursor) if cursor else None
+        query = FeedbackService.history_query(start, end, result, after).limit(limit)
+        predictions = db.execute(query).scalars().all()
+        next_cursor = encode_cursor(predictions[-1].created_at, predictions[-1].id) if len(predictions) == limit else None
+        return predictions, next_cursor
     
     @staticmethod
-    def get_statistics(db: Session):
-        """Calcule des statistiques sur les prédictions"""
-        from sqlalchemy import func
+    def get_statistics(db: Session, pending_sketch=None):
+        """
+        Calcule des statistiques sur les prédictions (agrégats + prédictions non agrégées)
+        
+        Args:
+            pending_sketch: Sketch de latence du processus pas encore écrit en base
+        """
+        from src.monitoring.rollups import RollupService
+        from src.monitoring.sketch import SketchStore
         
-        total = db.query(func.count(PredictionFeedback.id)).scalar()
-        success_count = db.query(func.count(PredictionFeedback.id)).filter(PredictionFeedback.success == True).scalar()
-        rgpd_consent_count = db.query(func.count(PredictionFeedback.id)).filter(PredictionFeedback.rgpd_consent == True).scalar()
+        totals = RollupService.get_totals(db)
+        total = int(totals['total_count'] or 0)
+        success_count = int(totals['success_count'] or 0)
+        rgpd_consent_count = int(totals['rgpd_consent_count'] or 0)
+        percentiles = SketchStore.percentiles(db, pending_sketch)
         
         return {
-            'total_predictions': total or 0,
-            'successful_predictions': success_count or 0,
-            'rgpd_consents': rgpd_consent_count or 0,
-            'success_rate': round((success_count / total * 100) if total > 0 else 0, 2)
-        }
\ No newline at end of file
+            'total_predictions': total,
+            'successful_predictions': success_count,
+            'rgpd_consents': rgpd_consent_count,
+            'success_rate': round((success_count / total * 100) if total > 0 else 0, 2),
+            'latency_percentiles_ms': {key[:-3]: value for key, value in percentiles.items() if key != 'count'}
+        }
+
+
+class AsyncFeedbackService:
+    """Variante asynchrone de FeedbackService (sessions AsyncSession, routes de l'API)"""
+    
+    @staticmethod
+    async def save_prediction_feedback(db: AsyncSession, timings: dict = None, **fields) -> PredictionFeedback:
+        """
+        Enregistre une prédiction avec feedback dans la base de données (écriture immédiate,
+        sans écriture différée par lots, via le pilote asynchrone)
+        
+        Args:
+            db: Session SQLAlchemy asynchrone
+            timings: Durées (ms) par étape (db_write_ms absent, voir FeedbackService.save_prediction_feedback)
+            **fields: Champs de l'enregistrement (voir FeedbackService.build_record)
+        
+        Returns:
+            PredictionFeedback: Objet créé
+        """
+        feedback = PredictionFeedback(**FeedbackService.build_record(timings=timings, **fields))
+        
+        db.add(feedback)
+        await db.commit()
+        await db.refresh(feedback)
+        
+        return feedback
+    
+    @staticmethod
+    async def get_prediction(db: AsyncSession, prediction_id: int, for_update: bool = False):
+        """
+        Récupère un enregistrement par son identifiant (None si absent)
+        
+        Args:
+            for_update: Verrouille la ligne jusqu'à la fin de la transaction (SELECT ... FOR UPDATE)
+        """
+        return await db.get(PredictionFeedback, prediction_id, with_for_update=for_update)
+    
+    @staticmethod
+    async def get_prediction_by_uuid(db: AsyncSession, request_uuid: str, for_update: bool = False):
+        """
+        Récupère un enregistrement par son request_uuid (None si absent)
+        
+        Args:
+            for_update: Verrouille la ligne jusqu'à la fin de la transaction (SELECT ... FOR UPDATE)
+        """
+        query = select(PredictionFeedback).where(PredictionFeedback.request_uuid == request_uuid)
+        if for_update:
+            query = query.with_for_update()
+        return (await db.execute(query)).scalar_one_or_none()
+    
+    @staticmethod
+    async def get_recent_predictions(db: AsyncSession, limit: int = 10, cursor: str = None,
+                                     start: datetime = None, end: datetime = None, result: str = None):
+        """
+        Récupère les dernières prédictions (pagination par curseur)
+        
+        Returns:
+            Tuple (prédictions, curseur de la page suivante ou None)
+        """
+        after = decode_cursor(cursor) if cursor else None
+        query = FeedbackService.history_query(start, end, result, after).limit(limit)
+        predictions = (await db.execute(query)).scalars().all()
+        next_cursor = encode_cursor(predictions[-1].created_at, predictions[-1].id) if len(predictions) == limit else None
+        return predictions, next_cursor
+    
+    @staticmethod
+    async def get_statistics(db: AsyncSession, pending_sketch=None):
+        """Calcule des statistiques sur les prédictions (agrégats + prédictions non agrégées)"""
+        return await db.run_sync(FeedbackService.get_statistics, pending_sketch)
@@ -5,7 +5,7 @@ Ce fichier définit les tables de la base de données sous forme de classes Pyth
 Chaque classe représente une table, chaque attribut représente une colonne.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DECIMAL, TIMESTAMP, Text, CheckConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DECIMAL, Float, TIMESTAMP, Text, JSON, CheckConstraint, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from .db_connector import Base
 
@@ -26,8 +26,20 @@ class PredictionFeedback(Base):
     # === Colonnes principales ===
     id = Column(Integer, primary_key=True, autoincrement=True)  # Identifiant unique
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())  # Date de création de l'enregistrement
-    inference_time_ms = Column(Integer, nullable=False)  # Temps d'inférence en millisecondes
+    inference_time_ms = Column(Float, nullable=False)  # Temps total de traitement en millisecondes (résolution sub-ms)
     success = Column(Boolean, nullable=False)  # True si prédiction réussie, False si erreur
+    cache_hit = Column(Boolean, nullable=False, default=False, server_default='false')  # True si résultat servi par le cache
+    model_version = Column(String(64), nullable=True)  # Version du modèle ayant produit la prédiction
+    request_uuid = Column(String(36), nullable=True)  # Clé d'idempotence (rejeu du spool local), index unique
+    rolled_up = Column(Boolean, nullable=False, default=False, server_default='false')  # Déjà agrégé dans predictions_rollup
+    
+    # === Décomposition du temps de traitement par étape (ms, NULL si étape non exécutée) ===
+    read_ms = Column(Float, nullable=True)  # Lecture de l'upload
+    decode_ms = Column(Float, nullable=True)  # Décodage de l'image (PIL)
+    resize_ms = Column(Float, nullable=True)  # Conversion RGB et redimensionnement
+    queue_wait_ms = Column(Float, nullable=True)  # Attente avant exécution du modèle (batching, executor)
+    model_ms = Column(Float, nullable=True)  # Exécution du modèle
+    db_write_ms = Column(Float, nullable=True)  # Écriture en base côté requête (mise en tampon ; NULL en écriture synchrone, voir les métriques)
     
     # === Résultats de prédiction ===
     prediction_result = Column(String(10), nullable=False)  # 'cat' ou 'dog' (ou 'error' en cas d'échec)
@@ -52,6 +64,15 @@ class PredictionFeedback(Base):
         
         # Le feedback utilisateur doit être 0, 1 ou NULL
         CheckConstraint('user_feedback IS NULL OR user_feedback IN (0, 1)', name='check_user_feedback'),
+        
+        # Index partiel : la « queue » non encore agrégée reste rapide à parcourir
+        Index('idx_predictions_not_rolled_up', 'id', postgresql_where=(rolled_up == False)),
+        
+        # Filtrage par période (graphiques) et pagination par clé (created_at, id)
+        Index('idx_predictions_created_at_id', 'created_at', 'id'),
+        
+        # Unicité de request_uuid (même index que create_table.sql)
+        Index('idx_predictions_request_uuid', 'request_uuid', unique=True),
     )
     
     def __repr__(self):
@@ -59,4 +80,73 @@ class PredictionFeedback(Base):
         Représentation textuelle de l'objet (utile pour le débogage)
         Exemple : <PredictionFeedback(id=1, result=cat, rgpd=True)>
         """
-        return f"<PredictionFeedback(id={self.id}, result={self.prediction_result}, rgpd={self.rgpd_consent})>"
\ No newline at end of file
+        return f"<PredictionFeedback(id={self.id}, result={self.prediction_result}, rgpd={self.rgpd_consent})>"
+
+
+class PredictionRollup(Base):
+    """
+    Agrégats des prédictions par intervalle de temps (minute et heure)
+    
+    Table : predictions_rollup
+    
+    Alimentée de façon incrémentale par le job de compaction (src/monitoring/rollups.py) :
+    les KPI lisent ces agrégats plus les seules prédictions pas encore agrégées.
+    Les statistiques de latence ne portent que sur les prédictions réussies.
+    """
+    
+    __tablename__ = 'predictions_rollup'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(10), nullable=False)  # 'minute' ou 'hour'
+    bucket_start = Column(TIMESTAMP, nullable=False)  # Début de l'intervalle
+    
+    # === Compteurs ===
+    total_count = Column(BigInteger, nullable=False, default=0)
+    success_count = Column(BigInteger, nullable=False, default=0)
+    rgpd_consent_count = Column(BigInteger, nullable=False, default=0)
+    cache_hit_count = Column(BigInteger, nullable=False, default=0)
+    feedback_count = Column(BigInteger, nullable=False, default=0)  # Feedbacks renseignés (avec consentement RGPD)
+    feedback_positive_count = Column(BigInteger, nullable=False, default=0)  # Feedbacks satisfaits
+    
+    # === Latence des prédictions réussies (ms) ===
+    latency_sum_ms = Column(Float, nullable=False, default=0)
+    latency_min_ms = Column(Float, nullable=True)
+    latency_max_ms = Column(Float, nullable=True)
+    latency_histogram = Column(JSON, nullable=False)  # Comptes par bucket (bornes : rollups.LATENCY_BOUNDS_MS)
+    
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_start', name='uq_rollup_bucket'),
+        CheckConstraint("granularity IN ('minute', 'hour')", name='check_rollup_granularity'),
+    )
+    
+    def __repr__(self):
+        return f"<PredictionRollup({self.granularity} {self.bucket_start}, total={self.total_count})>"
+
+
+class LatencySketch(Base):
+    """
+    Sketches de quantiles (DDSketch) des temps d'inférence par fenêtre de temps
+    
+    Table : latency_sketches
+    
+    Chaque processus API fusionne périodiquement ses sketches en mémoire dans la
+    fenêtre horaire correspondante et dans la ligne 'total' (tout l'historique) :
+    les centiles p50/p90/p99 sont lus sans parcourir predictions_feedback
+    (voir src/monitoring/sketch.py).
+    """
+    
+    __tablename__ = 'latency_sketches'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(10), nullable=False)  # 'hour' ou 'total'
+    window_start = Column(TIMESTAMP, nullable=False)  # Début de la fenêtre (1970-01-01 pour 'total')
+    count = Column(BigInteger, nullable=False, default=0)  # Nombre de latences du sketch
+    sketch = Column(JSON, nullable=False)  # DDSketch.to_dict()
+    
+    __table_args__ = (
+        UniqueConstraint('granularity', 'window_start', name='uq_latency_sketch_window'),
+        CheckConstraint("granularity IN ('hour', 'total')", name='check_sketch_granularity'),
+    )
+    
+    def __repr__(self):
+        return f"<LatencySketch({self.granularity} {self.window_start}, count={self.count})>"
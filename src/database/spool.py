@@ -0,0 +1,253 @@
+"""
+Spool local des enregistrements de prédiction
+
+Lorsque PostgreSQL est indisponible ou trop lent, les enregistrements ne sont
+pas perdus : ils sont ajoutés (append-only, fsync) à des fichiers JSONL dans
+SPOOL_CONFIG["dir"]. Un thread de rejeu les réinsère dans predictions_feedback
+dès que la base répond de nouveau dans son budget de latence.
+
+    spool/
+    ├── spool-1718000000000-0001.jsonl   (segment fermé, en attente de rejeu)
+    └── spool-1718000000450-0002.jsonl   (segment courant)
+
+Le rejeu est idempotent : chaque enregistrement porte un request_uuid unique,
+les lignes déjà présentes sont ignorées (INSERT ... ON CONFLICT DO NOTHING).
+Un segment n'est supprimé qu'une fois entièrement réinséré. Un segment refusé
+par la base (contrainte violée) est déplacé dans spool/rejected/ pour analyse.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .models import PredictionFeedback
+
+
+def insert_ignore(dialect_name: str):
+    """INSERT ignorant les lignes en conflit (request_uuid ou id déjà présents)"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Dialecte non supporté pour le rejeu: {dialect_name}")
+    return insert(PredictionFeedback.__table__).on_conflict_do_nothing()
+
+
+def _encode(value):
+    """Sérialisation JSON des valeurs non natives (dates)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable: {type(value)}")
+
+
+def record_keys(record: Dict) -> List:
+    """Clés désignant un enregistrement : identifiant (s'il est attribué) et request_uuid"""
+    return [key for key in (record.get("id"), record.get("request_uuid")) if key is not None]
+
+
+def _decode(record: Dict) -> Dict:
+    if record.get("created_at"):
+        record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return record
+
+
+class PredictionSpool:
+    """Spool JSONL append-only et rejeu idempotent vers PostgreSQL"""
+
+    def __init__(
+        self,
+        spool_dir: Path,
+        session_factory: Callable,
+        replay_interval_s: float = 5.0,
+        replay_batch_size: int = 500,
+        latency_budget_ms: float = 1000.0,
+        max_segment_bytes: int = 16 * 1024 * 1024,
+    ):
+        """
+        Args:
+            spool_dir: Répertoire des segments JSONL
+            session_factory: Fabrique de sessions SQLAlchemy (SessionLocal)
+            replay_interval_s: Période de vérification de la base et de rejeu
+            replay_batch_size: Nombre d'enregistrements par INSERT de rejeu
+            latency_budget_ms: Au-delà, la base est considérée comme dégradée
+            max_segment_bytes: Taille d'un segment avant passage au suivant
+        """
+        self.spool_dir = Path(spool_dir)
+        self.session_factory = session_factory
+        self.replay_interval_s = replay_interval_s
+        self.replay_batch_size = replay_batch_size
+        self.latency_budget_ms = latency_budget_ms
+        self.max_segment_bytes = max_segment_bytes
+
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._segment: Optional[Path] = None
+        self._sequence = 0
+        # Clés (identifiant, request_uuid) en attente de rejeu, y compris celles des segments
+        # d'une exécution précédente
+        self._spooled_ids = {key for segment in self.segments() for record in self._read(segment) for key in record_keys(record)}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Compteurs (exposés par /metrics)
+        self.spooled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.write_errors = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        """Démarrage du thread de rejeu (les segments d'une exécution précédente sont repris)"""
+        self._thread = threading.Thread(target=self._run, name="prediction-spool-replayer", daemon=True)
+        self._thread.start()
+
+    def _new_segment(self) -> Path:
+        self._sequence += 1
+        return self.spool_dir / f"spool-{int(time.time() * 1000)}-{self._sequence:04d}.jsonl"
+
+    def append(self, records: List[Dict]) -> bool:
+        """
+        Ajout durable d'enregistrements au segment courant (fsync avant retour)
+
+        Returns:
+            False si l'écriture sur disque a échoué
+        """
+        lines = "".join(json.dumps(record, default=_encode) + "\n" for record in records)
+        with self._lock:
+            try:
+                if self._segment is None or (self._segment.exists() and self._segment.stat().st_size > self.max_segment_bytes):
+                    self._segment = self._new_segment()
+                with open(self._segment, "a", encoding="utf-8") as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                self.write_errors += len(records)
+                self.last_error = str(e)
+                print(f"❌ Écriture impossible dans le spool ({len(records)} prédictions perdues): {e}")
+                return False
+            self.spooled += len(records)
+            self._spooled_ids.update(key for record in records for key in record_keys(record))
+        return True
+
+    def is_spooled(self, key) -> bool:
+        """L'enregistrement (identifiant ou request_uuid) est-il en attente de rejeu dans le spool ?"""
+        return key in self._spooled_ids
+
+    def segments(self) -> List[Path]:
+        return sorted(self.spool_dir.glob("spool-*.jsonl"))
+
+    @property
+    def pending_bytes(self) -> int:
+        return sum(segment.stat().st_size for segment in self.segments())
+
+    def database_healthy(self) -> bool:
+        """La base répond-elle dans son budget de latence ?"""
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            db.execute(text("SELECT 1"))
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        finally:
+            db.close()
+        return (time.perf_counter() - start) * 1000 <= self.latency_budget_ms
+
+    def _read(self, segment: Path) -> Iterator[Dict]:
+        with open(segment, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield _decode(json.loads(line))
+                except ValueError:
+                    # Ligne tronquée (arrêt brutal pendant l'écriture) : ignorée
+                    print(f"⚠️  Ligne illisible ignorée dans {segment.name}")
+
+    def replay(self) -> int:
+        """
+        Rejeu des segments dans la base (appel bloquant)
+
+        Returns:
+            Nombre d'enregistrements réinsérés
+        """
+        replayed = 0
+        with self._replay_lock:
+            # Le segment courant est fermé : les ajouts suivants vont dans un nouveau segment,
+            # absent de la liste rejouée (il ne peut pas être supprimé pendant un ajout)
+            with self._lock:
+                self._segment = None
+                segments = self.segments()
+
+            for segment in segments:
+                records = list(self._read(segment))
+                db = self.session_factory()
+                try:
+                    statement = insert_ignore(db.get_bind().dialect.name)
+                    for i in range(0, len(records), self.replay_batch_size):
+                        # Colonnes communes au lot (records sans id : attribué par la séquence)
+                        batch = records[i:i + self.replay_batch_size]
+                        for keys in {tuple(sorted(r)) for r in batch}:
+                            rows = [r for r in batch if tuple(sorted(r)) == keys]
+                            db.execute(statement, rows)
+                    db.commit()
+                except (IntegrityError, DataError) as e:
+                    # Données refusées par la base : le segment ne doit pas bloquer les suivants
+                    db.rollback()
+                    self.last_error = str(e)
+                    rejected_dir = self.spool_dir / "rejected"
+                    rejected_dir.mkdir(exist_ok=True)
+                    segment.rename(rejected_dir / segment.name)
+                    self.rejected += len(records)
+                    print(f"❌ Segment {segment.name} refusé par la base, déplacé dans {rejected_dir}: {e}")
+                    continue
+                except Exception as e:
+                    db.rollback()
+                    self.last_error = str(e)
+                    print(f"❌ Rejeu du spool interrompu ({segment.name}): {e}")
+                    return replayed
+                finally:
+                    db.close()
+
+                segment.unlink()
+                self.replayed += len(records)
+                replayed += len(records)
+                with self._lock:
+                    self._spooled_ids.difference_update(key for record in records for key in record_keys(record))
+
+        if replayed:
+            print(f"✅ {replayed} prédictions réinsérées depuis le spool")
+        return replayed
+
+    def _run(self):
+        while not self._stop.wait(self.replay_interval_s):
+            if self.segments() and self.database_healthy():
+                self.replay()
+
+    def stats(self) -> Dict:
+        """Compteurs du spool"""
+        return {
+            "segments": len(self.segments()),
+            "pending_bytes": self.pending_bytes,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "rejected": self.rejected,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.replay_interval_s + 5)
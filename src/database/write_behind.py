@@ -0,0 +1,305 @@
+"""
+Écriture différée (write-behind) des enregistrements de prédiction
+
+Au lieu d'un INSERT + COMMIT + SELECT (refresh) par prédiction, les
+enregistrements sont placés dans un tampon mémoire et écrits par un thread de
+fond sous forme d'INSERT multi-lignes, dès que le tampon atteint max_batch_size
+ou au plus tard toutes les flush_interval_s secondes.
+
+Les identifiants (feedback_id renvoyé au client) sont attribués sans aller-retour
+par enregistrement : un bloc d'identifiants est réservé en une requête sur la
+séquence de la table (nextval via generate_series), puis distribué localement.
+
+Les blocs d'identifiants sont réservés par le thread d'écriture avant
+épuisement ; si le bloc est vide (démarrage, rafale), la requête réserve
+elle-même le bloc suivant (une requête par bloc). Si la base est indisponible
+ou dépasse son budget de latence, les lots sont écrits dans le spool local
+(voir spool.py) pendant retry_interval_s, puis la base est de nouveau essayée :
+les enregistrements de cette période n'ont pas d'identifiant avant leur
+insertion et sont désignés par leur request_uuid.
+
+created_at est l'heure de la prédiction (horloge de l'API, comme pour l'écriture
+synchrone : voir FeedbackService.build_record), request_uuid la clé
+d'idempotence du rejeu. Le tampon est vidé à l'arrêt de l'application (close).
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert, text
+
+from .models import PredictionFeedback
+from .spool import record_keys
+
+
+def sequence_allocator(session_factory: Callable, sequence_name: str = "predictions_feedback_id_seq") -> Callable:
+    """
+    Réservation de blocs d'identifiants sur une séquence PostgreSQL
+
+    Returns:
+        Fonction (n) -> liste de n identifiants réservés en une seule requête
+    """
+    query = text(f"SELECT nextval('{sequence_name}') FROM generate_series(1, :n)")
+
+    def allocate(n: int) -> List[int]:
+        db = session_factory()
+        try:
+            return [row[0] for row in db.execute(query, {"n": n})]
+        finally:
+            db.close()
+
+    return allocate
+
+
+class PredictionLogWriter:
+    """Tampon d'enregistrements de prédiction écrit en base par lots"""
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        id_allocator: Callable = None,
+        max_batch_size: int = 500,
+        flush_interval_s: float = 0.5,
+        id_block_size: int = 1000,
+        max_buffer: int = 50000,
+        spool=None,
+        latency_budget_ms: float = 1000.0,
+        retry_interval_s: float = 5.0,
+    ):
+        """
+        Args:
+            session_factory: Fabrique de sessions SQLAlchemy (SessionLocal)
+            id_allocator: Fonction (n) -> n identifiants (défaut : séquence PostgreSQL de la table)
+            max_batch_size: Nombre d'enregistrements déclenchant une écriture
+            flush_interval_s: Délai maximal entre deux écritures
+            id_block_size: Nombre d'identifiants réservés par requête à la séquence
+            max_buffer: Taille maximale du tampon (au-delà, les plus anciens sont placés dans
+                le spool, ou abandonnés en l'absence de spool)
+            spool: PredictionSpool recevant les lots non écrits (None : nouvel essai depuis le tampon)
+            latency_budget_ms: Durée d'écriture au-delà de laquelle la base est contournée
+            retry_interval_s: Durée pendant laquelle la base est contournée après un échec
+        """
+        self.session_factory = session_factory
+        self.id_allocator = id_allocator or sequence_allocator(session_factory)
+        self.max_batch_size = max_batch_size
+        self.flush_interval_s = flush_interval_s
+        self.id_block_size = id_block_size
+        self.max_buffer = max_buffer
+        self.spool = spool
+        self.latency_budget_ms = latency_budget_ms
+        self.retry_interval_s = retry_interval_s
+        self._bypass_until = 0.0  # Base contournée (écriture dans le spool) jusqu'à cet instant
+
+        self._buffer: deque = deque()
+        self._pending_ids = set()
+        self._ids: deque = deque()
+        self._lock = threading.Lock()
+        self._ids_lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Compteurs (exposés par /metrics)
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.rows_written = 0
+        self.dropped = 0
+        self.last_flush_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        """Démarrage du thread d'écriture"""
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+
+    def _refill_ids(self, threshold: int = None):
+        """
+        Réservation d'un nouveau bloc d'identifiants
+
+        Args:
+            threshold: Nombre d'identifiants restants en dessous duquel un bloc est réservé
+                (défaut : moitié d'un bloc)
+        """
+        threshold = self.id_block_size // 2 if threshold is None else threshold
+        with self._refill_lock:
+            # Vérification sous verrou : un seul bloc réservé pour des appels simultanés
+            if len(self._ids) >= threshold or self.database_bypassed:
+                return
+            try:
+                ids = self.id_allocator(self.id_block_size)
+            except Exception as e:
+                self._degrade(e)
+                return
+            with self._ids_lock:
+                self._ids.extend(ids)
+
+    def _next_id(self) -> Optional[int]:
+        """
+        Identifiant suivant du bloc réservé
+
+        Bloc épuisé : réservation synchrone du bloc suivant. None seulement si la base est
+        contournée ou indisponible (identifiant attribué à l'insertion, request_uuid en attendant).
+        """
+        with self._ids_lock:
+            if self._ids:
+                return self._ids.popleft()
+        self._refill_ids(threshold=1)
+        with self._ids_lock:
+            if self._ids:
+                return self._ids.popleft()
+        self._wakeup.set()
+        return None
+
+    def log(self, record: Dict) -> int:
+        """
+        Ajoute un enregistrement au tampon
+
+        Args:
+            record: Valeurs des colonnes (FeedbackService.build_record), db_write_ms est
+                renseigné avec le temps passé par la requête dans l'écriture différée.
+                request_uuid est généré s'il n'est pas fourni.
+
+        Returns:
+            Identifiant attribué à l'enregistrement (None si la base est indisponible :
+            l'enregistrement est alors désigné par son request_uuid)
+        """
+        start = time.perf_counter()
+        record_id = self._next_id()
+        record = dict(record, created_at=record.get("created_at") or datetime.now())
+        record["request_uuid"] = record.get("request_uuid") or str(uuid.uuid4())
+        if record_id is not None:
+            record["id"] = record_id
+        # Coût de l'écriture côté requête : réservation d'identifiant et mise en tampon
+        record["db_write_ms"] = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._buffer.append(record)
+            self._pending_ids.update(record_keys(record))
+            overflow = [self._buffer.popleft() for _ in range(max(len(self._buffer) - self.max_buffer, 0))]
+            size = len(self._buffer)
+        if overflow:
+            self._spill(overflow)
+        if size >= self.max_batch_size:
+            self._wakeup.set()
+        return record_id
+
+    def _spill(self, records: List[Dict]):
+        """Enregistrements en excès du tampon : placés dans le spool (abandonnés seulement sans spool)"""
+        spooled = self.spool is not None and self.spool.append(records)
+        with self._lock:
+            # Identifiants retirés après l'ajout au spool : toujours connus de l'un ou de l'autre
+            self._pending_ids.difference_update(key for record in records for key in record_keys(record))
+            if not spooled:
+                self.dropped += len(records)
+                dropped = self.dropped
+        if not spooled and dropped % 1000 < len(records):
+            print(f"⚠️  Tampon d'écriture plein : {dropped} prédictions abandonnées")
+
+    def is_pending(self, key) -> bool:
+        """L'enregistrement (identifiant ou request_uuid) est-il encore dans le tampon (pas encore écrit) ?"""
+        return key in self._pending_ids
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def database_bypassed(self) -> bool:
+        """La base est-elle contournée (indisponible ou trop lente récemment) ?"""
+        return time.monotonic() < self._bypass_until
+
+    def _degrade(self, error):
+        """Contournement de la base pendant retry_interval_s"""
+        self.last_error = str(error)
+        if self.spool is not None:
+            self._bypass_until = time.monotonic() + self.retry_interval_s
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._refill_ids()
+            self._wakeup.wait(self.flush_interval_s)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Écrit le contenu du tampon (appel bloquant)
+
+        Returns:
+            Nombre d'enregistrements écrits
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.max_batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                if not self.database_bypassed and self._write(batch):
+                    written += len(batch)
+                    continue
+                if self.spool is not None and self.spool.append(batch):
+                    # Base indisponible ou trop lente : lot conservé dans le spool, rejoué plus tard
+                    with self._lock:
+                        self._pending_ids.difference_update(key for record in batch for key in record_keys(record))
+                    continue
+                # Pas de spool : remise en tête du tampon, nouvel essai à la prochaine écriture
+                with self._lock:
+                    self._buffer.extendleft(reversed(batch))
+                return written
+
+    def _write(self, batch: List[Dict]) -> bool:
+        """INSERT multi-lignes d'un lot d'enregistrements"""
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            # Lots homogènes : les enregistrements sans identifiant réservé reçoivent celui de la séquence
+            for keys in {tuple(sorted(record)) for record in batch}:
+                rows = [record for record in batch if tuple(sorted(record)) == keys]
+                db.execute(insert(PredictionFeedback.__table__).values(rows))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.failed_flushes += 1
+            self._degrade(e)
+            print(f"❌ Échec de l'écriture de {len(batch)} prédictions: {e}")
+            return False
+        finally:
+            db.close()
+
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        if self.last_flush_ms > self.latency_budget_ms:
+            self._degrade(f"Écriture trop lente ({self.last_flush_ms:.0f} ms)")
+        self.flushes += 1
+        self.rows_written += len(batch)
+        with self._lock:
+            self._pending_ids.difference_update(key for record in batch for key in record_keys(record))
+        return True
+
+    def stats(self) -> Dict:
+        """Compteurs de l'écriture différée"""
+        return {
+            "buffered": self.buffered,
+            "database_bypassed": self.database_bypassed,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "rows_written": self.rows_written,
+            "dropped": self.dropped,
+            "last_flush_ms": self.last_flush_ms,
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        """Arrêt du thread et écriture des enregistrements restants"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_s + 5)
+        self.flush()
+        if self._buffer:
+            print(f"⚠️  {len(self._buffer)} prédictions non écrites à l'arrêt: {self.last_error}")
@@ -0,0 +1,216 @@
+"""
+Backends d'inférence du modèle Cats vs Dogs
+
+Le même modèle peut être exécuté par différents moteurs :
+- keras       : modèle .keras chargé avec tf.keras (référence)
+- tflite      : modèle TFLite float32
+- tflite_int8 : modèle TFLite quantifié int8 (post-training, calibré sur PetImages)
+- onnx        : modèle ONNX exécuté par ONNX Runtime
+
+Les artefacts TFLite/ONNX sont produits par scripts/export_model.py à partir du modèle .keras.
+Les dépendances propres à chaque backend ne sont importées qu'à son chargement.
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+
+
+def artifact_path(model_path: Path, backend: str) -> Path:
+    """Chemin de l'artefact d'un backend, dérivé du chemin du modèle .keras"""
+    model_path = Path(model_path)
+    if backend == "keras":
+        return model_path
+    if backend == "tflite":
+        return model_path.with_suffix(".tflite")
+    if backend == "tflite_int8":
+        return model_path.with_name(f"{model_path.stem}_int8.tflite")
+    if backend == "onnx":
+        return model_path.with_suffix(".onnx")
+    raise ValueError(f"Backend inconnu: {backend}")
+
+
+class InferenceBackend:
+    """Interface commune des backends : chargement et prédiction d'un batch"""
+
+    name = None
+
+    def __init__(self, model_path: Path):
+        self.model_path = Path(model_path)
+
+    def load(self):
+        """Chargement de l'artefact (lève une exception en cas d'échec)"""
+        raise NotImplementedError
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        """Scores sigmoïdes (probabilité 'Dog') d'un batch (N, H, W, 3) -> (N,)"""
+        raise NotImplementedError
+
+    def count_params(self) -> int:
+        """Nombre de paramètres du modèle (0 si non disponible)"""
+        return 0
+
+
+class KerasBackend(InferenceBackend):
+    """
+    Modèle Keras natif
+
+    Si des buckets de taille de batch sont fournis, une fonction compilée (tf.function)
+    est tracée pour chacun d'eux au chargement puis "réchauffée" : chaque batch est
+    complété (padding) jusqu'au bucket supérieur et exécuté directement, sans passer
+    par la boucle de `model.predict` (adaptateur de données, callbacks...).
+    """
+
+    name = "keras"
+
+    def __init__(self, model_path: Path, batch_buckets=None):
+        super().__init__(model_path)
+        self.batch_buckets = sorted(set(batch_buckets or []))
+        self._serving_fns = {}
+
+    def load(self):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(self.model_path)
+        if self.batch_buckets:
+            self._build_serving_fns(tf)
+
+    def _build_serving_fns(self, tf):
+        """Traçage d'une fonction concrète par bucket puis warm-up"""
+        serve = tf.function(lambda images: self.model(images, training=False))
+        input_shape = tuple(self.model.input_shape[1:])
+        for bucket in self.batch_buckets:
+            spec = tf.TensorSpec((bucket,) + input_shape, tf.float32)
+            fn = serve.get_concrete_function(spec)
+            fn(tf.zeros((bucket,) + input_shape, tf.float32))  # Warm-up : le premier appel réel ne paie pas le traçage
+            self._serving_fns[bucket] = fn
+
+    def _predict_compiled(self, images: np.ndarray) -> np.ndarray:
+        """Exécution par chunks de la taille du plus grand bucket, chacun complété au bucket supérieur"""
+        max_bucket = self.batch_buckets[-1]
+        scores = []
+        for start in range(0, len(images), max_bucket):
+            chunk = images[start:start + max_bucket].astype(np.float32)
+            bucket = next(b for b in self.batch_buckets if b >= len(chunk))
+            if bucket > len(chunk):
+                padding = np.zeros((bucket - len(chunk),) + chunk.shape[1:], dtype=np.float32)
+                chunk_padded = np.concatenate([chunk, padding])
+            else:
+                chunk_padded = chunk
+            output = self._serving_fns[bucket](chunk_padded)
+            scores.append(np.asarray(output)[:len(chunk), 0])
+        return np.concatenate(scores)
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        if self._serving_fns:
+            return self._predict_compiled(images)
+        return self.model.predict(images, verbose=0)[:, 0]
+
+    def count_params(self) -> int:
+        return self.model.count_params()
+
+
+class TFLiteBackend(InferenceBackend):
+    """Modèle TFLite (float32 ou quantifié int8)"""
+
+    name = "tflite"
+
+    def load(self):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=str(self.model_path))
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self.input_detail["shape"][0])
+        self._lock = threading.Lock()  # L'interpréteur TFLite n'est pas thread-safe
+
+    def _resize(self, batch_size: int):
+        """Redimensionnement du tenseur d'entrée (uniquement si la taille du batch change)"""
+        if batch_size != self._batch_size:
+            shape = [batch_size] + list(self.input_detail["shape"][1:])
+            self.interpreter.resize_tensor_input(self.input_detail["index"], shape)
+            self.interpreter.allocate_tensors()
+            self.input_detail = self.interpreter.get_input_details()[0]
+            self.output_detail = self.interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    @staticmethod
+    def _quantize(values: np.ndarray, detail: dict) -> np.ndarray:
+        scale, zero_point = detail["quantization"]
+        if detail["dtype"] in (np.int8, np.uint8) and scale:
+            values = np.round(values / scale + zero_point)
+            info = np.iinfo(detail["dtype"])
+            values = np.clip(values, info.min, info.max)
+        return values.astype(detail["dtype"])
+
+    @staticmethod
+    def _dequantize(values: np.ndarray, detail: dict) -> np.ndarray:
+        scale, zero_point = detail["quantization"]
+        if detail["dtype"] in (np.int8, np.uint8) and scale:
+            return (values.astype(np.float32) - zero_point) * scale
+        return values.astype(np.float32)
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        with self._lock:
+            self._resize(len(images))
+            self.interpreter.set_tensor(
+                self.input_detail["index"],
+                self._quantize(images.astype(np.float32), self.input_detail)
+            )
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output_detail["index"])
+            return self._dequantize(output, self.output_detail)[:, 0]
+
+
+class TFLiteInt8Backend(TFLiteBackend):
+    """Modèle TFLite quantifié int8"""
+
+    name = "tflite_int8"
+
+
+class OnnxBackend(InferenceBackend):
+    """Modèle ONNX exécuté par ONNX Runtime"""
+
+    name = "onnx"
+
+    def load(self):
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(str(self.model_path), providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        output = self.session.run(None, {self.input_name: images.astype(np.float32)})[0]
+        return output[:, 0]
+
+    def count_params(self) -> int:
+        try:
+            import onnx
+            from onnx import numpy_helper
+        except ImportError:
+            return 0
+        model = onnx.load(str(self.model_path))
+        return int(sum(numpy_helper.to_array(t).size for t in model.graph.initializer))
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (KerasBackend, TFLiteBackend, TFLiteInt8Backend, OnnxBackend)
+}
+
+
+def get_backend(name: str, model_path: Path, batch_buckets=None) -> InferenceBackend:
+    """
+    Création du backend `name` pour le modèle `model_path` (.keras)
+
+    Le chemin de l'artefact propre au backend est dérivé de `model_path`.
+    `batch_buckets` (backend keras uniquement) active la fonction de service compilée.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu: {name} (disponibles : {', '.join(BACKENDS)})")
+    if name == "keras":
+        return KerasBackend(artifact_path(model_path, name), batch_buckets=batch_buckets)
+    return BACKENDS[name](artifact_path(model_path, name))
@@ -0,0 +1,143 @@
+"""
+Micro-batching des requêtes d'inférence
+
+Les requêtes concurrentes sont placées dans une file asyncio puis regroupées
+en un seul appel au modèle (jusqu'à `max_batch_size` images, ou dès que
+`max_wait_ms` est écoulé depuis la première image en attente).
+Chaque requête récupère ensuite son propre résultat.
+"""
+
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Planificateur asynchrone regroupant les images en batchs pour le modèle"""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[np.ndarray], List],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor=None,
+        max_concurrent_batches: int = 1,
+    ):
+        """
+        Args:
+            batch_fn: Fonction synchrone prenant un tableau (N, H, W, C) et retournant N résultats
+            max_batch_size: Taille maximale d'un batch
+            max_wait_ms: Attente maximale (ms) avant de lancer un batch incomplet
+            executor: Executor dans lequel exécuter batch_fn (None = executor par défaut de la boucle)
+            max_concurrent_batches: Nombre de batchs pouvant s'exécuter en parallèle (ex : un par worker)
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.executor = executor
+        self.max_concurrent_batches = max(1, int(max_concurrent_batches))
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._running: set = set()  # Références des batchs en cours (évite leur collecte par le GC)
+
+    def _ensure_started(self):
+        """Démarre la tâche de fond au premier appel (dans la boucle courante)"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, image: np.ndarray, timings: dict = None):
+        """
+        Soumet une image préprocessée et attend son résultat
+
+        Args:
+            image: Tableau (H, W, C) ou (1, H, W, C)
+            timings: Dictionnaire complété avec queue_wait_ms (attente avant exécution) et model_ms
+        """
+        self._ensure_started()
+        if image.ndim == 4:
+            image = image[0]
+        future = asyncio.get_running_loop().create_future()
+        submitted = time.perf_counter()
+        await self._queue.put((image, future))
+        result = await future
+
+        if timings is not None:
+            started, ended = future.batch_span
+            timings["queue_wait_ms"] = (started - submitted) * 1000
+            timings["model_ms"] = (ended - started) * 1000
+        return result
+
+    async def _collect(self) -> list:
+        """Attend une première requête puis complète le batch jusqu'à la taille ou au délai maximal"""
+        items = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            # Vidage non bloquant de ce qui est déjà en file
+            while len(items) < self.max_batch_size and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            remaining = deadline - time.perf_counter()
+            if len(items) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return items
+
+    async def _run(self):
+        """Boucle principale : collecte des batchs et lancement de leur exécution"""
+        while True:
+            # Un batch n'est collecté que lorsqu'un emplacement d'exécution est libre
+            await self._slots.acquire()
+            items = await self._collect()
+            task = asyncio.get_running_loop().create_task(self._execute(items))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, items: list):
+        """Exécution d'un batch et redistribution des résultats"""
+        try:
+            # Les requêtes annulées entre-temps (client déconnecté) sont ignorées
+            items = [(image, future) for image, future in items if not future.done()]
+            if not items:
+                return
+
+            batch = np.stack([image for image, _ in items])
+            try:
+                loop = asyncio.get_running_loop()
+                results, span = await loop.run_in_executor(self.executor, self._timed_batch, batch)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.batch_span = span  # (début, fin) de l'exécution réelle du batch
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def _timed_batch(self, batch: np.ndarray):
+        """Exécution du batch (dans l'executor) avec mesure de son début et de sa fin effectifs"""
+        started = time.perf_counter()
+        results = self.batch_fn(batch)
+        return results, (started, time.perf_counter())
+
+    async def close(self):
+        """Arrêt de la tâche de fond"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
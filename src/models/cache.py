@@ -0,0 +1,143 @@
+"""
+Cache des prédictions adressé par le contenu
+
+La clé est un hash SHA-256 des octets uploadés combiné à la version du modèle :
+une même image renvoyée par un utilisateur ne repasse ni par le décodage ni par le modèle.
+
+- Éviction LRU bornée en nombre d'entrées et en mémoire (estimée)
+- Expiration des entrées après un TTL
+- Single-flight : des uploads identiques simultanés ne déclenchent qu'une seule inférence
+"""
+
+import asyncio
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+
+
+def _estimate_size(value) -> int:
+    """Estimation (en octets) de l'empreinte mémoire d'un résultat de prédiction"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(v) for v in value)
+    return size
+
+
+class PredictionCache:
+    """Cache LRU/TTL des résultats de prédiction avec regroupement des calculs en cours"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl_s: float = 3600):
+        """
+        Args:
+            max_entries: Nombre maximal d'entrées
+            max_bytes: Mémoire maximale (estimée) occupée par les entrées
+            ttl_s: Durée de vie d'une entrée en secondes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()  # clé -> (expiration, taille, résultat)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(image_data: bytes, model_version: str) -> str:
+        """Clé de cache : hash du contenu de l'image et de la version du modèle"""
+        digest = hashlib.sha256(image_data)
+        digest.update(b"|" + str(model_version).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Lecture d'une entrée (None si absente ou expirée)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, result = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: Dict):
+        """Ajout d'une entrée puis éviction LRU si les limites sont dépassées"""
+        if key in self._entries:
+            self._remove(key)
+        size = _estimate_size(key) + _estimate_size(result)
+        self._entries[key] = (time.monotonic() + self.ttl_s, size, result)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict]],
+                             cacheable: Callable[[Dict], bool] = None) -> Tuple[Dict, bool]:
+        """
+        Retourne le résultat en cache ou le calcule (une seule fois pour des requêtes simultanées)
+
+        Args:
+            cacheable: Prédicat sur le résultat calculé (None : toujours mis en cache), ex : résultat
+                produit par la version du modèle qui figure dans la clé
+
+        Returns:
+            (résultat, cache_hit) : cache_hit vaut True si aucune inférence n'a été lancée pour cette requête
+        """
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result, True
+
+        # Un calcul identique est déjà en cours : on attend son résultat
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), True
+
+        self.misses += 1
+        # Calcul détaché de la requête qui l'a lancé : son annulation (client déconnecté,
+        # timeout) n'interrompt pas les requêtes regroupées sur le même calcul
+        task = asyncio.get_running_loop().create_task(compute())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._complete(key, t, cacheable))
+        return await asyncio.shield(task), False
+
+    def _complete(self, key: str, task: asyncio.Task, cacheable: Callable[[Dict], bool] = None):
+        """Fin d'un calcul : résultat mis en cache (avant le réveil des requêtes en attente)"""
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if cacheable is None or cacheable(task.result()):
+            self.put(key, task.result())
+
+    def stats(self) -> Dict:
+        """Compteurs du cache (dimensionnement)"""
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups * 100, 2) if lookups else 0,
+        }
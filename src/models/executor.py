@@ -0,0 +1,78 @@
+"""
+Executor dédié à l'inférence
+
+Le décodage des images et les appels synchrones au modèle sont exécutés dans un
+pool de threads dédié afin de ne pas bloquer la boucle asyncio de FastAPI.
+Le nombre de requêtes admises simultanément est borné : au-delà, la requête est
+refusée immédiatement (ExecutorSaturatedError) au lieu d'être mise en file sans limite.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+
+class ExecutorSaturatedError(Exception):
+    """Levée lorsque la file d'admission de l'executor est pleine"""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__("File d'inférence saturée")
+        self.retry_after_s = retry_after_s
+
+
+class InferenceExecutor:
+    """Pool de threads d'inférence avec file d'admission bornée"""
+
+    def __init__(self, max_workers: int = 4, max_queue_size: int = 64, retry_after_s: int = 1):
+        """
+        Args:
+            max_workers: Nombre de threads d'inférence
+            max_queue_size: Nombre de requêtes pouvant attendre en plus de celles en cours
+            retry_after_s: Valeur de l'en-tête Retry-After renvoyée en cas de saturation
+        """
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retry_after_s = retry_after_s
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        """Nombre maximal de requêtes admises simultanément"""
+        return self.max_workers + self.max_queue_size
+
+    @property
+    def in_flight(self) -> int:
+        """Nombre de requêtes actuellement admises"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Nombre de requêtes admises en attente d'un thread"""
+        return max(0, self._in_flight - self.max_workers)
+
+    @contextmanager
+    def admission(self):
+        """
+        Réserve une place pour une requête (à utiliser depuis la boucle asyncio)
+
+        Raises:
+            ExecutorSaturatedError: si la capacité est atteinte
+        """
+        if self._in_flight >= self.capacity:
+            raise ExecutorSaturatedError(self.retry_after_s)
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Exécute une fonction bloquante dans le pool et attend son résultat"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        """Arrêt du pool de threads"""
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -1,37 +1,72 @@
 import sys
+import time
 from pathlib import Path
-import tensorflow as tf
 import numpy as np
 from PIL import Image
 import io
 
 # Ajouter les chemins nécessaires
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from config.settings import MODEL_CONFIG, API_CONFIG
+from config.settings import MODEL_CONFIG, API_CONFIG, INFERENCE_CONFIG
+from src.models.backends import get_backend
 
 class CatDogPredictor:
-    def __init__(self):
+    def __init__(self, model_path=None, load: bool = True, backend: str = None, model_version: str = None):
         self.image_size = MODEL_CONFIG["image_size"]
-        self.model_path = API_CONFIG["model_path"]
+        self.fast_decode = MODEL_CONFIG["fast_decode"]
+        self.backend_name = backend or INFERENCE_CONFIG["backend"]
+        self.backend = get_backend(
+            self.backend_name,
+            Path(model_path) if model_path else API_CONFIG["model_path"],
+            batch_buckets=INFERENCE_CONFIG["batch_buckets"]
+        )
+        self.model_path = self.backend.model_path
         self.model = None
-        self.load_model()
+        self.model_version = model_version or self.compute_model_version()
+        if load:
+            self.load_model()
     
     def load_model(self):
         """Chargement du modèle"""
         try:
             if self.model_path.exists():
-                self.model = tf.keras.models.load_model(self.model_path)
-                print(f"Modèle chargé: {self.model_path}")
+                self.backend.load()
+                self.model = self.backend
+                print(f"Modèle chargé ({self.backend_name}): {self.model_path}")
             else:
                 print(f"Modèle non trouvé: {self.model_path}")
         except Exception as e:
             print(f"Erreur de chargement du modèle: {e}")
             self.model = None
     
-    def preprocess_image(self, image_data: bytes):
-        """Préprocessing de l'image"""
+    def compute_model_version(self) -> str:
+        """Version du modèle dérivée du fichier (nom, taille, date de modification)"""
+        if not self.model_path.exists():
+            return "unknown"
+        stat = self.model_path.stat()
+        return f"{self.model_path.stem}-{self.backend_name}-{stat.st_size}-{int(stat.st_mtime)}"
+    
+    def preprocess_image(self, image_data: bytes, fast_decode: bool = None, timings: dict = None):
+        """
+        Préprocessing de l'image
+        
+        Args:
+            image_data: Octets de l'image uploadée
+            fast_decode: Décodage JPEG réduit (None = valeur de MODEL_CONFIG["fast_decode"])
+            timings: Dictionnaire complété avec les durées (ms) des étapes decode_ms et resize_ms
+        """
+        start = time.perf_counter()
         image = Image.open(io.BytesIO(image_data))
         
+        if fast_decode is None:
+            fast_decode = self.fast_decode
+        if fast_decode and image.format == "JPEG":
+            # Décodage DCT à l'échelle 1/2, 1/4 ou 1/8 : le décodeur produit directement
+            # la plus petite image encore supérieure ou égale à la taille cible
+            image.draft("RGB", self.image_size)
+        image.load()  # Décodage explicite (sinon différé au premier accès aux pixels)
+        decoded = time.perf_counter()
+        
         if image.mode != 'RGB':
             image = image.convert('RGB')
         
@@ -39,6 +74,10 @@ class CatDogPredictor:
         img_array = np.array(image)
         img_array = np.expand_dims(img_array, axis=0)
         
+        if timings is not None:
+            timings["decode_ms"] = (decoded - start) * 1000
+            timings["resize_ms"] = (time.perf_counter() - decoded) * 1000
+        
         return img_array
     
     def predict(self, image_data: bytes):
@@ -47,9 +86,22 @@ class CatDogPredictor:
             raise ValueError("Modèle non chargé")
         
         processed_image = self.preprocess_image(image_data)
-        prediction = self.model.predict(processed_image, verbose=0)
-        score = float(prediction[0][0])
+        return self.predict_batch(processed_image)[0]
+    
+    def predict_batch(self, images: np.ndarray):
+        """Prédiction sur un batch d'images préprocessées (N, H, W, C)"""
+        if self.model is None:
+            raise ValueError("Modèle non chargé")
         
+        scores = self.model.predict(images)
+        return [
+            {**self.format_prediction(float(score)), "model_version": self.model_version}
+            for score in scores
+        ]
+    
+    @staticmethod
+    def format_prediction(score: float):
+        """Mise en forme du score sigmoïde en résultat de prédiction"""
         if score > 0.5:
             predicted_class = "Dog"
             confidence = score
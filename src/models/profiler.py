@@ -0,0 +1,258 @@
+"""
+Instrumentation de l'entraînement : débit, temps par pas, mémoire et CPU
+
+- TrainingProfile : mesures (indépendant de Keras) et rapport JSON
+- create_profiler_callback : callback Keras qui alimente un TrainingProfile
+- compare_with_baseline : comparaison d'un benchmark à un benchmark de référence
+  de même configuration
+
+Avec Keras, la lecture du batch suivant a lieu dans la fonction d'entraînement
+(entre on_train_batch_begin et on_train_batch_end) : l'attente du pipeline
+d'entrée n'est pas visible directement par un callback. Elle est estimée par
+l'écart entre le temps médian d'un pas et le temps d'un pas sur un batch déjà
+en mémoire (compute_step_ms, mesuré par src.data.pipeline.benchmark_compute).
+"""
+
+import json
+import os
+import resource
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+REPORT_VERSION = 1
+
+
+def _distribution(values_ms: List[float]) -> Dict:
+    if not values_ms:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    values = np.asarray(values_ms)
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (ru_maxrss en Ko sous Linux)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class TrainingProfile:
+    """Mesures d'un entraînement (époques, pas, débit, mémoire, CPU)"""
+
+    def __init__(self, batch_size: int, warmup_steps: int = 5, compute_step_ms: float = None, metadata: Dict = None,
+                 bottleneck: Dict = None):
+        """
+        Args:
+            batch_size: Images par batch (débit en images/s)
+            warmup_steps: Premiers pas exclus des statistiques (compilation, remplissage des buffers)
+            compute_step_ms: Temps d'un pas sans attente des données (estimation de l'attente du pipeline)
+            metadata: Informations ajoutées au rapport (configuration, source des données...)
+            bottleneck: Pipeline d'entrée et pas d'entraînement mesurés séparément
+                (src.data.pipeline.bottleneck_report)
+        """
+        self.batch_size = batch_size
+        self.warmup_steps = warmup_steps
+        self.compute_step_ms = compute_step_ms
+        self.bottleneck = bottleneck
+        self.metadata = metadata or {}
+        self.epochs: List[Dict] = []
+        self.step_ms: List[float] = []  # Après le warm-up, toutes époques confondues
+        self.gap_ms: List[float] = []  # Temps hors fonction d'entraînement entre deux pas (callbacks, boucle Python)
+        self._steps = 0
+        self._train_start = None
+        self._train_cpu = None
+        self._epoch_start = None
+        self._epoch_cpu = None
+        self._epoch_steps: List[float] = []
+        self._batch_start = None
+        self._batch_end = None
+        self.wall_s = None
+        self.cpu_percent = None
+
+    def train_begin(self):
+        self._train_start = time.perf_counter()
+        self._train_cpu = _cpu_seconds()
+
+    def epoch_begin(self):
+        self._epoch_start = time.perf_counter()
+        self._epoch_cpu = _cpu_seconds()
+        self._epoch_steps = []
+        self._batch_end = None
+
+    def batch_begin(self):
+        self._batch_start = time.perf_counter()
+        if self._batch_end is not None and self._steps >= self.warmup_steps:
+            self.gap_ms.append((self._batch_start - self._batch_end) * 1000)
+
+    def batch_end(self):
+        self._batch_end = time.perf_counter()
+        elapsed_ms = (self._batch_end - self._batch_start) * 1000
+        self._epoch_steps.append(elapsed_ms)
+        if self._steps >= self.warmup_steps:
+            self.step_ms.append(elapsed_ms)
+        self._steps += 1
+
+    def epoch_end(self, epoch: int, logs: Dict = None):
+        wall_s = time.perf_counter() - self._epoch_start
+        steps = len(self._epoch_steps)
+        self.epochs.append({
+            "epoch": epoch + 1,
+            "wall_s": round(wall_s, 3),
+            "steps": steps,
+            "images_per_s": round(steps * self.batch_size / wall_s, 1) if wall_s > 0 else None,
+            "step_ms": _distribution(self._epoch_steps),
+            "cpu_percent": self._cpu_percent(self._epoch_cpu, wall_s),
+            "peak_rss_mb": peak_rss_mb(),
+            "logs": {key: round(float(value), 5) for key, value in (logs or {}).items()},
+        })
+
+    def train_end(self):
+        self.wall_s = time.perf_counter() - self._train_start
+        self.cpu_percent = self._cpu_percent(self._train_cpu, self.wall_s)
+
+    @staticmethod
+    def _cpu_percent(cpu_start: float, wall_s: float) -> Optional[float]:
+        """Temps CPU du processus rapporté à la capacité de la machine (100 % : tous les cœurs occupés)"""
+        if wall_s <= 0:
+            return None
+        return round((_cpu_seconds() - cpu_start) / wall_s / (os.cpu_count() or 1) * 100, 1)
+
+    def report(self) -> Dict:
+        """Rapport JSON de l'entraînement"""
+        step = _distribution(self.step_ms)
+        steady_images_per_s = round(self.batch_size / step["p50"] * 1000, 1) if step["p50"] else None
+        input_wait_ms = None
+        if self.compute_step_ms is not None and step["p50"] is not None:
+            input_wait_ms = round(max(step["p50"] - self.compute_step_ms, 0.0), 3)
+        total_images = self._steps * self.batch_size
+        return {
+            "version": REPORT_VERSION,
+            "created_at": datetime.now().isoformat(),
+            **self.metadata,
+            "summary": {
+                "steps": self._steps,
+                "warmup_steps": min(self.warmup_steps, self._steps),
+                "batch_size": self.batch_size,
+                "wall_s": round(self.wall_s, 3) if self.wall_s is not None else None,
+                "images_per_s": round(total_images / self.wall_s, 1) if self.wall_s else None,
+                "steady_images_per_s": steady_images_per_s,  # Hors warm-up, au pas médian
+                "step_ms": step,
+                "between_steps_ms": _distribution(self.gap_ms),
+                "compute_step_ms": self.compute_step_ms,
+                "input_wait_ms": input_wait_ms,
+                "input_wait_share": round(input_wait_ms / step["p50"], 3) if input_wait_ms is not None and step["p50"] else None,
+                "bottleneck": self.bottleneck,
+                "peak_rss_mb": peak_rss_mb(),
+                "cpu_percent": self.cpu_percent,
+            },
+            "epochs": self.epochs,
+        }
+
+    def save(self, path: Path) -> Dict:
+        """Écriture du rapport JSON (retourne le rapport)"""
+        report = self.report()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def create_profiler_callback(profile: TrainingProfile):
+    """Callback Keras alimentant un TrainingProfile (Keras importé à l'appel)"""
+    from keras.callbacks import Callback
+
+    class TrainingProfiler(Callback):
+        def on_train_begin(self, logs=None):
+            profile.train_begin()
+
+        def on_epoch_begin(self, epoch, logs=None):
+            profile.epoch_begin()
+
+        def on_train_batch_begin(self, batch, logs=None):
+            profile.batch_begin()
+
+        def on_train_batch_end(self, batch, logs=None):
+            profile.batch_end()
+
+        def on_epoch_end(self, epoch, logs=None):
+            profile.epoch_end(epoch, logs)
+
+        def on_train_end(self, logs=None):
+            profile.train_end()
+
+    return TrainingProfiler()
+
+
+# Paramètres de pipeline sans effet sur le débit mesuré (chemin du cache, propre à la machine)
+IGNORED_PIPELINE_KEYS = ("cache_dir",)
+
+
+def benchmark_config(report: Dict) -> Dict:
+    """Configuration dont dépend le débit d'un benchmark (taille de batch, source, taille d'image, pipeline)"""
+    pipeline = report.get("pipeline")
+    if pipeline is not None:
+        pipeline = {key: value for key, value in pipeline.items() if key not in IGNORED_PIPELINE_KEYS}
+    return {
+        "batch_size": report["summary"].get("batch_size"),
+        "data_source": report.get("data_source"),
+        "image_size": report.get("image_size"),
+        "pipeline": pipeline,
+    }
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, tolerance: float = 0.05) -> Dict:
+    """
+    Comparaison d'un benchmark à une référence
+
+    Les débits ne sont comparés que si les deux benchmarks ont la même
+    configuration (benchmark_config) : sinon 'comparable' vaut False, les
+    différences sont listées dans 'mismatches' et 'regression' vaut None.
+
+    Args:
+        report: Rapport du benchmark courant
+        baseline: Rapport de référence
+        tolerance: Baisse relative de débit tolérée avant de signaler une régression
+
+    Returns:
+        Dict des variations relatives (images/s, pas médian, pic de RSS), 'comparable',
+        'mismatches' et 'regression'
+    """
+    current_config, baseline_config = benchmark_config(report), benchmark_config(baseline)
+    mismatches = {
+        key: {"current": current_config[key], "baseline": baseline_config[key]}
+        for key in current_config if current_config[key] != baseline_config[key]
+    }
+
+    def change(key, field=None):
+        current, reference = report["summary"][key], baseline["summary"][key]
+        if field is not None:
+            current, reference = current[field], reference[field]
+        if current is None or not reference:
+            return None
+        return round((current - reference) / reference, 4)
+
+    throughput_change = change("steady_images_per_s")
+    return {
+        "baseline_created_at": baseline.get("created_at"),
+        "steady_images_per_s": {"current": report["summary"]["steady_images_per_s"],
+                                "baseline": baseline["summary"]["steady_images_per_s"],
+                                "change": throughput_change},
+        "step_p50_ms_change": change("step_ms", "p50"),
+        "peak_rss_mb_change": change("peak_rss_mb"),
+        "comparable": not mismatches,
+        "mismatches": mismatches,
+        "regression": None if mismatches else throughput_change is not None and throughput_change < -tolerance,
+    }
@@ -0,0 +1,182 @@
+"""
+Registre de modèles versionnés et rechargement à chaud
+
+Arborescence du registre (REGISTRY_CONFIG["dir"]) :
+
+    registry/
+    ├── v1/cats_dogs_model.keras      (+ artefacts exportés : .tflite, .onnx...)
+    ├── v2/cats_dogs_model.keras
+    └── ACTIVE                        (optionnel : version à servir, sinon la plus récente)
+
+Une nouvelle version est chargée et réchauffée en arrière-plan pendant que la
+version courante continue de servir, puis la référence active est remplacée en
+une seule affectation : les requêtes en cours terminent sur l'ancien modèle.
+Si le registre est vide, le modèle de API_CONFIG["model_path"] est servi.
+"""
+
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Ajouter les chemins nécessaires
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.models.predictor import CatDogPredictor
+
+
+def _version_key(version: str):
+    """Tri naturel des versions (v2 < v10)"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", version)]
+
+
+class ModelRegistry:
+    """Registre des versions du modèle et référence vers la version active"""
+
+    def __init__(self, registry_dir: Path, default_model_path: Path, load_in_process: bool = True, on_swap=None):
+        """
+        Args:
+            registry_dir: Répertoire contenant un sous-répertoire par version
+            default_model_path: Modèle servi si le registre est vide
+            load_in_process: False en mode process_pool (les workers chargent le modèle)
+            on_swap: Fonction appelée (version, model_path) après chaque changement de version
+        """
+        self.registry_dir = Path(registry_dir)
+        self.default_model_path = Path(default_model_path)
+        self.load_in_process = load_in_process
+        self.on_swap = on_swap
+
+        try:
+            version, model_path = self.resolve()
+        except FileNotFoundError as e:
+            print(f"⚠️  {e} : utilisation du modèle par défaut")
+            version, model_path = None, self.default_model_path
+        self._active = CatDogPredictor(model_path=model_path, load=False, model_version=version)
+        self.active_model_path = model_path  # Modèle .keras source de la version active
+        self._loading_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.loading_version: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._failed_version: Optional[str] = None
+
+    @property
+    def active(self) -> CatDogPredictor:
+        """Prédicteur de la version active (à récupérer une fois par requête/batch)"""
+        return self._active
+
+    @property
+    def active_version(self) -> str:
+        return self._active.model_version
+
+    def list_versions(self) -> List[str]:
+        """Versions disponibles (sous-répertoires contenant le fichier modèle)"""
+        if not self.registry_dir.exists():
+            return []
+        model_name = self.default_model_path.name
+        versions = [d.name for d in self.registry_dir.iterdir() if (d / model_name).exists()]
+        return sorted(versions, key=_version_key)
+
+    def target_version(self) -> Optional[str]:
+        """Version à servir : celle du fichier ACTIVE si présent, sinon la plus récente"""
+        pinned = self.registry_dir / "ACTIVE"
+        if pinned.exists():
+            return pinned.read_text().strip() or None
+        versions = self.list_versions()
+        return versions[-1] if versions else None
+
+    def resolve(self, version: str = None):
+        """(version, chemin du modèle) pour une version donnée ou la version cible"""
+        version = version or self.target_version()
+        if version is None:
+            return None, self.default_model_path
+        model_path = self.registry_dir / version / self.default_model_path.name
+        if not model_path.exists():
+            raise FileNotFoundError(f"Version de modèle introuvable: {version}")
+        return version, model_path
+
+    def load(self, version: str = None) -> bool:
+        """
+        Chargement et warm-up d'une version puis bascule atomique (appel bloquant)
+
+        Returns:
+            True si la version est active à l'issue de l'appel
+        """
+        with self._loading_lock:
+            return self._load_locked(version)
+
+    def _load_locked(self, version: str = None) -> bool:
+        """Chargement puis bascule, _loading_lock étant détenu par l'appelant"""
+        try:
+            version, model_path = self.resolve(version)
+            self.loading_version = version or "default"
+            candidate = CatDogPredictor(model_path=model_path, load=False, model_version=version)
+
+            if self.load_in_process:
+                candidate.load_model()
+                if not candidate.is_loaded():
+                    raise RuntimeError(f"Chargement impossible: {candidate.model_path}")
+                # Warm-up avant bascule : la première requête réelle ne paie pas l'initialisation
+                height, width = candidate.image_size
+                candidate.predict_batch(np.zeros((1, height, width, 3), dtype=np.uint8))
+
+            # Bascule atomique : les batchs en cours conservent leur référence à l'ancien modèle
+            self._active = candidate
+            self.active_model_path = model_path
+            self.last_error = None
+            self._failed_version = None
+            if self.on_swap is not None:
+                self.on_swap(candidate.model_version, model_path)
+            print(f"✅ Modèle actif: version {candidate.model_version}")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            self._failed_version = version
+            print(f"❌ Échec du chargement de la version {version}: {e}")
+            return False
+        finally:
+            self.loading_version = None
+
+    def reload_async(self, version: str = None) -> bool:
+        """Lance le chargement d'une version en arrière-plan (False si un chargement est déjà en cours)"""
+        # Acquisition non bloquante (et non test puis acquisition) : un seul chargement à la fois
+        if not self._loading_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._load_locked(version)
+            finally:
+                self._loading_lock.release()
+
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True
+
+    def start_watcher(self, interval_s: float):
+        """Surveillance du registre : charge automatiquement toute nouvelle version cible"""
+        def watch():
+            while not self._stop.wait(interval_s):
+                try:
+                    target = self.target_version()
+                except OSError:
+                    continue
+                if target and target != self.active_version and target != self._failed_version:
+                    self.load(target)
+
+        self._watcher = threading.Thread(target=watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict:
+        """État du registre (version active, chargement en cours, versions disponibles)"""
+        return {
+            "active_version": self.active_version,
+            "model_path": str(self._active.model_path),
+            "loading_version": self.loading_version,
+            "last_error": self.last_error,
+            "versions": self.list_versions(),
+        }
@@ -5,51 +5,52 @@ from keras import layers, models
 
 # Ajouter les chemins nécessaires
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from config.settings import MODEL_CONFIG, MODELS_DIR
+from config.settings import MODEL_CONFIG, MODELS_DIR, PIPELINE_CONFIG
+from src.data.pipeline import benchmark_compute, benchmark_input, bottleneck_report, build_datasets, finalize
 from src.data.preprocessing import clean_corrupted_images, setup_data_directory
+from src.data.shards import load_shards
+from src.models.profiler import TrainingProfile, create_profiler_callback
 
 class CatDogTrainer:
     def __init__(self):
         self.config = MODEL_CONFIG
         self.models_dir = MODELS_DIR
         self.models_dir.mkdir(parents=True, exist_ok=True)
+        self.data_source = None
+        self.pipeline_config = dict(PIPELINE_CONFIG)
+        
+    def prepare_data(self, pipeline_config: dict = None):
+        """
+        Préparation des données
+        
+        Args:
+            pipeline_config: Surcharge de PIPELINE_CONFIG (ex : {"cache": "none"} pour les benchmarks)
+        """
+        self.pipeline_config = {**PIPELINE_CONFIG, **(pipeline_config or {})}
+        # Shards préprocessés (scripts/build_shards.py) : aucun décodage JPEG
+        shards = load_shards(image_size=self.config["image_size"])
+        if shards is not None:
+            print(f"Lecture des shards {shards.shards_dir} ({shards.count('train')} train, {shards.count('val')} val)")
+            self.data_source = "shards"
+            train_ds = shards.to_tf_dataset("train", self.config["batch_size"], shuffle=True, seed=self.pipeline_config["seed"])
+            val_ds = shards.to_tf_dataset("val", self.config["batch_size"])
+            return finalize(train_ds, training=True, config=self.pipeline_config), finalize(val_ds, training=False, config=self.pipeline_config)
         
-    def prepare_data(self):
-        """Préparation des données"""
         # Configuration du répertoire de données
         data_path = setup_data_directory()
         
         # Nettoyage
         clean_corrupted_images(data_path)
         
-        # Création des datasets
-        train_ds, val_ds = tf.keras.utils.image_dataset_from_directory(
-            data_path,
-            validation_split=0.2,
-            subset="both",
-            seed=1337,
-            image_size=self.config["image_size"],
-            batch_size=self.config["batch_size"],
-        )
-        
-        # Optimisations
-        AUTOTUNE = tf.data.AUTOTUNE
-        train_ds = train_ds.cache().shuffle(1000).prefetch(buffer_size=AUTOTUNE)
-        val_ds = val_ds.cache().prefetch(buffer_size=AUTOTUNE)
-        
-        return train_ds, val_ds
+        # Création des datasets (décodage, cache et augmentation dans le pipeline tf.data)
+        self.data_source = "files"
+        return build_datasets(data_path, self.config["image_size"], self.config["batch_size"], val_split=0.2,
+                              config=self.pipeline_config)
     
     def create_model(self):
-        """Création du modèle"""
-        data_augmentation = tf.keras.Sequential([
-            layers.RandomFlip("horizontal"),
-            layers.RandomRotation(0.1),
-            layers.RandomZoom(0.1),
-        ])
-        
+        """Création du modèle (l'augmentation est faite par le pipeline d'entrée, pas par le modèle)"""
         inputs = tf.keras.Input(shape=self.config["image_size"] + (3,))
         x = layers.Rescaling(1.0/255)(inputs)
-        x = data_augmentation(x)
         
         x = layers.Conv2D(32, 3, activation='relu')(x)
         x = layers.MaxPooling2D()(x)
@@ -71,14 +72,85 @@ class CatDogTrainer:
         
         return model
     
+    def report_bottleneck(self, train_ds=None, model=None, steps: int = 20, compute_stats: dict = None):
+        """
+        Temps par batch du pipeline d'entrée seul et du pas d'entraînement seul : lequel limite le débit
+        
+        Quelques batches seulement sont lus : le pipeline est construit sans cache (un cache
+        partiellement lu n'est jamais finalisé), le débit mesuré est celui d'une première époque.
+        
+        Args:
+            compute_stats: Mesure du pas d'entraînement déjà faite (benchmark_compute)
+        """
+        if train_ds is None:
+            train_ds, _ = self.prepare_data({"cache": "none"})
+        model = model or self.create_model()
+        compute_stats = compute_stats or benchmark_compute(model, train_ds, steps)
+        report = bottleneck_report(benchmark_input(train_ds, steps), compute_stats)
+        
+        print(f"Pipeline d'entrée: {report['input_batch_ms']} ms/batch ({report['input_images_per_s']} images/s)")
+        print(f"Pas d'entraînement: {report['compute_batch_ms']} ms/batch ({report['compute_images_per_s']} images/s)")
+        if report["bound"] == "input":
+            print("⚠️  Entraînement limité par le pipeline d'entrée (PIPELINE_PARALLEL_CALLS, PIPELINE_CACHE, shards)")
+        else:
+            print("✅ Entraînement limité par le calcul du modèle")
+        return report
+    
+    def create_profile(self, mode: str, compute_step_ms: float = None, bottleneck: dict = None) -> TrainingProfile:
+        """Mesures de l'entraînement, avec la configuration utile pour comparer deux rapports"""
+        return TrainingProfile(
+            batch_size=self.config["batch_size"],
+            compute_step_ms=compute_step_ms,
+            bottleneck=bottleneck,
+            metadata={
+                "mode": mode,
+                "data_source": self.data_source,
+                "image_size": list(self.config["image_size"]),
+                "pipeline": {key: str(value) for key, value in self.pipeline_config.items()},
+                "tensorflow": tf.__version__,
+            }
+        )
+    
+    def benchmark(self, steps: int = 100, report_path: Path = None):
+        """
+        Benchmark d'entraînement sur un nombre fixe de pas (modèle non sauvegardé)
+        
+        Pipeline sans cache : un nombre fixe de pas ne lit pas le dataset en entier et
+        un cache partiel ne serait jamais finalisé (débit de décodage mesuré à chaque pas).
+        
+        Returns:
+            Rapport JSON (écrit dans report_path, défaut : benchmark_profile.json à côté du modèle),
+            avec le goulot d'étranglement (summary.bottleneck : pipeline d'entrée ou calcul)
+        """
+        train_ds, _ = self.prepare_data({"cache": "none"})
+        model = self.create_model()
+        compute = benchmark_compute(model, train_ds, steps=10)
+        bottleneck = self.report_bottleneck(train_ds, model, compute_stats=compute)
+        
+        profile = self.create_profile("benchmark", compute_step_ms=compute["batch_ms"], bottleneck=bottleneck)
+        model.fit(
+            train_ds.repeat(),
+            epochs=1,
+            steps_per_epoch=steps,
+            callbacks=[create_profiler_callback(profile)],
+            verbose=0
+        )
+        
+        report_path = report_path or self.models_dir / "benchmark_profile.json"
+        report = profile.save(report_path)
+        print(f"Rapport de benchmark: {report_path}")
+        return report
+    
     def train(self):
         """Entraînement du modèle"""
         train_ds, val_ds = self.prepare_data()
         model = self.create_model()
         
         model_path = self.models_dir / "cats_dogs_model.keras"
+        profile = self.create_profile("train")
         
         callbacks = [
+            create_profiler_callback(profile),
             tf.keras.callbacks.ModelCheckpoint(
                 model_path,
                 save_best_only=True,
@@ -101,4 +173,9 @@ class CatDogTrainer:
         )
         
         print(f"Modèle sauvegardé: {model_path}")
+        
+        report_path = model_path.with_name("training_profile.json")
+        summary = profile.save(report_path)["summary"]
+        print(f"Débit: {summary['images_per_s']} images/s, pas médian {summary['step_ms']['p50']} ms, "
+              f"pic RSS {summary['peak_rss_mb']} Mo, CPU {summary['cpu_percent']} % (rapport : {report_path})")
         return model, history
\ No newline at end of file
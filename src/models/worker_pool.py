@@ -0,0 +1,313 @@
+"""
+Pool de processus d'inférence
+
+Chaque processus worker charge sa propre copie du modèle. Le front-end (API)
+écrit les images préprocessées (uint8, N x 128 x 128 x 3) directement dans un
+segment de mémoire partagée propre au worker : seules la commande et la taille
+du batch transitent par le Pipe, les images ne sont jamais picklées.
+
+Un thread de supervision suit l'état des workers et relance automatiquement
+ceux qui se sont arrêtés (crash, timeout).
+"""
+
+import multiprocessing as mp
+import queue
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Ajouter les chemins nécessaires
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+def load_predictor(model_path, model_version=None):
+    """Fabrique par défaut : prédicteur chargé dans le processus worker"""
+    from src.models.predictor import CatDogPredictor
+    return CatDogPredictor(model_path=model_path, model_version=model_version)
+
+
+def _worker_main(shm_name: str, shape: tuple, conn, model_path, model_version, predictor_factory: Callable):
+    """Boucle d'un processus worker : lit les batchs en mémoire partagée et renvoie les prédictions"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    images = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        predictor = predictor_factory(model_path, model_version)
+        if not predictor.is_loaded():
+            conn.send(("failed", f"Modèle non chargé: {model_path}"))
+            return
+        conn.send(("ready", None))
+
+        while True:
+            command, batch_size = conn.recv()
+            if command == "stop":
+                break
+            try:
+                conn.send(("ok", predictor.predict_batch(images[:batch_size])))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del images
+        shm.close()
+
+
+class _WorkerSlot:
+    """État d'un worker : processus, canal de communication et mémoire partagée"""
+
+    def __init__(self, index: int, shape: tuple):
+        self.index = index
+        self.shape = shape
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.images = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.generation = 0  # Incrémentée à chaque lancement : invalide les entrées périmées de la file des workers libres
+        self.started_at = None
+        self.restarts = 0
+        self.requests_served = 0
+        self.last_error = None
+
+
+class ModelWorkerPool:
+    """Pool de N processus détenant chacun une copie chargée du modèle"""
+
+    def __init__(
+        self,
+        num_workers: int,
+        model_path,
+        max_batch_size: int = 32,
+        image_size: tuple = (128, 128),
+        request_timeout_s: float = 30.0,
+        health_interval_s: float = 1.0,
+        predictor_factory: Callable = load_predictor,
+        model_version: str = None,
+    ):
+        """
+        Args:
+            num_workers: Nombre de processus workers
+            model_path: Chemin du modèle chargé par chaque worker
+            max_batch_size: Taille maximale d'un batch (dimensionne la mémoire partagée)
+            image_size: Taille des images préprocessées
+            request_timeout_s: Délai maximal d'une inférence avant relance du worker
+            health_interval_s: Période de supervision des workers
+            predictor_factory: Fonction (picklable) créant le prédicteur dans le worker
+            model_version: Version du modèle (registre), transmise aux workers
+        """
+        self.num_workers = num_workers
+        self.model_path = model_path
+        self.model_version = model_version
+        self.shape = (max_batch_size,) + tuple(image_size) + (3,)
+        self.request_timeout_s = request_timeout_s
+        self.health_interval_s = health_interval_s
+        self.predictor_factory = predictor_factory
+
+        self._ctx = mp.get_context("spawn")  # TensorFlow ne supporte pas le fork
+        self._slots: List[_WorkerSlot] = []
+        self._idle: "queue.Queue[tuple]" = queue.Queue()  # (indice, génération) des workers libres
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self):
+        """Démarrage des workers et du thread de supervision"""
+        for index in range(self.num_workers):
+            slot = _WorkerSlot(index, self.shape)
+            self._slots.append(slot)
+            self._spawn(slot)
+
+        self._monitor = threading.Thread(target=self._supervise, name="worker-pool-monitor", daemon=True)
+        self._monitor.start()
+        print(f"Pool de {self.num_workers} workers d'inférence démarré")
+
+    def _spawn(self, slot: _WorkerSlot):
+        """(Re)lancement du processus d'un worker"""
+        parent_conn, child_conn = self._ctx.Pipe()
+        slot.conn = parent_conn
+        slot.ready = False
+        slot.generation += 1
+        slot.started_at = time.time()
+        slot.process = self._ctx.Process(
+            target=_worker_main,
+            args=(slot.shm.name, slot.shape, child_conn, self.model_path, self.model_version, self.predictor_factory),
+            name=f"model-worker-{slot.index}",
+            daemon=True,
+        )
+        slot.process.start()
+        child_conn.close()
+
+    def _supervise(self):
+        """Suivi de l'état des workers : disponibilité et relance des workers arrêtés"""
+        while not self._stop.is_set():
+            for slot in self._slots:
+                with self._lock:
+                    if slot.process is None:
+                        # Worker arrêté par un appel en échec : relance
+                        slot.restarts += 1
+                        self._spawn(slot)
+                    elif not slot.ready:
+                        self._check_ready(slot)
+                    elif not slot.process.is_alive():
+                        # Worker prêt mort hors requête (OOM-kill, segfault) : détecté avant qu'une requête lui soit confiée
+                        slot.last_error = f"Worker arrêté (code {slot.process.exitcode})"
+                        self._discard(slot)
+            self._stop.wait(self.health_interval_s)
+
+    def _check_ready(self, slot: _WorkerSlot):
+        """Attente du message de disponibilité d'un worker en cours de démarrage"""
+        if not slot.process.is_alive():
+            slot.last_error = f"Worker arrêté au démarrage (code {slot.process.exitcode})"
+            self._discard(slot)
+            return
+        try:
+            if not slot.conn.poll():
+                return
+            status, detail = slot.conn.recv()
+        except (EOFError, OSError):
+            self._discard(slot)
+            return
+
+        if status == "ready":
+            slot.ready = True
+            self._idle.put((slot.index, slot.generation))
+        else:
+            slot.last_error = detail
+            self._discard(slot)
+
+    def _discard(self, slot: _WorkerSlot):
+        """Arrêt d'un worker défaillant (il sera relancé par la supervision)"""
+        slot.ready = False
+        if slot.process is not None and slot.process.is_alive():
+            slot.process.kill()
+        if slot.process is not None:
+            slot.process.join(timeout=1)
+        if slot.conn is not None:
+            slot.conn.close()
+        slot.process = None
+        slot.conn = None
+
+    def _acquire(self, timeout: float) -> Optional[_WorkerSlot]:
+        """Worker libre et prêt (None après timeout), les entrées de workers arrêtés ou relancés sont ignorées"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                index, generation = self._idle.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return None
+            slot = self._slots[index]
+            with self._lock:
+                if slot.ready and slot.generation == generation and slot.process is not None and slot.process.is_alive():
+                    return slot
+            # Entrée périmée : le worker sera remis dans la file une fois relancé et prêt
+
+    def reload(self, model_path, model_version: str = None):
+        """
+        Rechargement progressif (rolling) : chaque worker est relancé sur le nouveau
+        modèle dès qu'il est libre, les autres continuent de servir pendant ce temps
+        """
+        self.model_path = model_path
+        self.model_version = model_version
+
+        def roll():
+            # Générations lancées avec l'ancien modèle
+            pending = {slot.index: slot.generation for slot in self._slots}
+            while pending:
+                slot = self._acquire(self.request_timeout_s)
+                if slot is None:
+                    break
+                if pending.get(slot.index) != slot.generation:
+                    # Worker déjà relancé sur le nouveau modèle : on le rend au pool
+                    pending.pop(slot.index, None)
+                    self._idle.put((slot.index, slot.generation))
+                    time.sleep(0.01)
+                    continue
+                pending.pop(slot.index)
+                with self._lock:
+                    # Arrêt du worker libre : la supervision le relance avec le nouveau modèle
+                    self._discard(slot)
+
+        threading.Thread(target=roll, name="worker-pool-reload", daemon=True).start()
+
+    def is_ready(self) -> bool:
+        """Au moins un worker est prêt à servir"""
+        return any(slot.ready for slot in self._slots)
+
+    def predict_batch(self, images: np.ndarray) -> List[Dict]:
+        """
+        Prédiction d'un batch par le premier worker disponible (appel bloquant)
+
+        Args:
+            images: Tableau uint8 (N, H, W, 3) avec N <= max_batch_size
+        """
+        batch_size = len(images)
+        if batch_size > self.shape[0]:
+            raise ValueError(f"Batch trop grand ({batch_size} > {self.shape[0]})")
+
+        slot = self._acquire(self.request_timeout_s)
+        if slot is None:
+            raise TimeoutError("Aucun worker d'inférence disponible")
+        index, generation = slot.index, slot.generation
+
+        try:
+            # Copie directe dans la mémoire partagée du worker (pas de sérialisation)
+            slot.images[:batch_size] = images
+            slot.conn.send(("predict", batch_size))
+            if not slot.conn.poll(self.request_timeout_s):
+                raise TimeoutError(f"Worker {index} sans réponse après {self.request_timeout_s}s")
+            status, payload = slot.conn.recv()
+        except Exception as e:
+            # Worker crashé ou bloqué : il est arrêté puis relancé par la supervision
+            with self._lock:
+                if slot.generation == generation:
+                    slot.last_error = str(e)
+                    self._discard(slot)
+            raise RuntimeError(f"Échec du worker d'inférence {index}: {e}") from e
+
+        self._idle.put((index, generation))
+        if status == "error":
+            raise RuntimeError(payload)
+        slot.requests_served += 1
+        return payload
+
+    def health(self) -> List[Dict]:
+        """État de santé de chaque worker"""
+        return [
+            {
+                "worker": slot.index,
+                "pid": slot.process.pid if slot.process is not None else None,
+                "alive": slot.process is not None and slot.process.is_alive(),
+                "ready": slot.ready,
+                "restarts": slot.restarts,
+                "model_version": self.model_version,
+                "requests_served": slot.requests_served,
+                "uptime_s": round(time.time() - slot.started_at, 1) if slot.started_at else None,
+                "last_error": slot.last_error,
+            }
+            for slot in self._slots
+        ]
+
+    def close(self):
+        """Arrêt des workers et libération de la mémoire partagée"""
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join(timeout=self.health_interval_s + 1)
+
+        for slot in self._slots:
+            if slot.conn is not None and slot.ready:
+                try:
+                    slot.conn.send(("stop", 0))
+                except (BrokenPipeError, OSError):
+                    pass
+            if slot.process is not None:
+                slot.process.join(timeout=2)
+            self._discard(slot)
+            del slot.images
+            slot.shm.close()
+            slot.shm.unlink()
+        self._slots = []
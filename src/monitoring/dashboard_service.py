@@ -2,18 +2,20 @@
 Service pour générer les métriques et graphiques du dashboard de monitoring
 
 Ce service récupère les données de PostgreSQL et génère :
-- KPI du temps d'inférence moyen
-- Courbe temporelle des temps d'inférence
+- KPI du temps d'inférence moyen et centiles p50/p90/p99 (sketch de quantiles)
+- Courbe temporelle des temps d'inférence (moyenne, p50, p95 et max par intervalle
+  de temps, ou points bruts sous-échantillonnés par LTTB)
+- Décomposition du temps de traitement par étape (lecture, décodage, modèle...)
 - KPI du taux de satisfaction utilisateur
 - Scatter plot de la satisfaction dans le temps
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import BigInteger, cast, func, literal_column
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-import plotly.express as px
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
 import sys
 from pathlib import Path
@@ -21,53 +23,338 @@ ROOT_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
 from src.database.models import PredictionFeedback
+from src.database.feedback_service import FeedbackService
+from src.monitoring.rollups import RollupService
+from src.monitoring.sketch import SketchStore
+from src.monitoring.downsampling import choose_bucket_width, lttb, resolve_range
+from config.settings import DASHBOARD_CONFIG
+
+EPOCH = datetime(1970, 1, 1)
+
+# Lignes brutes lues au plus par courbe en mode 'raw' (multiple de max_points)
+RAW_POINTS_FACTOR = 4
+
+# Libellés et couleurs des étapes du traitement d'une prédiction
+STAGE_LABELS = {
+    'read_ms': 'Lecture upload',
+    'decode_ms': 'Décodage',
+    'resize_ms': 'Redimensionnement',
+    'queue_wait_ms': 'Attente file',
+    'model_ms': 'Modèle',
+    'db_write_ms': 'Écriture BDD',
+}
+STAGE_COLORS = {
+    'read_ms': '#95a5a6',
+    'decode_ms': '#9b59b6',
+    'resize_ms': '#1abc9c',
+    'queue_wait_ms': '#f39c12',
+    'model_ms': '#3498db',
+    'db_write_ms': '#e74c3c',
+}
 
 class DashboardService:
     """Service pour générer les données et graphiques du dashboard"""
     
     @staticmethod
-    def get_kpi_inference_time(db: Session) -> Dict:
+    def get_time_window(db: Session, time_range: str) -> Tuple[datetime, datetime, int]:
+        """
+        Bornes de la période affichée et largeur d'intervalle adaptée
+        
+        Args:
+            time_range: Période (clé de TIME_RANGES, 'all' : depuis la première prédiction)
+        
+        Returns:
+            Tuple (début, fin, largeur d'intervalle en secondes)
+        """
+        _, span = resolve_range(time_range, DASHBOARD_CONFIG["default_range"])
+        end = datetime.now()
+        if span is not None:
+            start = end - span
+        else:
+            start = db.query(func.min(PredictionFeedback.created_at)).scalar() or end
+        return start, end, choose_bucket_width(end - start, DASHBOARD_CONFIG["max_buckets"])
+    
+    @staticmethod
+    def _bucket_epoch(db: Session, width_s: int):
+        """Expression SQL du début d'intervalle (secondes depuis l'epoch) de chaque prédiction"""
+        # Largeur en littéral (et non en paramètre) : expression identique dans SELECT et GROUP BY
+        width = literal_column(str(int(width_s)))
+        if db.get_bind().dialect.name == "postgresql":
+            epoch = func.extract('epoch', PredictionFeedback.created_at)
+            return cast(func.floor(epoch / width) * width, BigInteger)
+        # SQLite : troncature par CAST (timestamps positifs)
+        epoch = cast(func.strftime('%s', PredictionFeedback.created_at), BigInteger)
+        return cast(epoch / width, BigInteger) * width
+    
+    @staticmethod
+    def get_latency_buckets(db: Session, start: datetime, end: datetime, width_s: int) -> List[Dict]:
+        """
+        Temps d'inférence agrégés par intervalle de temps (moyenne, p50, p95, max)
+        
+        L'agrégation est faite par PostgreSQL (percentile_cont) : seul un point par
+        intervalle est transféré, quel que soit le nombre de prédictions.
+        
+        Returns:
+            Liste de dicts (bucket_start, count, avg_ms, p50_ms, p95_ms, max_ms), ordonnée
+        """
+        bucket = DashboardService._bucket_epoch(db, width_s).label('bucket')
+        filters = (
+            PredictionFeedback.success == True,
+            PredictionFeedback.created_at >= start,
+            PredictionFeedback.created_at <= end
+        )
+        
+        if db.get_bind().dialect.name == "postgresql":
+            rows = db.query(
+                bucket,
+                func.count(PredictionFeedback.id),
+                func.avg(PredictionFeedback.inference_time_ms),
+                func.percentile_cont(0.5).within_group(PredictionFeedback.inference_time_ms),
+                func.percentile_cont(0.95).within_group(PredictionFeedback.inference_time_ms),
+                func.max(PredictionFeedback.inference_time_ms)
+            ).filter(*filters).group_by(bucket).order_by(bucket).all()
+        else:
+            # Autres bases (SQLite des tests) : pas de percentile_cont, calcul des centiles en Python
+            values: Dict[int, List[float]] = {}
+            for epoch, value in db.query(bucket, PredictionFeedback.inference_time_ms).filter(*filters):
+                values.setdefault(epoch, []).append(value)
+            rows = [
+                (epoch, len(v), float(np.mean(v)), *np.percentile(v, [50, 95]), max(v))
+                for epoch, v in sorted(values.items())
+            ]
+        
+        return [
+            {
+                'bucket_start': EPOCH + timedelta(seconds=int(epoch)),
+                'count': int(count),
+                'avg_ms': float(avg),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'max_ms': float(max_ms)
+            }
+            for epoch, count, avg, p50, p95, max_ms in rows
+        ]
+    
+    @staticmethod
+    def get_latency_points(db: Session, start: datetime, end: datetime, max_points: int) -> Tuple[List, List]:
+        """
+        Temps d'inférence bruts de la période, sous-échantillonnés par LTTB
+        
+        Au plus RAW_POINTS_FACTOR * max_points lignes quittent la base : au-delà,
+        la période est découpée en intervalles fins (2 * max_points) dont le
+        minimum et le maximum sont calculés en SQL (placés au début et au milieu de
+        l'intervalle), puis LTTB est appliqué à ces extrêmes : les pics sont conservés,
+        à la largeur d'un intervalle fin près.
+        
+        Returns:
+            Tuple (timestamps, temps d'inférence) d'au plus max_points points
+        """
+        limit = RAW_POINTS_FACTOR * max_points
+        filters = (
+            PredictionFeedback.success == True,
+            PredictionFeedback.created_at >= start,
+            PredictionFeedback.created_at <= end
+        )
+        rows = db.query(
+            PredictionFeedback.created_at,
+            PredictionFeedback.inference_time_ms
+        ).filter(*filters).order_by(
+            PredictionFeedback.created_at
+        ).limit(limit + 1).all()
+        
+        if not rows:
+            return [], []
+        if len(rows) <= limit:
+            timestamps = [r.created_at for r in rows]
+            values = [r.inference_time_ms for r in rows]
+        else:
+            # Trop de points : minimum et maximum de chaque intervalle fin, agrégés en SQL
+            width_s = max(1, int(np.ceil((end - start).total_seconds() / (2 * max_points))))
+            bucket = DashboardService._bucket_epoch(db, width_s).label('bucket')
+            timestamps, values = [], []
+            for epoch, low, high in db.query(
+                bucket,
+                func.min(PredictionFeedback.inference_time_ms),
+                func.max(PredictionFeedback.inference_time_ms)
+            ).filter(*filters).group_by(bucket).order_by(bucket):
+                bucket_start = EPOCH + timedelta(seconds=int(epoch))
+                timestamps.extend((bucket_start, bucket_start + timedelta(seconds=width_s / 2)))
+                values.extend((low, high))
+        
+        x = [(t - EPOCH).total_seconds() for t in timestamps]
+        keep = lttb(x, values, max_points)
+        return [timestamps[i] for i in keep], [values[i] for i in keep]
+    
+    @staticmethod
+    def get_kpi_inference_time(db: Session, totals: Dict = None) -> Dict:
         """
         Calcule le KPI du temps d'inférence moyen
         
+        Args:
+            totals: Résultat de RollupService.get_totals déjà lu pendant la construction
+                du dashboard (lu ici si absent)
+        
         Returns:
             Dict avec temps moyen, min, max, et nombre de prédictions
         """
+        # Agrégats horaires + prédictions pas encore agrégées (voir rollups.py)
+        if totals is None:
+            totals = RollupService.get_totals(db)
+        success_count = totals['success_count'] or 0
+        avg_time = totals['latency_sum_ms'] / success_count if success_count else None
+        
+        return {
+            'avg_inference_time_ms': round(float(avg_time), 2) if avg_time else 0,
+            'min_inference_time_ms': round(float(totals['latency_min_ms']), 3) if totals['latency_min_ms'] else 0,
+            'max_inference_time_ms': round(float(totals['latency_max_ms']), 3) if totals['latency_max_ms'] else 0,
+            'total_predictions': int(success_count)
+        }
+    
+    @staticmethod
+    def get_kpi_latency_percentiles(db: Session, pending_sketch=None, start: datetime = None,
+                                    end: datetime = None) -> Dict:
+        """
+        Calcule les centiles p50/p90/p99 du temps d'inférence (tout l'historique ou une période)
+        
+        Lus dans le sketch de quantiles persisté (ligne 'total', ou lignes horaires de la
+        période), fusionné avec celui du processus pas encore écrit en base : temps
+        constant quel que soit le volume.
+        
+        Args:
+            start: Début de la période (None : tout l'historique), à l'heure près
+            end: Fin de la période
+        
+        Returns:
+            Dict avec p50_ms, p90_ms, p99_ms et le nombre de prédictions du sketch
+        """
+        return SketchStore.percentiles(db, pending_sketch, start=start, end=end)
+    
+    @staticmethod
+    def get_kpi_stage_breakdown(db: Session, start: datetime, end: datetime) -> Dict:
+        """
+        Calcule le temps moyen de chaque étape du traitement sur la période affichée
+        
+        Les prédictions servies par le cache sont exclues (pas de décodage ni de modèle).
+        Seules les prédictions de la période sont lues (index sur created_at).
+        
+        Args:
+            start: Début de la période
+            end: Fin de la période
+        
+        Returns:
+            Dict avec, pour chaque étape, le temps moyen (ms) et sa part du temps total
+        """
+        columns = [getattr(PredictionFeedback, stage) for stage in FeedbackService.STAGES]
         result = db.query(
-            func.avg(PredictionFeedback.inference_time_ms).label('avg_time'),
-            func.min(PredictionFeedback.inference_time_ms).label('min_time'),
-            func.max(PredictionFeedback.inference_time_ms).label('max_time'),
-            func.count(PredictionFeedback.id).label('total_predictions')
+            *[func.avg(column) for column in columns]
         ).filter(
-            PredictionFeedback.success == True
+            PredictionFeedback.success == True,
+            PredictionFeedback.cache_hit == False,
+            PredictionFeedback.created_at >= start,
+            PredictionFeedback.created_at <= end
         ).first()
         
+        averages = {stage: round(float(value), 3) if value is not None else 0
+                    for stage, value in zip(FeedbackService.STAGES, result)}
+        total = sum(averages.values())
+        
         return {
-            'avg_inference_time_ms': round(float(result.avg_time), 2) if result.avg_time else 0,
-            'min_inference_time_ms': int(result.min_time) if result.min_time else 0,
-            'max_inference_time_ms': int(result.max_time) if result.max_time else 0,
-            'total_predictions': int(result.total_predictions) if result.total_predictions else 0
+            'stages': [
+                {
+                    'stage': stage,
+                    'label': STAGE_LABELS[stage],
+                    'avg_ms': avg_ms,
+                    'share': round(avg_ms / total * 100, 1) if total > 0 else 0
+                }
+                for stage, avg_ms in averages.items()
+            ],
+            'total_ms': round(total, 3)
         }
     
     @staticmethod
-    def get_kpi_user_satisfaction(db: Session) -> Dict:
+    def generate_stage_breakdown_chart(db: Session, time_range: str = None) -> str:
+        """
+        Génère la courbe empilée du temps de traitement par étape
+        
+        Permet de savoir si une régression de latence vient du décodage, de
+        l'attente, du modèle ou de l'écriture en base. Temps moyens par intervalle
+        de temps (agrégés en SQL).
+        
+        Args:
+            time_range: Période affichée (défaut : DASHBOARD_CONFIG["default_range"])
+        
+        Returns:
+            HTML du graphique Plotly
+        """
+        stages = FeedbackService.STAGES
+        start, end, width_s = DashboardService.get_time_window(db, time_range)
+        bucket = DashboardService._bucket_epoch(db, width_s).label('bucket')
+        buckets = db.query(
+            bucket,
+            *[func.avg(getattr(PredictionFeedback, stage)) for stage in stages]
+        ).filter(
+            PredictionFeedback.success == True,
+            PredictionFeedback.cache_hit == False,
+            PredictionFeedback.model_ms.isnot(None),
+            PredictionFeedback.created_at >= start,
+            PredictionFeedback.created_at <= end
+        ).group_by(bucket).order_by(bucket).all()
+        
+        if not buckets:
+            return "<p>Aucune donnée disponible</p>"
+        
+        # Import différé : plotly n'est chargé qu'au premier affichage du dashboard
+        import plotly.graph_objects as go
+        
+        timestamps = [EPOCH + timedelta(seconds=int(b[0])) for b in buckets]
+        
+        # Une aire empilée par étape : la hauteur totale est le temps de traitement
+        fig = go.Figure()
+        for i, stage in enumerate(stages, start=1):
+            fig.add_trace(go.Scatter(
+                x=timestamps,
+                y=[float(b[i] or 0) for b in buckets],
+                mode='lines',
+                name=STAGE_LABELS[stage],
+                stackgroup='stages',
+                line=dict(color=STAGE_COLORS[stage], width=1),
+                hovertemplate='%{y:.3f} ms'
+            ))
+        
+        # Mise en forme
+        fig.update_layout(
+            title='Décomposition du temps de traitement',
+            xaxis_title='Date et heure',
+            yaxis_title='Temps (ms)',
+            hovermode='x unified',
+            template='plotly_white',
+            height=400,
+            legend=dict(
+                orientation="h",  # Légende horizontale
+                yanchor="top",
+                y=0.99,
+                xanchor="right",
+                x=0.99
+            )
+        )
+        
+        return fig.to_html(full_html=False, include_plotlyjs='cdn', div_id='chart-stages')
+    
+    @staticmethod
+    def get_kpi_user_satisfaction(db: Session, totals: Dict = None) -> Dict:
         """
         Calcule le KPI de satisfaction utilisateur
         
+        Args:
+            totals: Résultat de RollupService.get_totals (lu ici si absent)
+        
         Returns:
             Dict avec taux de satisfaction, nombre total de feedbacks
         """
-        # Total des feedbacks renseignés (pas NULL)
-        total_feedbacks = db.query(func.count(PredictionFeedback.id)).filter(
-            PredictionFeedback.user_feedback.isnot(None),
-            PredictionFeedback.rgpd_consent == True
-        ).scalar() or 0
-        
-        # Feedbacks positifs (satisfaction = 1)
-        positive_feedbacks = db.query(func.count(PredictionFeedback.id)).filter(
-            PredictionFeedback.user_feedback == 1,
-            PredictionFeedback.rgpd_consent == True
-        ).scalar() or 0
+        if totals is None:
+            totals = RollupService.get_totals(db)
+        total_feedbacks = int(totals['feedback_count'] or 0)
+        positive_feedbacks = int(totals['feedback_positive_count'] or 0)
         
         # Calcul du taux de satisfaction
         satisfaction_rate = round((positive_feedbacks / total_feedbacks * 100), 2) if total_feedbacks > 0 else 0
@@ -80,50 +367,69 @@ class DashboardService:
         }
     
     @staticmethod
-    def generate_inference_time_chart(db: Session) -> str:
+    def generate_inference_time_chart(db: Session, time_range: str = None, mode: str = 'buckets') -> str:
         """
         Génère la courbe temporelle des temps d'inférence
         
+        Args:
+            time_range: Période affichée (défaut : DASHBOARD_CONFIG["default_range"])
+            mode: 'buckets' (moyenne, p50, p95, max par intervalle, agrégés en SQL)
+                ou 'raw' (points bruts sous-échantillonnés par LTTB)
+        
         Returns:
             HTML du graphique Plotly
         """
-        # Récupération de toutes les prédictions réussies
-        predictions = db.query(
-            PredictionFeedback.created_at,
-            PredictionFeedback.inference_time_ms
-        ).filter(
-            PredictionFeedback.success == True
-        ).order_by(
-            PredictionFeedback.created_at
-        ).all()
+        start, end, width_s = DashboardService.get_time_window(db, time_range)
         
-        if not predictions:
-            return "<p>Aucune donnée disponible</p>"
+        # Import différé : plotly n'est chargé qu'au premier affichage du dashboard
+        import plotly.graph_objects as go
         
-        # Préparation des données
-        timestamps = [p.created_at for p in predictions]
-        inference_times = [p.inference_time_ms for p in predictions]
-        
-        # Création du graphique
         fig = go.Figure()
         
-        # Ligne principale
-        fig.add_trace(go.Scatter(
-            x=timestamps,
-            y=inference_times,
-            mode='lines+markers',
-            name='Temps d\'inférence',
-            line=dict(color='#3498db', width=2),
-            marker=dict(size=6)
-        ))
+        if mode == 'raw':
+            timestamps, inference_times = DashboardService.get_latency_points(
+                db, start, end, DASHBOARD_CONFIG["max_points"]
+            )
+            if not timestamps:
+                return "<p>Aucune donnée disponible</p>"
+            
+            fig.add_trace(go.Scatter(
+                x=timestamps,
+                y=inference_times,
+                mode='lines+markers',
+                name='Temps d\'inférence',
+                line=dict(color='#3498db', width=2),
+                marker=dict(size=6)
+            ))
+            avg_time = sum(inference_times) / len(inference_times)
+        else:
+            buckets = DashboardService.get_latency_buckets(db, start, end, width_s)
+            if not buckets:
+                return "<p>Aucune donnée disponible</p>"
+            
+            timestamps = [b['bucket_start'] for b in buckets]
+            for key, name, style in (
+                ('p95_ms', 'p95', dict(color='#f39c12', width=1)),
+                ('max_ms', 'Max', dict(color='#95a5a6', width=1, dash='dot')),
+                ('p50_ms', 'p50', dict(color='#2ecc71', width=1)),
+                ('avg_ms', 'Moyenne', dict(color='#3498db', width=2)),
+            ):
+                fig.add_trace(go.Scatter(
+                    x=timestamps,
+                    y=[round(b[key], 3) for b in buckets],
+                    mode='lines',
+                    name=name,
+                    line=style
+                ))
+            # Moyenne sur la période, pondérée par le nombre de prédictions de chaque intervalle
+            avg_time = sum(b['avg_ms'] * b['count'] for b in buckets) / sum(b['count'] for b in buckets)
         
         # Ligne de moyenne
-        avg_time = sum(inference_times) / len(inference_times)
         fig.add_trace(go.Scatter(
             x=[timestamps[0], timestamps[-1]],
             y=[avg_time, avg_time],
             mode='lines',
-            name=f'Moyenne ({avg_time:.0f} ms)',
+            name=f'Moyenne période ({avg_time:.0f} ms)',
             line=dict(color='#e74c3c', width=2, dash='dash')
         ))
         
@@ -144,17 +450,21 @@ class DashboardService:
             )
         )
         
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return fig.to_html(full_html=False, include_plotlyjs='cdn', div_id='chart-inference')
     
     @staticmethod
-    def generate_satisfaction_scatter(db: Session) -> str:
+    def generate_satisfaction_scatter(db: Session, time_range: str = None) -> str:
         """
         Génère le scatter plot de la satisfaction utilisateur
         
+        Args:
+            time_range: Période affichée (défaut : DASHBOARD_CONFIG["default_range"])
+        
         Returns:
             HTML du graphique Plotly
         """
         # Récupération des feedbacks avec consentement RGPD
+        start, end, _ = DashboardService.get_time_window(db, time_range)
         feedbacks = db.query(
             PredictionFeedback.created_at,
             PredictionFeedback.user_feedback,
@@ -162,7 +472,9 @@ class DashboardService:
             PredictionFeedback.prediction_result
         ).filter(
             PredictionFeedback.rgpd_consent == True,
-            PredictionFeedback.user_feedback.isnot(None)
+            PredictionFeedback.user_feedback.isnot(None),
+            PredictionFeedback.created_at >= start,
+            PredictionFeedback.created_at <= end
         ).order_by(
             PredictionFeedback.created_at
         ).all()
@@ -170,6 +482,9 @@ class DashboardService:
         if not feedbacks:
             return "<p>Aucun feedback utilisateur disponible</p>"
         
+        # Import différé : plotly n'est chargé qu'au premier affichage du dashboard
+        import plotly.graph_objects as go
+        
         # Préparation des données
         timestamps = [f.created_at for f in feedbacks]
         satisfaction = [f.user_feedback for f in feedbacks]
@@ -244,19 +559,36 @@ class DashboardService:
             )
         )
                 
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return fig.to_html(full_html=False, include_plotlyjs='cdn', div_id='chart-satisfaction')
     
     @staticmethod
-    def get_dashboard_data(db: Session) -> Dict:
+    def get_dashboard_data(db: Session, time_range: str = None, mode: str = 'buckets', pending_sketch=None) -> Dict:
         """
         Récupère toutes les données nécessaires au dashboard
         
+        Args:
+            time_range: Période des graphiques, de la décomposition par étape et des
+                centiles de la période (les autres KPI portent sur tout l'historique)
+            mode: Mode de la courbe des temps d'inférence ('buckets' ou 'raw')
+            pending_sketch: Sketch de latence du processus pas encore écrit en base
+        
         Returns:
             Dict contenant KPIs et graphiques HTML
         """
+        time_range, _ = resolve_range(time_range, DASHBOARD_CONFIG["default_range"])
+        start, end, _ = DashboardService.get_time_window(db, time_range)
+        # Agrégats lus une seule fois pour les KPI de latence et de satisfaction
+        totals = RollupService.get_totals(db)
         return {
-            'kpi_inference': DashboardService.get_kpi_inference_time(db),
-            'kpi_satisfaction': DashboardService.get_kpi_user_satisfaction(db),
-            'chart_inference': DashboardService.generate_inference_time_chart(db),
-            'chart_satisfaction': DashboardService.generate_satisfaction_scatter(db)
-        }
\ No newline at end of file
+            'kpi_inference': DashboardService.get_kpi_inference_time(db, totals),
+            'kpi_percentiles': DashboardService.get_kpi_latency_percentiles(db, pending_sketch),
+            'kpi_percentiles_range': DashboardService.get_kpi_latency_percentiles(db, pending_sketch, start, end),
+            'kpi_satisfaction': DashboardService.get_kpi_user_satisfaction(db, totals),
+            'kpi_stages': DashboardService.get_kpi_stage_breakdown(db, start, end),
+            'chart_inference': DashboardService.generate_inference_time_chart(db, time_range, mode),
+            'chart_stages': DashboardService.generate_stage_breakdown_chart(db, time_range),
+            'chart_satisfaction': DashboardService.generate_satisfaction_scatter(db, time_range),
+            'time_range': time_range,
+            'chart_mode': mode,
+            'max_points': DASHBOARD_CONFIG["max_points"]
+        }
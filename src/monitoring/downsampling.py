@@ -0,0 +1,101 @@
+"""
+Réduction du nombre de points des graphiques du dashboard
+
+- Largeur d'intervalle adaptative : choisie dans une échelle de largeurs
+  « rondes » (1 min, 5 min, 1 h...) pour que la période affichée compte au plus
+  max_buckets intervalles. Les intervalles sont agrégés en SQL (voir
+  DashboardService.get_latency_buckets).
+- LTTB (Largest-Triangle-Three-Buckets, S. Steinarsson) : sélection d'un
+  sous-ensemble de points bruts qui préserve la forme de la courbe (pics
+  compris), pour l'affichage des points individuels.
+"""
+
+from datetime import timedelta
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# Périodes proposées par le dashboard (None : tout l'historique)
+TIME_RANGES = {
+    '1h': timedelta(hours=1),
+    '24h': timedelta(days=1),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    'all': None,
+}
+
+# Largeurs d'intervalle possibles (secondes)
+BUCKET_WIDTHS_S = (
+    10, 30, 60, 5 * 60, 15 * 60, 30 * 60, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400
+)
+
+
+def choose_bucket_width(span: timedelta, max_buckets: int = 240) -> int:
+    """
+    Plus petite largeur d'intervalle donnant au plus max_buckets intervalles sur la période
+
+    Args:
+        span: Durée de la période affichée
+        max_buckets: Nombre maximal d'intervalles (points du graphique)
+
+    Returns:
+        Largeur d'intervalle en secondes
+    """
+    seconds = max(span.total_seconds(), 1)
+    for width in BUCKET_WIDTHS_S:
+        if seconds / width <= max_buckets:
+            return width
+    # Période très longue : largeur multiple d'une semaine
+    return int(np.ceil(seconds / max_buckets / BUCKET_WIDTHS_S[-1])) * BUCKET_WIDTHS_S[-1]
+
+
+def lttb(x: Sequence[float], y: Sequence[float], threshold: int) -> np.ndarray:
+    """
+    Sous-échantillonnage Largest-Triangle-Three-Buckets
+
+    Le premier et le dernier point sont conservés ; les points intermédiaires
+    sont répartis en threshold - 2 groupes, et dans chaque groupe le point
+    formant le plus grand triangle avec le point retenu précédemment et la
+    moyenne du groupe suivant est conservé.
+
+    Args:
+        x: Abscisses croissantes (ex : timestamps en secondes)
+        y: Ordonnées
+        threshold: Nombre de points à conserver
+
+    Returns:
+        Indices des points conservés (croissants)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bornes des groupes intermédiaires (le premier et le dernier point sont à part)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Moyenne du groupe suivant (dernier point pour le dernier groupe)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Aire (au facteur 1/2 près) des triangles (point précédent, candidat, moyenne suivante)
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def resolve_range(time_range: Optional[str], default: str = '24h') -> Tuple[str, Optional[timedelta]]:
+    """Période demandée et sa durée (valeur absente ou inconnue : période par défaut)"""
+    if time_range not in TIME_RANGES:
+        time_range = default if default in TIME_RANGES else '24h'
+    return time_range, TIME_RANGES[time_range]
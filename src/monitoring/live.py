@@ -0,0 +1,132 @@
+"""
+Diffusion en direct du monitoring (Server-Sent Events)
+
+Au lieu de recharger le dashboard complet, la page /monitoring s'abonne à
+/monitoring/stream et ne reçoit que les deltas :
+
+- event: points : nouvelles prédictions (horodatage, temps d'inférence),
+  regroupées toutes les flush_interval_s secondes
+- event: kpi : KPI mis à jour toutes les kpi_interval_s secondes, calculés
+  une seule fois pour tous les abonnés
+- commentaire keep-alive : maintient la connexion ouverte à travers les proxies
+
+Chaque abonné dispose d'une file bornée : un client trop lent est déconnecté
+(EventSource se reconnecte automatiquement) plutôt que de retenir de la mémoire.
+Les prédictions diffusées sont celles servies par ce processus API.
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+
+def format_event(event: str, data) -> str:
+    """Message SSE (une ligne data JSON)"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+class LiveBroadcaster:
+    """Diffusion des nouvelles prédictions et des KPI aux abonnés SSE"""
+
+    def __init__(
+        self,
+        kpi_loader: Optional[Callable[[], Awaitable[Dict]]] = None,
+        flush_interval_s: float = 1.0,
+        kpi_interval_s: float = 5.0,
+        keepalive_s: float = 15.0,
+        max_queue: int = 100,
+        max_points: int = 1000,
+    ):
+        """
+        Args:
+            kpi_loader: Coroutine retournant les KPI courants (None : pas d'événement kpi)
+            flush_interval_s: Période d'envoi des nouvelles prédictions
+            kpi_interval_s: Période de recalcul et d'envoi des KPI
+            keepalive_s: Délai sans message après lequel un keep-alive est envoyé
+            max_queue: Messages en attente par abonné avant déconnexion
+            max_points: Prédictions conservées entre deux envois (les plus anciennes sont abandonnées)
+        """
+        self.kpi_loader = kpi_loader
+        self.flush_interval_s = flush_interval_s
+        self.kpi_interval_s = kpi_interval_s
+        self.keepalive_s = keepalive_s
+        self.max_queue = max_queue
+        self._points: deque = deque(maxlen=max_points)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.dropped_subscribers = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish_point(self, point: Dict):
+        """Nouvelle prédiction (à appeler depuis la boucle asyncio), ignorée sans abonné"""
+        if self._subscribers:
+            self._points.append(point)
+
+    def _broadcast(self, message: str):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client trop lent : déconnecté (message de fin placé à la place du plus ancien)
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+                self.dropped_subscribers += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_kpi = loop.time()
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            if not self._subscribers:
+                continue
+            if self._points:
+                points = list(self._points)
+                self._points.clear()
+                self._broadcast(format_event("points", points))
+            if self.kpi_loader is not None and loop.time() >= next_kpi:
+                next_kpi = loop.time() + self.kpi_interval_s
+                try:
+                    self._broadcast(format_event("kpi", await self.kpi_loader()))
+                except Exception as e:
+                    print(f"⚠️  KPI du flux de monitoring indisponibles: {e}")
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Flux SSE d'un abonné (désabonné à la déconnexion du client)"""
+        queue: asyncio.Queue = asyncio.Queue(self.max_queue)
+        self._subscribers.add(queue)
+        try:
+            yield f"retry: {int(self.keepalive_s * 1000)}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.keepalive_s)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+
+    def start(self):
+        """Démarrage de la tâche de diffusion (depuis la boucle asyncio)"""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        # Fin des flux ouverts, puis arrêt de la tâche de diffusion
+        for queue in list(self._subscribers):
+            self._subscribers.discard(queue)
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,113 @@
+"""
+Métriques applicatives au format Prometheus (prometheus_client)
+
+Registre de métriques du processus de l'API, exposé par l'endpoint /metrics.
+
+- Counter : compteur croissant (requêtes, erreurs...)
+- Gauge : valeur instantanée (profondeur de file, connexions...)
+- Histogram : distribution par buckets cumulés (latences, tailles de batch...)
+- Métriques calculées (register_callback) : fonction appelée au moment de la
+  collecte (scrape), sans aucun coût par requête
+
+Le reste de l'application enregistre ses propres métriques sur REGISTRY :
+
+    from prometheus_client import Counter
+    from src.monitoring.metrics import REGISTRY
+    ERRORS = Counter("cats_dogs_errors_total", "Erreurs", ["kind"], registry=REGISTRY)
+    ERRORS.labels("decode").inc()
+"""
+
+from typing import Callable, Iterable
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Buckets par défaut (secondes) : de 0.5 ms à 10 s
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+METRIC_FAMILIES = {"gauge": GaugeMetricFamily, "counter": CounterMetricFamily}
+
+
+class CallbackCollector(Collector):
+    """Métrique dont la valeur est calculée à la collecte"""
+
+    def __init__(self, name: str, documentation: str, fn: Callable, type_name: str = "gauge",
+                 labelnames: Iterable[str] = ()):
+        if type_name not in METRIC_FAMILIES:
+            raise ValueError(f"Type de métrique non supporté: {type_name}")
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.type_name = type_name
+        self.labelnames = tuple(labelnames)
+
+    def describe(self):
+        # Famille sans échantillon : noms vérifiés à l'enregistrement sans appeler fn
+        return [METRIC_FAMILIES[self.type_name](self.name, self.documentation, labels=self.labelnames)]
+
+    def collect(self):
+        try:
+            values = self.fn()
+        except Exception:
+            return  # Source indisponible (ex : base non initialisée) : métrique omise
+        if values is None:
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        family = METRIC_FAMILIES[self.type_name](self.name, self.documentation, labels=self.labelnames)
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            family.add_metric([str(k) for k in key], value)
+        yield family
+
+
+def register_callback(name: str, documentation: str, fn: Callable, type_name: str = "gauge",
+                      labelnames: Iterable[str] = (), registry: CollectorRegistry = None) -> CallbackCollector:
+    """
+    Enregistre une métrique calculée à chaque collecte
+
+    Args:
+        fn: Fonction retournant une valeur, ou un dict {valeurs des labels: valeur}
+        type_name: "gauge" ou "counter"
+        registry: Registre cible (défaut : REGISTRY)
+    """
+    collector = CallbackCollector(name, documentation, fn, type_name, labelnames)
+    (registry or REGISTRY).register(collector)
+    return collector
+
+
+def render(registry: CollectorRegistry = None) -> bytes:
+    """Exposition de toutes les métriques au format texte Prometheus"""
+    return generate_latest(registry or REGISTRY)
+
+
+# Registre de l'application (distinct du registre global de prometheus_client)
+REGISTRY = CollectorRegistry()
+
+# === Métriques HTTP (middleware) ===
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Nombre de requêtes HTTP par route", ["method", "route", "status"], registry=REGISTRY
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Durée de traitement des requêtes HTTP par route", ["method", "route"],
+    buckets=DEFAULT_LATENCY_BUCKETS, registry=REGISTRY
+)
+
+# === Métriques d'inférence ===
+PREDICTION_LATENCY = Histogram(
+    "prediction_duration_seconds", "Durée totale d'une prédiction (lecture à réponse)", ["cache_hit"],
+    buckets=DEFAULT_LATENCY_BUCKETS, registry=REGISTRY
+)
+STAGE_LATENCY = Histogram(
+    "prediction_stage_duration_seconds", "Durée de chaque étape d'une prédiction (read, decode, resize, queue_wait, model, db_write)", ["stage"],
+    buckets=DEFAULT_LATENCY_BUCKETS, registry=REGISTRY
+)
+MODEL_BATCH_SIZE = Histogram(
+    "model_batch_size", "Nombre d'images par appel au modèle", buckets=(1, 2, 4, 8, 16, 32, 64, 128), registry=REGISTRY
+)
+PREDICTIONS = Counter(
+    "predictions_total", "Nombre de prédictions par résultat", ["result"], registry=REGISTRY
+)
@@ -0,0 +1,331 @@
+"""
+Agrégats incrémentaux (rollups) des prédictions pour les KPI de monitoring
+
+Au lieu de parcourir toute la table predictions_feedback à chaque affichage,
+les KPI sont calculés à partir de :
+- predictions_rollup : compteurs, sommes, min/max et histogramme de latence
+  par heure (et par minute, pour les graphiques)
+- la « queue » : prédictions pas encore agrégées (rolled_up = false), peu
+  nombreuses et retrouvées par un index partiel, agrégées par la base (COUNT,
+  SUM, CASE) sans transiter ligne à ligne par Python
+
+Le job de compaction (compact) agrège la queue par lots puis marque les lignes
+comme agrégées dans la même transaction. Le marquage par ligne (et non un
+filigrane sur l'id) reste correct lorsque des lignes arrivent dans le désordre
+(blocs d'identifiants pré-réservés, rejeu du spool).
+
+Un feedback modifié après agrégation est répercuté sur l'agrégat de sa ligne
+(apply_feedback_change).
+"""
+
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import and_, case, func, select, text, update
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import PredictionFeedback, PredictionRollup
+
+# Bornes supérieures (ms) de l'histogramme de latence, dernier bucket : au-delà de 5 s
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+GRANULARITIES = {
+    'minute': lambda ts: ts.replace(second=0, microsecond=0),
+    'hour': lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+}
+
+# Clé du verrou consultatif PostgreSQL : une seule compaction à la fois (plusieurs processus API)
+COMPACTION_LOCK_KEY = 0x70726564  # "pred"
+
+
+def _empty_aggregate() -> Dict:
+    return {
+        'total_count': 0,
+        'success_count': 0,
+        'rgpd_consent_count': 0,
+        'cache_hit_count': 0,
+        'feedback_count': 0,
+        'feedback_positive_count': 0,
+        'latency_sum_ms': 0.0,
+        'latency_min_ms': None,
+        'latency_max_ms': None,
+        'latency_histogram': [0] * (len(LATENCY_BOUNDS_MS) + 1),
+    }
+
+
+def _add_row(aggregate: Dict, row):
+    """Ajoute une prédiction à un agrégat"""
+    aggregate['total_count'] += 1
+    aggregate['rgpd_consent_count'] += int(bool(row.rgpd_consent))
+    aggregate['cache_hit_count'] += int(bool(row.cache_hit))
+    if row.rgpd_consent and row.user_feedback is not None:
+        aggregate['feedback_count'] += 1
+        aggregate['feedback_positive_count'] += int(row.user_feedback == 1)
+    if row.success:
+        latency = float(row.inference_time_ms)
+        aggregate['success_count'] += 1
+        aggregate['latency_sum_ms'] += latency
+        aggregate['latency_min_ms'] = latency if aggregate['latency_min_ms'] is None else min(aggregate['latency_min_ms'], latency)
+        aggregate['latency_max_ms'] = latency if aggregate['latency_max_ms'] is None else max(aggregate['latency_max_ms'], latency)
+        aggregate['latency_histogram'][bisect_left(LATENCY_BOUNDS_MS, latency)] += 1
+
+
+def _merge(target: Dict, source: Dict):
+    """Fusionne deux agrégats (compteurs et histogrammes additionnés, min/max combinés)"""
+    for key in ('total_count', 'success_count', 'rgpd_consent_count', 'cache_hit_count',
+                'feedback_count', 'feedback_positive_count', 'latency_sum_ms'):
+        target[key] = (target[key] or 0) + (source[key] or 0)
+    for key, pick in (('latency_min_ms', min), ('latency_max_ms', max)):
+        values = [v for v in (target[key], source[key]) if v is not None]
+        target[key] = pick(values) if values else None
+    target['latency_histogram'] = [a + b for a, b in zip(target['latency_histogram'], source['latency_histogram'])]
+
+
+def _rollup_to_dict(rollup: PredictionRollup) -> Dict:
+    aggregate = {key: getattr(rollup, key) for key in _empty_aggregate()}
+    aggregate['latency_histogram'] = list(rollup.latency_histogram)
+    return aggregate
+
+
+class RollupService:
+    """Compaction des prédictions en agrégats et lecture des totaux"""
+
+    @staticmethod
+    def compact(db: Session, batch_size: int = 50000) -> int:
+        """
+        Agrège un lot de prédictions non agrégées (une transaction)
+
+        Args:
+            db: Session SQLAlchemy (synchrone)
+            batch_size: Nombre maximal de prédictions traitées
+
+        Returns:
+            Nombre de prédictions agrégées (0 : rien à faire ou compaction déjà en cours ailleurs)
+        """
+        is_postgres = db.get_bind().dialect.name == "postgresql"
+        if is_postgres:
+            acquired = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": COMPACTION_LOCK_KEY}).scalar()
+            if not acquired:
+                return 0
+
+        query = select(
+            PredictionFeedback.id,
+            PredictionFeedback.created_at,
+            PredictionFeedback.success,
+            PredictionFeedback.rgpd_consent,
+            PredictionFeedback.cache_hit,
+            PredictionFeedback.inference_time_ms,
+            PredictionFeedback.user_feedback
+        ).where(
+            PredictionFeedback.rolled_up == False
+        ).order_by(PredictionFeedback.id).limit(batch_size)
+        if is_postgres:
+            # Lignes verrouillées : une mise à jour de feedback concurrente attend la fin de la compaction
+            query = query.with_for_update(skip_locked=True)
+        rows = db.execute(query).all()
+        if not rows:
+            db.commit()
+            return 0
+
+        # Agrégation par (granularité, début d'intervalle)
+        aggregates: Dict[tuple, Dict] = {}
+        for row in rows:
+            created_at = row.created_at or datetime.now()
+            for granularity, truncate in GRANULARITIES.items():
+                key = (granularity, truncate(created_at))
+                _add_row(aggregates.setdefault(key, _empty_aggregate()), row)
+
+        # Fusion avec les agrégats existants
+        for (granularity, bucket_start), aggregate in aggregates.items():
+            rollup = db.execute(
+                select(PredictionRollup).where(
+                    PredictionRollup.granularity == granularity,
+                    PredictionRollup.bucket_start == bucket_start
+                ).with_for_update()
+            ).scalar_one_or_none()
+            if rollup is None:
+                db.add(PredictionRollup(granularity=granularity, bucket_start=bucket_start, **aggregate))
+                continue
+            merged = _rollup_to_dict(rollup)
+            _merge(merged, aggregate)
+            for key, value in merged.items():
+                setattr(rollup, key, value)
+
+        ids = [row.id for row in rows]
+        for i in range(0, len(ids), 1000):
+            db.execute(
+                update(PredictionFeedback)
+                .where(PredictionFeedback.id.in_(ids[i:i + 1000]))
+                .values(rolled_up=True)
+            )
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def compact_all(db: Session, batch_size: int = 50000) -> int:
+        """Agrège toute la queue, lot par lot"""
+        total = 0
+        while True:
+            compacted = RollupService.compact(db, batch_size)
+            total += compacted
+            if compacted < batch_size:
+                return total
+
+    @staticmethod
+    def apply_feedback_change(db: Session, record: PredictionFeedback, old_feedback: Optional[int]):
+        """
+        Répercute la modification du feedback d'une prédiction déjà agrégée
+
+        À appeler avant le commit de la modification, la ligne étant verrouillée
+        (SELECT ... FOR UPDATE) pour exclure une compaction concurrente.
+        """
+        if not record.rolled_up or not record.rgpd_consent or old_feedback == record.user_feedback:
+            return
+        feedback_delta = int(record.user_feedback is not None) - int(old_feedback is not None)
+        positive_delta = int(record.user_feedback == 1) - int(old_feedback == 1)
+
+        for granularity, truncate in GRANULARITIES.items():
+            db.execute(
+                update(PredictionRollup)
+                .where(
+                    PredictionRollup.granularity == granularity,
+                    PredictionRollup.bucket_start == truncate(record.created_at)
+                )
+                .values(
+                    feedback_count=PredictionRollup.feedback_count + feedback_delta,
+                    feedback_positive_count=PredictionRollup.feedback_positive_count + positive_delta
+                )
+            )
+
+    @staticmethod
+    def _hour_histogram(db: Session) -> list:
+        """Somme des histogrammes de latence des agrégats horaires (une requête, élément par élément)"""
+        if db.get_bind().dialect.name == "postgresql":
+            query = text(
+                "SELECT h.ordinal - 1, SUM(h.value::bigint) FROM predictions_rollup, "
+                "json_array_elements_text(latency_histogram) WITH ORDINALITY AS h(value, ordinal) "
+                "WHERE granularity = 'hour' GROUP BY h.ordinal"
+            )
+        else:
+            # Autres bases (SQLite des tests) : json_each
+            query = text(
+                "SELECT CAST(h.key AS INTEGER), SUM(h.value) FROM predictions_rollup, "
+                "json_each(predictions_rollup.latency_histogram) AS h "
+                "WHERE granularity = 'hour' GROUP BY h.key"
+            )
+        histogram = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        for index, count in db.execute(query):
+            histogram[int(index)] = int(count)
+        return histogram
+
+    @staticmethod
+    def _tail_totals(db: Session) -> Dict:
+        """Agrégat des prédictions pas encore agrégées, calculé en SQL (deux requêtes)"""
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        success = PredictionFeedback.success == True
+        latency = case((success, PredictionFeedback.inference_time_ms))
+        with_feedback = and_(PredictionFeedback.rgpd_consent == True, PredictionFeedback.user_feedback.isnot(None))
+        not_rolled_up = PredictionFeedback.rolled_up == False
+        row = db.execute(select(
+            func.count(),
+            count_if(success),
+            count_if(PredictionFeedback.rgpd_consent == True),
+            count_if(PredictionFeedback.cache_hit == True),
+            count_if(with_feedback),
+            count_if(and_(with_feedback, PredictionFeedback.user_feedback == 1)),
+            func.coalesce(func.sum(latency), 0.0),
+            func.min(latency),
+            func.max(latency),
+        ).where(not_rolled_up)).one()
+        tail = dict(zip(list(_empty_aggregate())[:-1], row))
+
+        # Histogramme : indice du bucket (comme bisect_left sur LATENCY_BOUNDS_MS) groupé en SQL
+        bucket = case(
+            *[(PredictionFeedback.inference_time_ms <= bound, index) for index, bound in enumerate(LATENCY_BOUNDS_MS)],
+            else_=len(LATENCY_BOUNDS_MS)
+        ).label('bucket')
+        tail['latency_histogram'] = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        for index, count in db.execute(select(bucket, func.count()).where(not_rolled_up, success).group_by(bucket)):
+            tail['latency_histogram'][int(index)] = int(count)
+        return tail
+
+    @staticmethod
+    def get_totals(db: Session) -> Dict:
+        """
+        Totaux sur toutes les prédictions : agrégats horaires + queue non agrégée
+
+        Tout est agrégé par la base (quatre requêtes), y compris lorsque la queue
+        est longue (première compaction après la migration, compaction en retard).
+
+        Returns:
+            Dict des compteurs, somme/min/max et histogramme de latence
+        """
+        columns = (
+            func.sum(PredictionRollup.total_count),
+            func.sum(PredictionRollup.success_count),
+            func.sum(PredictionRollup.rgpd_consent_count),
+            func.sum(PredictionRollup.cache_hit_count),
+            func.sum(PredictionRollup.feedback_count),
+            func.sum(PredictionRollup.feedback_positive_count),
+            func.sum(PredictionRollup.latency_sum_ms),
+            func.min(PredictionRollup.latency_min_ms),
+            func.max(PredictionRollup.latency_max_ms),
+        )
+        keys = list(_empty_aggregate())[:-1]
+        totals = dict(zip(keys, db.execute(select(*columns).where(PredictionRollup.granularity == 'hour')).one()))
+        totals['latency_histogram'] = RollupService._hour_histogram(db)
+
+        _merge(totals, RollupService._tail_totals(db))
+        return totals
+
+class RollupCompactor:
+    """Thread de compaction périodique des agrégats"""
+
+    def __init__(self, session_factory: Callable, interval_s: float = 60.0, batch_size: int = 50000):
+        """
+        Args:
+            session_factory: Fabrique de sessions SQLAlchemy (SessionLocal)
+            interval_s: Période de compaction
+            batch_size: Nombre de prédictions agrégées par transaction
+        """
+        self.session_factory = session_factory
+        self.interval_s = interval_s
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.compacted = 0
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> int:
+        db = self.session_factory()
+        try:
+            compacted = RollupService.compact_all(db, self.batch_size)
+            self.compacted += compacted
+            return compacted
+        except Exception as e:
+            db.rollback()
+            self.last_error = str(e)
+            print(f"❌ Échec de la compaction des agrégats: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def start(self):
+        def run():
+            while not self._stop.wait(self.interval_s):
+                self.run_once()
+
+        self._thread = threading.Thread(target=run, name="rollup-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,313 @@
+"""
+Centiles de latence en temps constant : sketch de quantiles fusionnable (DDSketch)
+
+Un DDSketch range chaque valeur x > 0 dans le bucket ceil(log_gamma(x)), avec
+gamma = (1 + alpha) / (1 - alpha) : tout quantile est restitué avec une erreur
+relative d'au plus alpha (1 % par défaut), quel que soit le nombre de valeurs.
+Deux sketches de même alpha se fusionnent en additionnant leurs buckets, sans
+perte : un sketch par processus API et par fenêtre de temps suffit.
+
+- LatencySketchRecorder : sketches en mémoire (fenêtre horaire courante) du
+  processus, fusionnés périodiquement dans la table latency_sketches
+- SketchStore : lecture et fusion des sketches persistés. La ligne 'total'
+  (tout l'historique) est mise à jour à chaque fusion : p50/p90/p99 sont lus
+  en une requête, quelle que soit la taille de predictions_feedback. Les
+  centiles d'une période fusionnent ses lignes horaires (au plus 24 par jour).
+
+Stockage compact : indice du premier bucket + liste dense des compteurs
+(quelques centaines d'entiers pour des latences de 0.1 ms à 1 min).
+"""
+
+import math
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import LatencySketch
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+# Fenêtre 'total' : tout l'historique (début de fenêtre conventionnel)
+TOTAL_WINDOW = datetime(1970, 1, 1)
+
+
+class DDSketch:
+    """Sketch de quantiles à erreur relative bornée (valeurs positives)"""
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-3):
+        """
+        Args:
+            relative_accuracy: Erreur relative maximale des quantiles (alpha)
+            min_value: Valeurs inférieures comptées dans le bucket zéro (ex : 1 µs pour des ms)
+        """
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, count: int = 1):
+        """Ajoute une valeur (count fois)"""
+        if value <= self.min_value:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "DDSketch"):
+        """Fusionne un autre sketch (même précision) dans celui-ci"""
+        if other.gamma != self.gamma:
+            raise ValueError("Fusion de sketches de précisions différentes")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valeur du quantile q (0 à 1), None si le sketch est vide"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Milieu (au sens de l'erreur relative) du bucket ]gamma^(k-1), gamma^k]
+                value = 2 * self.gamma ** key / (1 + self.gamma)
+                return min(value, self.max)
+        return self.max
+
+    def quantiles(self, qs: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Optional[float]]:
+        """Quantiles nommés ('p50', 'p90', 'p99'...)"""
+        return {f"p{q * 100:g}": self.quantile(q) for q in qs}
+
+    def to_dict(self) -> Dict:
+        """Représentation compacte (JSON) : premier indice + compteurs denses"""
+        offset = min(self.bins) if self.bins else 0
+        counts = [0] * (max(self.bins) - offset + 1) if self.bins else []
+        for key, count in self.bins.items():
+            counts[key - offset] = count
+        return {
+            "alpha": self.relative_accuracy,
+            "min_value": self.min_value,
+            "offset": offset,
+            "counts": counts,
+            "zero": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DDSketch":
+        sketch = cls(data["alpha"], data["min_value"])
+        sketch.bins = {data["offset"] + i: c for i, c in enumerate(data["counts"]) if c}
+        sketch.zero_count = data["zero"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.max = data["max"]
+        return sketch
+
+
+def _hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class SketchStore:
+    """Lecture et fusion des sketches persistés (table latency_sketches)"""
+
+    @staticmethod
+    def merge_into(db: Session, granularity: str, window_start: datetime, sketch: DDSketch):
+        """Fusionne un sketch dans la ligne (granularité, fenêtre), créée si besoin (sans commit)"""
+        row = db.execute(
+            select(LatencySketch).where(
+                LatencySketch.granularity == granularity,
+                LatencySketch.window_start == window_start
+            ).with_for_update()
+        ).scalar_one_or_none()
+        if row is None:
+            db.add(LatencySketch(granularity=granularity, window_start=window_start,
+                                 count=sketch.count, sketch=sketch.to_dict()))
+            return
+        merged = DDSketch.from_dict(row.sketch)
+        merged.merge(sketch)
+        row.count = merged.count
+        row.sketch = merged.to_dict()
+
+    @staticmethod
+    def load_total(db: Session) -> Optional[DDSketch]:
+        """Sketch de tout l'historique (None si aucun)"""
+        data = db.execute(
+            select(LatencySketch.sketch).where(
+                LatencySketch.granularity == 'total',
+                LatencySketch.window_start == TOTAL_WINDOW
+            )
+        ).scalar_one_or_none()
+        return DDSketch.from_dict(data) if data else None
+
+    @staticmethod
+    def percentiles(db: Session, pending: DDSketch = None, qs: Iterable[float] = DEFAULT_QUANTILES,
+                    start: datetime = None, end: datetime = None) -> Dict:
+        """
+        Centiles de latence sur tout l'historique (une requête) ou sur une période
+
+        Args:
+            pending: Sketch du processus pas encore écrit en base (LatencySketchRecorder.pending),
+                compté dans toute période : il ne couvre que les dernières secondes
+            start: Début de la période (None : tout l'historique), arrondi à l'heure
+            end: Fin de la période
+
+        Returns:
+            Dict {'p50_ms': ..., 'p90_ms': ..., 'p99_ms': ..., 'count': ...} (centiles None si aucune donnée)
+        """
+        if start is not None:
+            sketch = SketchStore.load_range(db, start, end or datetime.now())
+        else:
+            sketch = SketchStore.load_total(db)
+        if pending is not None and pending.count:
+            if sketch is None:
+                sketch = pending
+            else:
+                sketch.merge(pending)
+        if sketch is None:
+            sketch = DDSketch()
+        quantiles = {f"{name}_ms": round(value, 3) if value is not None else None
+                     for name, value in sketch.quantiles(qs).items()}
+        return {**quantiles, 'count': sketch.count}
+
+    @staticmethod
+    def load_range(db: Session, start: datetime, end: datetime) -> Optional[DDSketch]:
+        """Fusion des sketches horaires d'une période (au plus une ligne par heure)"""
+        merged = None
+        for (data,) in db.execute(
+            select(LatencySketch.sketch).where(
+                LatencySketch.granularity == 'hour',
+                LatencySketch.window_start >= _hour(start),
+                LatencySketch.window_start <= end
+            )
+        ):
+            sketch = DDSketch.from_dict(data)
+            if merged is None:
+                merged = sketch
+            else:
+                merged.merge(sketch)
+        return merged
+
+
+class LatencySketchRecorder:
+    """Sketches de latence du processus, fusionnés périodiquement en base"""
+
+    def __init__(self, session_factory: Callable, flush_interval_s: float = 10.0,
+                 relative_accuracy: float = 0.01):
+        """
+        Args:
+            session_factory: Fabrique de sessions SQLAlchemy (SessionLocal)
+            flush_interval_s: Période de fusion en base
+            relative_accuracy: Erreur relative des centiles
+        """
+        self.session_factory = session_factory
+        self.flush_interval_s = flush_interval_s
+        self.relative_accuracy = relative_accuracy
+        self._pending: Dict[datetime, DDSketch] = {}  # Fenêtre horaire -> sketch non encore fusionné
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.last_error: Optional[str] = None
+
+    def observe(self, latency_ms: float, timestamp: datetime = None):
+        """Ajoute une latence (ms) à la fenêtre horaire courante"""
+        window = _hour(timestamp or datetime.now())
+        with self._lock:
+            sketch = self._pending.get(window)
+            if sketch is None:
+                sketch = self._pending[window] = DDSketch(self.relative_accuracy)
+            sketch.add(latency_ms)
+
+    def pending(self) -> DDSketch:
+        """Copie fusionnée des sketches pas encore écrits en base"""
+        merged = DDSketch(self.relative_accuracy)
+        with self._lock:
+            for sketch in self._pending.values():
+                merged.merge(sketch)
+        return merged
+
+    def flush(self) -> bool:
+        """Fusionne les sketches en attente dans les fenêtres horaires et le total (une transaction)"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return True
+
+            total = DDSketch(self.relative_accuracy)
+            for sketch in pending.values():
+                total.merge(sketch)
+
+            for attempt in range(2):
+                db = self.session_factory()
+                try:
+                    for window, sketch in sorted(pending.items()):
+                        SketchStore.merge_into(db, 'hour', window, sketch)
+                    SketchStore.merge_into(db, 'total', TOTAL_WINDOW, total)
+                    db.commit()
+                    self.flushes += 1
+                    return True
+                except IntegrityError:
+                    # Ligne créée au même moment par un autre processus : nouvel essai en fusion
+                    db.rollback()
+                except Exception as e:
+                    db.rollback()
+                    self.last_error = str(e)
+                    break
+                finally:
+                    db.close()
+
+            # Échec : les sketches sont remis en attente (fusionnés avec les nouvelles observations)
+            with self._lock:
+                for window, sketch in pending.items():
+                    if window in self._pending:
+                        sketch.merge(self._pending[window])
+                    self._pending[window] = sketch
+            return False
+
+    def start(self):
+        def run():
+            while not self._stop.wait(self.flush_interval_s):
+                self.flush()
+
+        self._thread = threading.Thread(target=run, name="latency-sketch-flusher", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Arrêt du thread et écriture des sketches restants"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_s + 5)
+        if not self.flush():
+            print(f"⚠️  Sketches de latence non écrits à l'arrêt: {self.last_error}")
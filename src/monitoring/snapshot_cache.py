@@ -0,0 +1,166 @@
+"""
+Cache des instantanés (snapshots) du dashboard de monitoring
+
+Construire le dashboard (requêtes SQL + rendu Plotly des graphiques) coûte
+du CPU au processus qui sert aussi les prédictions. Les données et fragments
+HTML des graphiques sont donc mis en cache par (période, mode) :
+
+- Frais (âge < ttl_s) : servis directement
+- Périmés (âge < max_stale_s) : servis immédiatement, un rafraîchissement est
+  lancé en arrière-plan (stale-while-revalidate)
+- Absents ou trop anciens : construits pendant la requête
+- Un seul rafraîchissement à la fois par clé, partagé par tous les lecteurs
+- Les instantanés consultés récemment sont rafraîchis par une tâche de fond :
+  les lecteurs trouvent en général un instantané frais
+
+Chaque instantané porte un ETag (hash de son contenu) : un navigateur qui
+renvoie If-None-Match reçoit un 304 tant que les données n'ont pas changé.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+class Snapshot:
+    """Données du dashboard à un instant donné"""
+
+    def __init__(self, data: Dict, etag: str, created_at: float):
+        self.data = data
+        self.etag = etag
+        self.created_at = created_at  # time.monotonic()
+
+    @property
+    def age_s(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+def compute_etag(data: Dict) -> str:
+    """ETag (faible) du contenu d'un instantané"""
+    payload = json.dumps(data, sort_keys=True, default=str).encode()
+    return f'W/"{hashlib.sha1(payload).hexdigest()}"'
+
+
+class DashboardSnapshotCache:
+    """Instantanés du dashboard avec rafraîchissement partagé et en arrière-plan"""
+
+    def __init__(
+        self,
+        loader: Callable[..., Awaitable[Dict]],
+        ttl_s: float = 10.0,
+        max_stale_s: float = 300.0,
+        idle_s: float = 120.0,
+    ):
+        """
+        Args:
+            loader: Coroutine (*clé) -> données du dashboard
+            ttl_s: Durée pendant laquelle un instantané est frais
+            max_stale_s: Âge au-delà duquel un instantané périmé n'est plus servi
+            idle_s: Une clé non consultée depuis idle_s n'est plus rafraîchie en arrière-plan
+        """
+        self.loader = loader
+        self.ttl_s = ttl_s
+        self.max_stale_s = max_stale_s
+        self.idle_s = idle_s
+        self._snapshots: Dict[Tuple, Snapshot] = {}
+        self._last_access: Dict[Tuple, float] = {}
+        self._refreshing: Dict[Tuple, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Compteurs (exposés par /metrics)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_ms: Optional[float] = None
+
+    async def _load(self, key: Tuple) -> Snapshot:
+        start = time.perf_counter()
+        try:
+            data = await self.loader(*key)
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        snapshot = Snapshot(data=data, etag=compute_etag(data), created_at=time.monotonic())
+        self._snapshots[key] = snapshot
+        self.refreshes += 1
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        return snapshot
+
+    def _refresh(self, key: Tuple) -> asyncio.Task:
+        """Rafraîchissement de la clé (tâche partagée si déjà en cours)"""
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._load(key))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda t: self._refreshing.pop(key, None))
+            # Échec d'un rafraîchissement de fond : l'instantané périmé reste servi
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def get(self, *key) -> Snapshot:
+        """
+        Instantané de la clé (période, mode...)
+
+        Raises:
+            Exception: Erreur du loader si aucun instantané servable n'existe
+        """
+        self._last_access[key] = time.monotonic()
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            if snapshot.age_s < self.ttl_s:
+                self.hits += 1
+                return snapshot
+            if snapshot.age_s < self.max_stale_s:
+                self.stale_hits += 1
+                self._refresh(key)
+                return snapshot
+
+        self.misses += 1
+        return await asyncio.shield(self._refresh(key))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ttl_s)
+            now = time.monotonic()
+            for key, last_access in list(self._last_access.items()):
+                if now - last_access > self.idle_s:
+                    # Plus consulté : ni rafraîchi ni conservé
+                    self._last_access.pop(key, None)
+                    self._snapshots.pop(key, None)
+                    continue
+                snapshot = self._snapshots.get(key)
+                if snapshot is None or snapshot.age_s >= self.ttl_s * 0.8:
+                    try:
+                        await self._refresh(key)
+                    except Exception as e:
+                        print(f"⚠️  Rafraîchissement du dashboard impossible: {e}")
+
+    def start(self):
+        """Démarrage de la tâche de rafraîchissement (depuis la boucle asyncio)"""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for task in list(self._refreshing.values()):
+            task.cancel()
+
+    def stats(self) -> Dict:
+        """Compteurs du cache d'instantanés"""
+        return {
+            "snapshots": len(self._snapshots),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "last_refresh_ms": self.last_refresh_ms,
+        }
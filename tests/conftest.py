@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Fixtures pytest partagées : base SQLite en mémoire pour les tests de la couche base de données"""
+
+import pytest
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+@pytest.fixture
+def empty_engine():
+    """Base SQLite en mémoire partagée entre les threads, sans table"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def engine(empty_engine):
+    """Base SQLite en mémoire avec le schéma de l'application"""
+    # Import à l'utilisation : src.database lit la configuration de connexion (variables DB_*)
+    # dont les tests sans base n'ont pas besoin
+    from src.database.models import Base
+    Base.metadata.create_all(empty_engine)
+    return empty_engine
+
+@pytest.fixture
+def session_factory(engine):
+    """Fabrique de sessions sur la base en mémoire"""
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def db(session_factory):
+    """Session sur la base en mémoire"""
+    session = session_factory()
+    yield session
+    session.close()
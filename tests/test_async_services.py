@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests pytest des services de base de données asynchrones"""
+
+import asyncio
+import pytest
+import sys
+from datetime import datetime
+from pathlib import Path
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import Base
+from src.database.feedback_service import AsyncFeedbackService
+
+def run_with_session(scenario):
+    """Exécute un scénario sur une base SQLite asynchrone en mémoire"""
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            result = await scenario(db)
+        await engine.dispose()
+        return result
+    return asyncio.run(main())
+
+async def save(db, result="cat", rgpd_consent=True, success=True):
+    return await AsyncFeedbackService.save_prediction_feedback(
+        db, inference_time_ms=10.5, success=success, prediction_result=result,
+        proba_cat=60.0, proba_dog=40.0, rgpd_consent=rgpd_consent,
+        timings={"model_ms": 4.0}
+    )
+
+class TestAsyncServices:
+    """Tests de la variante asynchrone de FeedbackService"""
+
+    def test_save_and_statistics(self):
+        """Enregistrement et statistiques via la session asynchrone"""
+        async def scenario(db):
+            record = await save(db)
+            await save(db, rgpd_consent=False)
+            await save(db, result="error", success=False)
+            fetched = await AsyncFeedbackService.get_prediction(db, record.id)
+            return fetched, await AsyncFeedbackService.get_statistics(db)
+
+        before = datetime.now()
+        record, stats = run_with_session(scenario)
+
+        assert before <= record.created_at <= datetime.now()  # Horloge de l'API, comme l'écriture différée
+        assert record.model_ms == pytest.approx(4.0)
+        assert record.db_write_ms is None  # Jamais la durée d'une autre écriture
+        assert stats["total_predictions"] == 3
+        assert stats["successful_predictions"] == 2
+        assert stats["rgpd_consents"] == 2
+        assert stats["success_rate"] == pytest.approx(66.67)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
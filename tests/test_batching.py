@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests pytest du micro-batching des inférences"""
+
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.models.batching import MicroBatcher
+
+def fake_batch_fn(calls):
+    """Fonction de batch factice : retourne la moyenne de chaque image et trace la taille des batchs"""
+    def batch_fn(batch):
+        calls.append(len(batch))
+        return [float(image.mean()) for image in batch]
+    return batch_fn
+
+class TestMicroBatcher:
+    """Tests du regroupement des requêtes"""
+
+    def test_concurrent_requests_are_grouped(self):
+        """Des requêtes simultanées partagent un même appel au modèle"""
+        calls = []
+        batcher = MicroBatcher(fake_batch_fn(calls), max_batch_size=8, max_wait_ms=50)
+
+        async def scenario():
+            images = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(5)]
+            results = await asyncio.gather(*(batcher.submit(img) for img in images))
+            await batcher.close()
+            return results
+
+        results = asyncio.run(scenario())
+
+        # Chaque requête récupère son propre résultat, dans le bon ordre
+        assert results == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert calls == [5]
+
+    def test_max_batch_size_is_respected(self):
+        """Un batch ne dépasse jamais la taille maximale"""
+        calls = []
+        batcher = MicroBatcher(fake_batch_fn(calls), max_batch_size=3, max_wait_ms=20)
+
+        async def scenario():
+            images = [np.zeros((1, 4, 4, 3), dtype=np.uint8) for _ in range(7)]
+            await asyncio.gather(*(batcher.submit(img) for img in images))
+            await batcher.close()
+
+        asyncio.run(scenario())
+
+        assert sum(calls) == 7
+        assert max(calls) <= 3
+
+    def test_stage_timings(self):
+        """L'attente avant exécution et la durée du modèle sont mesurées pour chaque requête"""
+        batcher = MicroBatcher(fake_batch_fn([]), max_batch_size=8, max_wait_ms=30)
+
+        async def scenario():
+            timings = [{} for _ in range(2)]
+            images = [np.zeros((4, 4, 3), dtype=np.uint8) for _ in range(2)]
+            await asyncio.gather(*(batcher.submit(img, timings=t) for img, t in zip(images, timings)))
+            await batcher.close()
+            return timings
+
+        timings = asyncio.run(scenario())
+
+        for stage_timings in timings:
+            assert set(stage_timings) == {"queue_wait_ms", "model_ms"}
+            assert stage_timings["queue_wait_ms"] >= 0
+            assert stage_timings["model_ms"] >= 0
+
+    def test_errors_are_propagated(self):
+        """Une erreur du modèle est remontée à toutes les requêtes du batch"""
+        def failing_batch_fn(batch):
+            raise ValueError("Modèle non chargé")
+
+        batcher = MicroBatcher(failing_batch_fn, max_batch_size=4, max_wait_ms=10)
+
+        async def scenario():
+            try:
+                await batcher.submit(np.zeros((4, 4, 3), dtype=np.uint8))
+            finally:
+                await batcher.close()
+
+        with pytest.raises(ValueError):
+            asyncio.run(scenario())
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
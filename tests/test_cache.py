@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Tests pytest du cache de prédictions"""
+
+import asyncio
+import time
+import pytest
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.models.cache import PredictionCache
+
+class TestPredictionCache:
+    """Tests du cache LRU/TTL avec single-flight"""
+
+    def test_key_depends_on_model_version(self):
+        """Une même image donne une clé différente pour chaque version du modèle"""
+        key_v1 = PredictionCache.make_key(b"image", "v1")
+        assert key_v1 == PredictionCache.make_key(b"image", "v1")
+        assert key_v1 != PredictionCache.make_key(b"image", "v2")
+        assert key_v1 != PredictionCache.make_key(b"autre", "v1")
+
+    def test_lru_eviction(self):
+        """L'entrée la moins récemment utilisée est évincée en premier"""
+        cache = PredictionCache(max_entries=2)
+        cache.put("a", {"prediction": "Cat"})
+        cache.put("b", {"prediction": "Dog"})
+        cache.get("a")
+        cache.put("c", {"prediction": "Cat"})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_memory_bound(self):
+        """La mémoire estimée des entrées ne dépasse pas la limite"""
+        cache = PredictionCache(max_entries=1000, max_bytes=2000)
+        for i in range(50):
+            cache.put(str(i), {"prediction": "Cat", "confidence": 0.9})
+
+        stats = cache.stats()
+        assert stats["bytes"] <= 2000
+        assert stats["evictions"] > 0
+
+    def test_ttl_expiration(self):
+        """Une entrée expirée n'est plus servie"""
+        cache = PredictionCache(ttl_s=0.01)
+        cache.put("a", {"prediction": "Cat"})
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        """Des requêtes identiques simultanées ne déclenchent qu'une inférence"""
+        cache = PredictionCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"prediction": "Dog"}
+
+        async def scenario():
+            return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+
+        assert len(calls) == 1
+        assert [hit for _, hit in results].count(False) == 1
+        assert cache.stats()["coalesced"] == 4
+
+        # Requête suivante servie directement par le cache
+        result, hit = asyncio.run(cache.get_or_compute("key", compute))
+        assert hit and result == {"prediction": "Dog"}
+        assert cache.stats()["hits"] == 1
+
+    def test_leader_cancellation_does_not_abort_followers(self):
+        """L'annulation de la requête ayant lancé le calcul n'interrompt pas les requêtes regroupées"""
+        cache = PredictionCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"prediction": "Cat"}
+
+        async def scenario():
+            leader = asyncio.ensure_future(cache.get_or_compute("key", compute))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(cache.get_or_compute("key", compute))
+            await asyncio.sleep(0.005)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        result, hit = asyncio.run(scenario())
+
+        assert result == {"prediction": "Cat"} and hit
+        assert len(calls) == 1
+        assert cache.get("key") == {"prediction": "Cat"}
+
+    def test_failed_computation_is_not_cached(self):
+        """Une erreur d'inférence est propagée à toutes les requêtes et n'est pas mise en cache"""
+        cache = PredictionCache()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def scenario():
+            return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(3)),
+                                        return_exceptions=True)
+
+        results = asyncio.run(scenario())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.get("key") is None and cache.stats()["entries"] == 0
+
+    def test_result_of_other_model_version_is_not_cached(self):
+        """Résultat produit par une autre version que celle de la clé (rechargement en cours) : non mis en cache"""
+        cache = PredictionCache()
+
+        async def compute():
+            return {"prediction": "Dog", "model_version": "v1"}
+
+        result, hit = asyncio.run(cache.get_or_compute(
+            "key-v2", compute, cacheable=lambda r: r["model_version"] == "v2"))
+
+        assert result["model_version"] == "v1" and not hit
+        assert cache.get("key-v2") is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Tests pytest de l'agrégation par intervalle et du sous-échantillonnage LTTB du dashboard"""
+
+import pytest
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import Base, PredictionFeedback
+from src.database.feedback_service import FeedbackService
+from src.monitoring.dashboard_service import RAW_POINTS_FACTOR, DashboardService
+from src.monitoring.downsampling import choose_bucket_width, lttb, resolve_range
+
+class CountingCursor(sqlite3.Cursor):
+    """Curseur comptant les lignes transférées depuis la base"""
+
+    fetched = 0
+
+    def fetchone(self):
+        row = super().fetchone()
+        CountingCursor.fetched += row is not None
+        return row
+
+    def fetchmany(self, *args):
+        rows = super().fetchmany(*args)
+        CountingCursor.fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        CountingCursor.fetched += len(rows)
+        return rows
+
+class CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+class TestDownsampling:
+    """Tests de la largeur d'intervalle adaptative et de LTTB"""
+
+    def test_bucket_width_follows_range(self):
+        """La largeur d'intervalle grandit avec la période, dans la limite de max_buckets"""
+        assert choose_bucket_width(timedelta(hours=1), 240) == 30
+        assert choose_bucket_width(timedelta(days=1), 240) == 15 * 60
+        assert choose_bucket_width(timedelta(days=30), 240) == 3 * 3600
+        assert timedelta(days=3650).total_seconds() / choose_bucket_width(timedelta(days=3650), 240) <= 240
+        assert resolve_range("bogus", "7d")[0] == "7d"
+
+    def test_lttb_keeps_shape(self):
+        """LTTB conserve les extrémités et les pics isolés"""
+        x = np.arange(10000, dtype=float)
+        y = np.sin(x / 500)
+        y[4321] = 50.0
+        keep = lttb(x, y, 200)
+
+        assert len(keep) == 200
+        assert keep[0] == 0 and keep[-1] == 9999
+        assert np.all(np.diff(keep) > 0)
+        assert 4321 in keep
+        assert len(lttb(x[:50], y[:50], 200)) == 50
+
+    def test_latency_buckets(self, db):
+        """Moyenne, centiles et maximum par intervalle"""
+        start = datetime.now().replace(second=0, microsecond=0) - timedelta(minutes=10)
+        for minute, values in ((0, [1.0, 2.0, 3.0, 100.0]), (5, [10.0])):
+            for i, value in enumerate(values):
+                record = FeedbackService.build_record(
+                    inference_time_ms=value, success=True, prediction_result="cat",
+                    proba_cat=80.0, proba_dog=20.0, rgpd_consent=False
+                )
+                db.add(PredictionFeedback(**dict(record, created_at=start + timedelta(minutes=minute, seconds=i))))
+        db.commit()
+
+        buckets = DashboardService.get_latency_buckets(db, start, start + timedelta(minutes=10), 60)
+
+        assert [b['count'] for b in buckets] == [4, 1]
+        assert buckets[0]['bucket_start'] == start
+        assert buckets[0]['avg_ms'] == pytest.approx(26.5)
+        assert buckets[0]['p50_ms'] == pytest.approx(2.5)
+        assert buckets[0]['max_ms'] == 100.0
+        assert buckets[1]['p95_ms'] == 10.0
+
+    def test_stage_breakdown_window(self, db):
+        """La décomposition par étape ne porte que sur les prédictions de la période"""
+        now = datetime.now().replace(microsecond=0)
+        for age, model_ms in ((timedelta(days=2), 100.0), (timedelta(minutes=5), 10.0), (timedelta(minutes=1), 20.0)):
+            record = FeedbackService.build_record(
+                inference_time_ms=model_ms, success=True, prediction_result="cat",
+                proba_cat=80.0, proba_dog=20.0, rgpd_consent=False, timings={"model_ms": model_ms}
+            )
+            db.add(PredictionFeedback(**dict(record, created_at=now - age)))
+        db.commit()
+
+        breakdown = DashboardService.get_kpi_stage_breakdown(db, now - timedelta(hours=1), now)
+
+        stages = {stage['stage']: stage for stage in breakdown['stages']}
+        assert stages['model_ms']['avg_ms'] == pytest.approx(15.0)
+        assert stages['model_ms']['share'] == 100.0
+        assert breakdown['total_ms'] == pytest.approx(15.0)
+
+    def test_raw_points_are_bounded_in_sql(self):
+        """Mode brut : le nombre de lignes lues est borné, quel que soit le volume de la période"""
+        engine = create_engine(
+            "sqlite://", poolclass=StaticPool,
+            creator=lambda: sqlite3.connect(":memory:", factory=CountingConnection, check_same_thread=False)
+        )
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        start = datetime.now().replace(microsecond=0) - timedelta(hours=5)
+        record = FeedbackService.build_record(
+            inference_time_ms=10.0, success=True, prediction_result="cat",
+            proba_cat=80.0, proba_dog=20.0, rgpd_consent=False
+        )
+        db.add_all(
+            PredictionFeedback(**dict(record, created_at=start + timedelta(seconds=i), inference_time_ms=500.0 if i == 7777 else 10.0))
+            for i in range(10000)
+        )
+        db.commit()
+
+        max_points = 50
+        CountingCursor.fetched = 0
+        timestamps, values = DashboardService.get_latency_points(db, start, start + timedelta(hours=5), max_points)
+        db.close()
+
+        # Lignes brutes (limite + 1) puis un min/max par intervalle fin
+        assert CountingCursor.fetched <= RAW_POINTS_FACTOR * max_points + 1 + 2 * max_points + 1
+        assert len(values) <= max_points
+        assert 500.0 in values
+        assert timestamps == sorted(timestamps)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
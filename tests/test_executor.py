@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Tests pytest de l'executor d'inférence"""
+
+import asyncio
+import threading
+import pytest
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.models.executor import InferenceExecutor, ExecutorSaturatedError
+
+class TestInferenceExecutor:
+    """Tests de l'admission bornée"""
+
+    def test_run_off_event_loop(self):
+        """La fonction bloquante s'exécute dans un thread du pool"""
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+
+        async def scenario():
+            return await executor.run(lambda: threading.current_thread().name)
+
+        thread_name = asyncio.run(scenario())
+        executor.shutdown()
+
+        assert thread_name.startswith("inference")
+
+    def test_admission_rejects_when_full(self):
+        """Au-delà de la capacité, la requête est refusée immédiatement"""
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1, retry_after_s=2)
+
+        with executor.admission(), executor.admission():
+            assert executor.queue_depth == 1
+            with pytest.raises(ExecutorSaturatedError) as exc_info:
+                with executor.admission():
+                    pass
+            assert exc_info.value.retry_after_s == 2
+
+        # Les places sont libérées à la sortie du contexte
+        assert executor.in_flight == 0
+        executor.shutdown()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Tests pytest de la pagination par curseur et de l'export de l'historique"""
+
+import csv
+import io
+import json
+import pytest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import PredictionFeedback
+from src.database.feedback_service import FeedbackService, decode_cursor
+from src.database.export import export_predictions
+
+START = datetime(2024, 1, 1, 10, 0)
+
+@pytest.fixture
+def session_factory(session_factory):
+    """Base SQLite en mémoire (conftest.py) : 25 prédictions, dont plusieurs à la même seconde"""
+    db = session_factory()
+    for i in range(25):
+        record = FeedbackService.build_record(
+            inference_time_ms=float(i), success=True, prediction_result="cat" if i % 2 else "dog",
+            proba_cat=60.0, proba_dog=40.0, rgpd_consent=i % 3 == 0,
+            filename=f"image_{i}.jpg", user_comment="ok, merci"
+        )
+        db.add(PredictionFeedback(**dict(record, created_at=START + timedelta(seconds=i // 3))))
+    db.commit()
+    db.close()
+    return session_factory
+
+class TestHistory:
+    """Tests de l'historique des prédictions"""
+
+    def test_keyset_pagination(self, session_factory):
+        """Les pages successives couvrent tout l'historique, sans doublon, des plus récentes aux plus anciennes"""
+        db = session_factory()
+        seen, cursor = [], None
+        while True:
+            page, cursor = FeedbackService.get_recent_predictions(db, limit=4, cursor=cursor)
+            seen.extend((p.created_at, p.id) for p in page)
+            if cursor is None:
+                break
+        filtered, _ = FeedbackService.get_recent_predictions(
+            db, limit=100, start=START + timedelta(seconds=2), end=START + timedelta(seconds=4), result="cat"
+        )
+        db.close()
+
+        assert len(seen) == 25 and len(set(seen)) == 25
+        assert seen == sorted(seen, reverse=True)
+        assert {p.prediction_result for p in filtered} == {"cat"}
+        assert all(START + timedelta(seconds=2) <= p.created_at <= START + timedelta(seconds=4) for p in filtered)
+        with pytest.raises(ValueError):
+            decode_cursor("pas-un-curseur")
+
+    def test_streaming_export(self, session_factory):
+        """Export CSV et NDJSON par paquets, champs RGPD masqués sans consentement"""
+        chunks = list(export_predictions(session_factory, "csv", batch_size=10))
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+
+        assert len(chunks) == 3
+        assert len(rows) == 25
+        assert [int(r["id"]) for r in rows] == sorted(int(r["id"]) for r in rows)
+        assert rows[0]["filename"] == "image_0.jpg" and rows[1]["filename"] == ""
+        assert rows[0]["user_comment"] == "ok, merci"
+
+        lines = "".join(export_predictions(session_factory, "ndjson", result="dog")).splitlines()
+        records = [json.loads(line) for line in lines]
+        assert len(records) == 13 and {r["prediction_result"] for r in records} == {"dog"}
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
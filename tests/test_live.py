@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Tests pytest de la diffusion en direct du monitoring (SSE)"""
+
+import asyncio
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.monitoring.live import LiveBroadcaster
+
+def parse(message):
+    """(événement, données) d'un message SSE"""
+    lines = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+class TestLiveBroadcaster:
+    """Tests de la diffusion des deltas aux abonnés"""
+
+    def test_subscribers_receive_points_and_kpis(self):
+        """Les nouvelles prédictions sont regroupées, les KPI calculés une fois pour tous les abonnés"""
+        kpi_calls = []
+
+        async def load_kpis():
+            kpi_calls.append(1)
+            return {"kpi_inference": {"total_predictions": 3}}
+
+        async def scenario():
+            broadcaster = LiveBroadcaster(kpi_loader=load_kpis, flush_interval_s=0.05, kpi_interval_s=60)
+            broadcaster.publish_point({"t": "ignoré", "ms": 1.0})  # Aucun abonné : ignoré
+            streams = [broadcaster.stream() for _ in range(2)]
+            for stream in streams:
+                assert (await stream.__anext__()).startswith("retry:")
+            broadcaster.start()
+            broadcaster.publish_point({"t": "2024-01-01T10:00:00.000", "ms": 12.5})
+            broadcaster.publish_point({"t": "2024-01-01T10:00:00.100", "ms": 8.0})
+            messages = [[parse(await stream.__anext__()), parse(await stream.__anext__())] for stream in streams]
+            await broadcaster.close()
+            return messages, broadcaster
+
+        messages, broadcaster = asyncio.run(scenario())
+
+        for received in messages:
+            assert received[0] == ("points", [{"t": "2024-01-01T10:00:00.000", "ms": 12.5},
+                                              {"t": "2024-01-01T10:00:00.100", "ms": 8.0}])
+            assert received[1] == ("kpi", {"kpi_inference": {"total_predictions": 3}})
+        assert len(kpi_calls) == 1
+        assert broadcaster.subscribers == 0
+
+    def test_slow_subscriber_disconnected(self):
+        """Un abonné qui ne lit plus est déconnecté quand sa file est pleine"""
+        async def scenario():
+            broadcaster = LiveBroadcaster(max_queue=2)
+            stream = broadcaster.stream()
+            await stream.__anext__()
+            for i in range(5):
+                broadcaster._broadcast(f"event: points\ndata: [{i}]\n\n")
+            received = [message async for message in stream]
+            return received, broadcaster
+
+        received, broadcaster = asyncio.run(scenario())
+
+        assert received == ["event: points\ndata: [1]\n\n"]
+        assert broadcaster.subscribers == 0 and broadcaster.dropped_subscribers == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Tests pytest des métriques Prometheus"""
+
+import pytest
+import sys
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.monitoring.metrics import register_callback, render
+
+@pytest.fixture
+def registry():
+    """Registre vide (indépendant du registre de l'application)"""
+    return CollectorRegistry()
+
+class TestMetrics:
+    """Tests du format d'exposition et des métriques calculées à la collecte"""
+
+    def test_counter_with_labels(self, registry):
+        """Chaque combinaison de labels est une série distincte"""
+        requests = Counter("requests_total", "Requêtes", ["route", "status"], registry=registry)
+        requests.labels("/api/predict", 200).inc()
+        requests.labels("/api/predict", 200).inc(2)
+        requests.labels("/health", 200).inc()
+
+        output = render(registry).decode()
+        assert "# TYPE requests_total counter" in output
+        assert 'requests_total{route="/api/predict",status="200"} 3.0' in output
+        assert 'requests_total{route="/health",status="200"} 1.0' in output
+
+        with pytest.raises(ValueError):
+            requests.labels("/health")
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """Les buckets sont cumulés et complétés par +Inf, _sum et _count"""
+        latency = Histogram("latency_seconds", "Latence", buckets=(0.1, 1.0), registry=registry)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        output = render(registry).decode()
+        assert 'latency_seconds_bucket{le="0.1"} 2.0' in output
+        assert 'latency_seconds_bucket{le="1.0"} 3.0' in output
+        assert 'latency_seconds_bucket{le="+Inf"} 4.0' in output
+        assert "latency_seconds_sum 3.65" in output
+        assert "latency_seconds_count 4.0" in output
+
+    def test_callback_metrics(self, registry):
+        """Les métriques calculées sont évaluées à la collecte, une source en erreur est omise"""
+        depth = {"value": 1}
+        register_callback("queue_depth", "Profondeur de file", lambda: depth["value"], registry=registry)
+        register_callback("cache_events_total", "Cache", lambda: {"hits": 3, "misses": 1},
+                          type_name="counter", labelnames=["event"], registry=registry)
+        register_callback("broken", "Source indisponible", lambda: 1 / 0, registry=registry)
+
+        depth["value"] = 7
+        output = render(registry).decode()
+        assert "queue_depth 7.0" in output
+        assert 'cache_events_total{event="hits"} 3.0' in output
+        assert "broken" not in output
+
+    def test_duplicate_name_is_rejected(self, registry):
+        """Deux métriques ne peuvent pas avoir le même nom"""
+        Gauge("workers", "Workers", registry=registry)
+        with pytest.raises(ValueError):
+            register_callback("workers", "Workers", lambda: 1, registry=registry)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
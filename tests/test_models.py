@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Tests pytest du prédicteur et des backends d'inférence"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import DATA_DIR
+from src.models.backends import artifact_path, get_backend, KerasBackend
+from src.models.predictor import CatDogPredictor
+
+def find_jpeg():
+    """Première image JPEG du dossier Cat"""
+    cat_dir = DATA_DIR / "raw" / "PetImages" / "Cat"
+    images = sorted(cat_dir.glob("*.jpg")) if cat_dir.exists() else []
+    if not images:
+        pytest.skip(f"Aucune image trouvée dans {cat_dir}")
+    return images[0]
+
+class TestBackends:
+    """Tests de la sélection des backends"""
+
+    def test_artifact_paths(self):
+        """Chaque backend a son propre artefact à côté du modèle .keras"""
+        model_path = Path("models/cats_dogs_model.keras")
+        assert artifact_path(model_path, "keras") == model_path
+        assert artifact_path(model_path, "tflite").name == "cats_dogs_model.tflite"
+        assert artifact_path(model_path, "tflite_int8").name == "cats_dogs_model_int8.tflite"
+        assert artifact_path(model_path, "onnx").name == "cats_dogs_model.onnx"
+
+    def test_compiled_buckets_padding(self):
+        """Les batchs sont complétés au bucket supérieur et découpés au-delà du plus grand bucket"""
+        backend = KerasBackend(Path("model.keras"), batch_buckets=[4, 1, 2])
+        calls = []
+
+        def make_fn(bucket):
+            def fn(images):
+                calls.append(images.shape[0])
+                return images.mean(axis=(1, 2, 3))[:, np.newaxis]
+            return fn
+
+        backend._serving_fns = {bucket: make_fn(bucket) for bucket in backend.batch_buckets}
+        images = np.stack([np.full((2, 2, 3), i, dtype=np.uint8) for i in range(7)])
+        scores = backend.predict(images)
+
+        assert calls == [4, 4]  # 7 images = 4 + 3 (complété à 4)
+        assert scores.tolist() == [0, 1, 2, 3, 4, 5, 6]
+
+    def test_unknown_backend(self):
+        """Un backend inconnu est refusé"""
+        with pytest.raises(ValueError):
+            get_backend("caffe", Path("model.keras"))
+
+class TestPredictor:
+    """Tests du préprocessing et de la mise en forme des prédictions"""
+
+    def test_format_prediction(self):
+        """Le score sigmoïde est converti en classe et probabilités"""
+        result = CatDogPredictor.format_prediction(0.8)
+        assert result["prediction"] == "Dog"
+        assert result["confidence"] == pytest.approx(0.8)
+        assert result["probabilities"]["cat"] == pytest.approx(0.2)
+
+        assert CatDogPredictor.format_prediction(0.1)["prediction"] == "Cat"
+
+    @pytest.mark.parametrize("fast_decode", [False, True])
+    def test_preprocess_image(self, fast_decode):
+        """Le préprocessing produit un batch uint8 (1, 128, 128, 3) quel que soit le mode de décodage"""
+        predictor = CatDogPredictor(load=False)
+        array = predictor.preprocess_image(find_jpeg().read_bytes(), fast_decode=fast_decode)
+
+        assert array.shape == (1,) + tuple(predictor.image_size) + (3,)
+        assert array.dtype == np.uint8
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Tests pytest du pipeline d'entrée de l'entraînement"""
+
+import pytest
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.data.pipeline import bottleneck_report, cache_fingerprint, list_files
+from src.data.shards import assign_split
+from src.models.profiler import TrainingProfile, compare_with_baseline
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Jeu Cat/Dog : 12 images par classe et un fichier non image"""
+    data_path = tmp_path / "PetImages"
+    for folder in ("Cat", "Dog"):
+        (data_path / folder).mkdir(parents=True)
+        for i in range(12):
+            Image.new("RGB", (20, 20)).save(data_path / folder / f"{i}.jpg")
+    (data_path / "Cat" / "Thumbs.db").write_bytes(b"")
+    return data_path
+
+class TestPipeline:
+    """Tests des parties du pipeline indépendantes de TensorFlow"""
+
+    def test_list_files_split(self, dataset):
+        """Découpage déterministe, identique à celui des shards, labels selon la classe"""
+        splits = list_files(dataset, seed=3, val_split=0.25)
+        assert splits == list_files(dataset, seed=3, val_split=0.25)
+
+        paths = splits["train"][0] + splits["val"][0]
+        assert len(paths) == 24 and not any(p.endswith("Thumbs.db") for p in paths)
+        for split, (split_paths, labels) in splits.items():
+            for path, label in zip(split_paths, labels):
+                relative = Path(path).relative_to(dataset).as_posix()
+                assert assign_split(relative, 3, 0.25) == split
+                assert label == (1 if relative.startswith("Dog/") else 0)
+
+    def test_cache_fingerprint(self, dataset):
+        """L'empreinte du cache change avec les fichiers, la graine ou val_split"""
+        def fingerprint(seed=3, val_split=0.25):
+            paths, labels = list_files(dataset, seed, val_split)["train"]
+            return cache_fingerprint(paths, labels, (128, 128), seed, val_split)
+
+        reference = fingerprint()
+        assert fingerprint() == reference
+        assert fingerprint(seed=4) != reference
+        assert fingerprint(val_split=0.3) != reference
+
+        (dataset / "Dog" / "0.jpg").unlink()
+        Image.new("RGB", (20, 20)).save(dataset / "Cat" / "extra.jpg")
+        assert fingerprint() != reference
+
+    def test_bottleneck_report(self):
+        """Le plus lent des deux temps par batch désigne la limite"""
+        report = bottleneck_report({"batch_ms": 30.0, "images_per_s": 2000.0},
+                                   {"batch_ms": 10.0, "images_per_s": 6400.0})
+        assert report["bound"] == "input"
+        assert report["input_share"] == 0.75
+
+        report = bottleneck_report({"batch_ms": 5.0, "images_per_s": 12800.0},
+                                   {"batch_ms": 15.0, "images_per_s": 4266.7})
+        assert report["bound"] == "compute"
+
+    def test_bottleneck_in_benchmark_report(self):
+        """Le goulot mesuré est inclus dans le rapport de benchmark, sans modifier la comparaison"""
+        bottleneck = bottleneck_report({"batch_ms": 30.0, "images_per_s": 2000.0},
+                                       {"batch_ms": 10.0, "images_per_s": 6400.0})
+        report = TrainingProfile(batch_size=64, compute_step_ms=10.0, bottleneck=bottleneck).report()
+        assert report["summary"]["bottleneck"]["bound"] == "input"
+
+        baseline = TrainingProfile(batch_size=64, compute_step_ms=10.0).report()
+        assert compare_with_baseline(report, baseline)["comparable"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
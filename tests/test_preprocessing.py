@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Tests pytest de la validation parallèle et incrémentale des images"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.data.preprocessing import clean_corrupted_images, load_manifest, stage_dataset, validate_dataset
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Jeu Cat/Dog minimal : 6 images valides, un fichier tronqué et un faux JPEG"""
+    data_path = tmp_path / "PetImages"
+    for folder in ("Cat", "Dog"):
+        (data_path / folder).mkdir(parents=True)
+        for i in range(3):
+            Image.new("RGB", (16, 16), (i * 40, 80, 120)).save(data_path / folder / f"{i}.jpg")
+    (data_path / "Cat" / "broken.jpg").write_bytes(b"\xff\xd8\xff")
+    (data_path / "Dog" / "fake.jpg").write_bytes(b"not an image at all")
+    return data_path
+
+class TestValidateDataset:
+    """Tests de validate_dataset / clean_corrupted_images"""
+
+    def test_invalid_images_are_quarantined(self, dataset, tmp_path):
+        """Les images invalides sont déplacées en quarantaine avec leur motif"""
+        quarantine = tmp_path / "quarantine"
+        skipped = clean_corrupted_images(dataset, workers=1, manifest_path=tmp_path / "manifest.json",
+                                         quarantine_dir=quarantine)
+
+        assert skipped == 2
+        assert not (dataset / "Cat" / "broken.jpg").exists()
+        assert (quarantine / "Cat" / "broken.jpg").exists()
+        assert (quarantine / "Dog" / "fake.jpg").exists()
+        reasons = [json.loads(line) for line in (quarantine / "reasons.jsonl").read_text().splitlines()]
+        assert len(reasons) == 2 and all(r["reason"] for r in reasons)
+
+    def test_unchanged_files_are_skipped(self, dataset, tmp_path):
+        """Seuls les fichiers nouveaux ou modifiés sont revérifiés"""
+        kwargs = dict(workers=1, manifest_path=tmp_path / "manifest.json", quarantine_dir=tmp_path / "q")
+        first = validate_dataset(dataset, **kwargs)
+        assert (first["checked"], first["quarantined"]) == (8, 2)
+        assert len(load_manifest(tmp_path / "manifest.json")) == 6
+
+        second = validate_dataset(dataset, **kwargs)
+        assert (second["total"], second["unchanged"], second["checked"]) == (6, 6, 0)
+
+        # Fichier réécrit (taille différente) : revérifié
+        Image.new("RGB", (32, 32)).save(dataset / "Dog" / "0.jpg")
+        third = validate_dataset(dataset, **kwargs)
+        assert (third["unchanged"], third["checked"], third["quarantined"]) == (5, 1, 0)
+
+    def test_process_pool(self, dataset, tmp_path):
+        """Validation répartie sur un pool de processus"""
+        report = validate_dataset(dataset, workers=2, manifest_path=tmp_path / "manifest.json",
+                                  quarantine_dir=tmp_path / "q", chunksize=2)
+
+        assert report["workers"] == 2
+        assert (report["checked"], report["quarantined"]) == (8, 2)
+        assert report["files_per_s"] > 0
+
+class TestStageDataset:
+    """Tests de la synchronisation incrémentale du répertoire de travail"""
+
+    def test_hardlink_and_incremental_sync(self, dataset, tmp_path):
+        """Premier passage : liens physiques ; ensuite seuls les changements sont appliqués"""
+        target = tmp_path / "work" / "PetImages"
+        first = stage_dataset(dataset, target, "hardlink")
+        assert (first["total"], first["added"], first["copied"]) == (8, 8, 0)
+        assert (target / "Cat" / "0.jpg").stat().st_ino == (dataset / "Cat" / "0.jpg").stat().st_ino
+
+        (dataset / "Dog" / "fake.jpg").unlink()
+        Image.new("RGB", (8, 8)).save(dataset / "Dog" / "new.jpg")
+        second = stage_dataset(dataset, target, "hardlink")
+        assert (second["added"], second["removed"], second["unchanged"]) == (1, 1, 7)
+        assert sorted(p.name for p in (target / "Dog").iterdir()) == ["0.jpg", "1.jpg", "2.jpg", "new.jpg"]
+
+    def test_quarantined_files_are_not_restaged(self, dataset, tmp_path):
+        """Une image mise en quarantaine n'est pas reposée tant que sa source ne change pas"""
+        target = tmp_path / "work" / "PetImages"
+        stage_dataset(dataset, target, "symlink")
+        assert (target / "Cat" / "0.jpg").is_symlink()
+
+        clean_corrupted_images(target, workers=1, manifest_path=tmp_path / "manifest.json",
+                               quarantine_dir=tmp_path / "q")
+        assert (dataset / "Cat" / "broken.jpg").exists()  # Source intacte
+
+        report = stage_dataset(dataset, target, "symlink")
+        assert (report["added"], report["unchanged"]) == (0, 8)
+        assert not (target / "Cat" / "broken.jpg").exists()
+
+    def test_mode_change_restages(self, dataset, tmp_path):
+        """Changement de mode : tous les fichiers sont reposés"""
+        target = tmp_path / "work" / "PetImages"
+        stage_dataset(dataset, target, "symlink")
+        report = stage_dataset(dataset, target, "copy")
+
+        assert report["added"] == 8
+        assert not (target / "Cat" / "0.jpg").is_symlink()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
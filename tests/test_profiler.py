@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Tests pytest de l'instrumentation de l'entraînement"""
+
+import json
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.models.profiler import TrainingProfile, compare_with_baseline
+
+def run_profile(step_s=0.002, steps=8, epochs=2, compute_step_ms=None):
+    """Entraînement simulé : pas d'une durée fixe"""
+    profile = TrainingProfile(batch_size=16, warmup_steps=3, compute_step_ms=compute_step_ms, metadata={"mode": "test"})
+    profile.train_begin()
+    for epoch in range(epochs):
+        profile.epoch_begin()
+        for _ in range(steps):
+            profile.batch_begin()
+            time.sleep(step_s)
+            profile.batch_end()
+        profile.epoch_end(epoch, {"loss": 0.5})
+    profile.train_end()
+    return profile
+
+class TestTrainingProfile:
+    """Tests de TrainingProfile et de la comparaison à une référence"""
+
+    def test_report(self, tmp_path):
+        """Rapport JSON : pas hors warm-up, débit, époques, mémoire"""
+        report = run_profile(compute_step_ms=0.5).save(tmp_path / "profile.json")
+
+        assert json.loads((tmp_path / "profile.json").read_text())["summary"]["steps"] == 16
+        summary = report["summary"]
+        assert report["mode"] == "test"
+        assert summary["warmup_steps"] == 3
+        assert summary["step_ms"]["p50"] >= 2
+        assert 0 < summary["steady_images_per_s"] <= 16 / 0.002
+        assert summary["input_wait_ms"] == pytest.approx(summary["step_ms"]["p50"] - 0.5)
+        assert summary["peak_rss_mb"] > 0
+        assert [e["epoch"] for e in report["epochs"]] == [1, 2]
+        assert report["epochs"][0]["steps"] == 8 and report["epochs"][0]["logs"] == {"loss": 0.5}
+
+    def test_compare_with_baseline(self):
+        """Baisse de débit au-delà de la tolérance : régression"""
+        baseline = run_profile(step_s=0.002).report()
+        slower = run_profile(step_s=0.006).report()
+
+        comparison = compare_with_baseline(slower, baseline, tolerance=0.05)
+        assert comparison["regression"] is True
+        assert comparison["steady_images_per_s"]["change"] < -0.05
+        assert comparison["step_p50_ms_change"] > 0
+        assert compare_with_baseline(baseline, slower)["regression"] is False
+
+    def test_compare_refuses_other_configuration(self):
+        """Taille de batch ou pipeline différents : débits non comparés"""
+        baseline = run_profile(step_s=0.002).report()
+        baseline["pipeline"] = {"cache": "none", "cache_dir": "/tmp/a", "augment": "True"}
+        other = run_profile(step_s=0.006).report()
+        other["pipeline"] = {"cache": "none", "cache_dir": "/tmp/b", "augment": "True"}
+
+        assert compare_with_baseline(other, baseline)["regression"] is True  # cache_dir ignoré
+
+        other["summary"]["batch_size"] = 32
+        other["pipeline"]["augment"] = "False"
+        comparison = compare_with_baseline(other, baseline)
+        assert comparison["comparable"] is False
+        assert comparison["regression"] is None
+        assert set(comparison["mismatches"]) == {"batch_size", "pipeline"}
+        assert comparison["mismatches"]["batch_size"] == {"current": 32, "baseline": 16}
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
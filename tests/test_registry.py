@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests pytest du registre de modèles versionnés"""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.models.registry import ModelRegistry
+
+MODEL_NAME = "cats_dogs_model.keras"
+
+@pytest.fixture
+def registry_dir(tmp_path):
+    """Registre contenant les versions v1, v2 et v10"""
+    for version in ("v1", "v2", "v10"):
+        (tmp_path / version).mkdir()
+        (tmp_path / version / MODEL_NAME).write_bytes(b"modele")
+    return tmp_path
+
+class TestModelRegistry:
+    """Tests de la résolution des versions et de la bascule"""
+
+    def test_latest_version_is_served(self, registry_dir):
+        """Sans fichier ACTIVE, la version la plus récente (tri naturel) est servie"""
+        registry = ModelRegistry(registry_dir, Path("/models") / MODEL_NAME, load_in_process=False)
+
+        assert registry.list_versions() == ["v1", "v2", "v10"]
+        assert registry.active_version == "v10"
+
+    def test_active_file_pins_version(self, registry_dir):
+        """Le fichier ACTIVE fixe la version servie"""
+        (registry_dir / "ACTIVE").write_text("v2\n")
+        registry = ModelRegistry(registry_dir, Path("/models") / MODEL_NAME, load_in_process=False)
+
+        assert registry.active_version == "v2"
+
+    def test_empty_registry_uses_default_model(self, tmp_path):
+        """Registre vide : le modèle par défaut est servi"""
+        default_path = tmp_path / MODEL_NAME
+        registry = ModelRegistry(tmp_path / "registry", default_path, load_in_process=False)
+
+        assert registry.list_versions() == []
+        assert registry.active_model_path == default_path
+
+    def test_swap_and_notification(self, registry_dir):
+        """Le chargement d'une version la rend active et notifie l'abonné"""
+        swaps = []
+        registry = ModelRegistry(
+            registry_dir, Path("/models") / MODEL_NAME, load_in_process=False,
+            on_swap=lambda version, path: swaps.append((version, path.parent.name))
+        )
+        previous = registry.active
+
+        assert registry.load("v1")
+        assert registry.active_version == "v1"
+        assert registry.active is not previous
+        assert swaps == [("v1", "v1")]
+
+    def test_unknown_version_keeps_active_model(self, registry_dir):
+        """L'échec de chargement d'une version conserve la version active"""
+        registry = ModelRegistry(registry_dir, Path("/models") / MODEL_NAME, load_in_process=False)
+
+        assert not registry.load("v99")
+        assert registry.active_version == "v10"
+        assert "v99" in registry.status()["last_error"]
+
+    def test_reload_async_single_loader(self, registry_dir):
+        """Un seul chargement à la fois : les demandes concurrentes sont refusées"""
+        release = threading.Event()
+        registry = ModelRegistry(registry_dir, Path("/models") / MODEL_NAME, load_in_process=False,
+                                 on_swap=lambda version, path: release.wait(5))
+
+        assert registry.reload_async("v1")
+        assert not registry.reload_async("v2")
+        release.set()
+
+        # Verrou libéré à la fin du chargement : une nouvelle demande est acceptée
+        deadline = time.time() + 5
+        while not registry.reload_async("v2") and time.time() < deadline:
+            time.sleep(0.01)
+        assert time.time() < deadline
+        while registry.active_version != "v2" and time.time() < deadline:
+            time.sleep(0.01)
+        assert registry.active_version == "v2"
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
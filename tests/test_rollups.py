@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests pytest des agrégats incrémentaux du monitoring"""
+
+import pytest
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import PredictionFeedback, PredictionRollup
+from src.database.feedback_service import FeedbackService
+from src.monitoring.rollups import RollupService
+from src.monitoring.dashboard_service import DashboardService
+
+def add_prediction(db, created_at, inference_time_ms=10.0, success=True, rgpd_consent=True, user_feedback=None):
+    record = FeedbackService.build_record(
+        inference_time_ms=inference_time_ms, success=success, prediction_result="cat",
+        proba_cat=80.0, proba_dog=20.0, rgpd_consent=rgpd_consent, user_feedback=user_feedback
+    )
+    prediction = PredictionFeedback(**dict(record, created_at=created_at))
+    db.add(prediction)
+    db.commit()
+    return prediction
+
+class TestRollups:
+    """Tests de la compaction et de la lecture des totaux"""
+
+    def test_totals_match_raw_rows(self, db):
+        """Totaux identiques avant et après compaction, queue non agrégée incluse"""
+        add_prediction(db, datetime(2024, 1, 1, 10, 5), 4.0, user_feedback=1)
+        add_prediction(db, datetime(2024, 1, 1, 10, 50), 30.0, user_feedback=0)
+        add_prediction(db, datetime(2024, 1, 1, 11, 0), 0.0, success=False, rgpd_consent=False)
+        before = RollupService.get_totals(db)
+
+        assert RollupService.compact(db) == 3
+        assert RollupService.compact(db) == 0
+        assert db.query(PredictionRollup).filter_by(granularity='hour').count() == 2
+        assert db.query(PredictionRollup).filter_by(granularity='minute').count() == 3
+        after = RollupService.get_totals(db)
+        assert after == before
+        assert after['total_count'] == 3 and after['success_count'] == 2
+        assert after['latency_sum_ms'] == 34.0
+        assert (after['latency_min_ms'], after['latency_max_ms']) == (4.0, 30.0)
+        assert sum(after['latency_histogram']) == 2
+
+        # Nouvelle prédiction dans une heure déjà agrégée : visible avant et après compaction
+        add_prediction(db, datetime(2024, 1, 1, 10, 59), 2.0)
+        assert RollupService.get_totals(db)['latency_min_ms'] == 2.0
+        assert RollupService.compact(db) == 1
+        totals = RollupService.get_totals(db)
+        assert totals['total_count'] == 4 and totals['latency_min_ms'] == 2.0
+        assert FeedbackService.get_statistics(db)['total_predictions'] == 4
+
+    def test_tail_histogram_matches_compaction(self, db):
+        """Histogramme de la queue (SQL) identique à celui de la compaction, bornes comprises"""
+        for minute, latency in enumerate((0.5, 1.0, 1.5, 10.0, 10.01, 5000.0, 9000.0)):
+            add_prediction(db, datetime(2024, 1, 1, 10, minute), latency)
+        add_prediction(db, datetime(2024, 1, 1, 11, 0), 3.0, success=False)
+        before = RollupService.get_totals(db)
+
+        RollupService.compact(db)
+        after = RollupService.get_totals(db)
+
+        assert before['latency_histogram'] == after['latency_histogram']
+        assert after['latency_histogram'] == [2, 1, 0, 1, 1, 0, 0, 0, 0, 0, 0, 1, 1]
+        assert before['success_count'] == after['success_count'] == 7
+
+    def test_feedback_change_after_compaction(self, db):
+        """Un feedback modifié après agrégation est répercuté sur les agrégats"""
+        prediction = add_prediction(db, datetime(2024, 1, 1, 10, 5), user_feedback=0)
+        RollupService.compact(db)
+        db.refresh(prediction)
+
+        old_feedback = prediction.user_feedback
+        prediction.user_feedback = 1
+        RollupService.apply_feedback_change(db, prediction, old_feedback)
+        db.commit()
+
+        totals = RollupService.get_totals(db)
+        assert totals['feedback_count'] == 1 and totals['feedback_positive_count'] == 1
+        minute = db.query(PredictionRollup).filter_by(granularity='minute').one()
+        assert minute.feedback_positive_count == 1
+
+    def test_dashboard_reads_totals_once(self, db, monkeypatch):
+        """Les KPI de latence et de satisfaction partagent une seule lecture des totaux"""
+        add_prediction(db, datetime.now(), 4.0, user_feedback=1)
+        add_prediction(db, datetime.now(), 6.0, user_feedback=0)
+        calls = []
+        get_totals = RollupService.get_totals
+        monkeypatch.setattr(RollupService, "get_totals", lambda session: calls.append(1) or get_totals(session))
+
+        data = DashboardService.get_dashboard_data(db, "1h")
+
+        assert len(calls) == 1
+        assert data['kpi_inference']['avg_inference_time_ms'] == pytest.approx(5.0)
+        assert data['kpi_satisfaction']['satisfaction_rate'] == 50
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tests pytest des shards préprocessés (tableaux numpy mappés en mémoire)"""
+
+import json
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.data.shards import ShardedDataset, build_shards, decode_image, load_shards
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Jeu Cat/Dog : 10 images par classe (couleur dépendant de la classe) et un fichier illisible"""
+    data_path = tmp_path / "PetImages"
+    for label, folder in enumerate(("Cat", "Dog")):
+        (data_path / folder).mkdir(parents=True)
+        for i in range(10):
+            Image.new("RGB", (40 + i, 30), (255 * label, i, 0)).save(data_path / folder / f"{i}.jpg")
+    (data_path / "Dog" / "broken.jpg").write_bytes(b"garbage")
+    return data_path
+
+def build(dataset, tmp_path, **kwargs):
+    options = dict(image_size=(16, 16), shard_size=4, val_split=0.3, seed=7, workers=1)
+    options.update(kwargs)
+    return build_shards(dataset, tmp_path / "shards", **options)
+
+class TestBuildShards:
+    """Tests de la construction et de la lecture des shards"""
+
+    def test_shards_content(self, dataset, tmp_path):
+        """Images décodées une fois en uint8, labels cohérents, fichier illisible écarté"""
+        index = build(dataset, tmp_path)
+        shards = ShardedDataset(tmp_path / "shards")
+
+        assert shards.count("train") + shards.count("val") == 20
+        assert all(shard["count"] <= 4 for split in index["splits"].values() for shard in split["shards"])
+        images, labels = shards.shards("train")[0]
+        assert isinstance(images, np.memmap)
+        assert images.dtype == np.uint8 and images.shape[1:] == (16, 16, 3)
+        # Rouge (Dog) ou noir (Cat) selon le label
+        assert np.array_equal(images[:, 8, 8, 0] > 127, labels == 1)
+        assert np.array_equal(images[0], decode_image((dataset / json.loads(
+            (tmp_path / "shards" / "split.json").read_text())["train"][0]["path"]).read_bytes(), (16, 16)))
+
+    def test_split_is_deterministic_and_stable(self, dataset, tmp_path):
+        """Même graine : même découpage ; une image ajoutée ne déplace pas les autres"""
+        build(dataset, tmp_path)
+        first = json.loads((tmp_path / "shards" / "split.json").read_text())
+        first_val = {entry["path"] for entry in first["val"]}
+
+        Image.new("RGB", (40, 30)).save(dataset / "Cat" / "extra.jpg")
+        build(dataset, tmp_path, workers=2)
+        second = json.loads((tmp_path / "shards" / "split.json").read_text())
+        second_val = {entry["path"] for entry in second["val"]}
+
+        assert first_val == second_val - {"Cat/extra.jpg"}
+        assert not first_val & {entry["path"] for entry in second["train"]}
+
+    def test_iter_batches(self, dataset, tmp_path):
+        """Tous les exemples sont lus une fois, avec ou sans mélange"""
+        build(dataset, tmp_path)
+        shards = ShardedDataset(tmp_path / "shards")
+
+        plain = list(shards.iter_batches("train", batch_size=3))
+        assert sum(len(labels) for _, labels in plain) == shards.count("train")
+        assert all(np.shares_memory(images, shards.shards("train")[0][0]) for images, _ in plain[:1])
+
+        shuffled = list(shards.iter_batches("train", batch_size=3, shuffle=True, seed=1))
+        assert sorted(np.concatenate([l for _, l in shuffled]).tolist()) == sorted(np.concatenate([l for _, l in plain]).tolist())
+
+    def test_load_shards_checks_image_size(self, dataset, tmp_path):
+        """Shards absents ou d'une autre taille d'image : None"""
+        assert load_shards(tmp_path / "shards") is None
+        build(dataset, tmp_path)
+        assert load_shards(tmp_path / "shards", (16, 16)) is not None
+        assert load_shards(tmp_path / "shards", (128, 128)) is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests pytest des sketches de quantiles (centiles de latence)"""
+
+import pytest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import LatencySketch
+from src.monitoring.sketch import DDSketch, LatencySketchRecorder, SketchStore
+
+def lognormal_latencies(seed, n=20000):
+    return np.random.default_rng(seed).lognormal(mean=3.0, sigma=0.8, size=n)
+
+class TestDDSketch:
+    """Tests de précision et de fusion du sketch"""
+
+    def test_relative_accuracy(self):
+        """Les centiles restent à moins de 1 % (alpha) des centiles exacts"""
+        values = lognormal_latencies(0)
+        sketch = DDSketch(0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.9, 0.99):
+            exact = np.quantile(values, q, method="lower")
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.0101)
+        assert sketch.count == len(values)
+        assert DDSketch().quantile(0.5) is None
+
+    def test_merge_and_serialization(self):
+        """Fusion de deux sketches sérialisés = sketch de l'ensemble des valeurs"""
+        a_values, b_values = lognormal_latencies(1, 5000), lognormal_latencies(2, 7000)
+        a, b, both = DDSketch(), DDSketch(), DDSketch()
+        for value in a_values:
+            a.add(value)
+            both.add(value)
+        for value in b_values:
+            b.add(value)
+            both.add(value)
+
+        merged = DDSketch.from_dict(a.to_dict())
+        merged.merge(DDSketch.from_dict(b.to_dict()))
+
+        assert merged.bins == both.bins
+        assert merged.quantiles() == both.quantiles()
+        assert len(merged.to_dict()["counts"]) < 1000
+
+class TestLatencySketchRecorder:
+    """Tests de la fusion en base des sketches de plusieurs processus"""
+
+    def test_workers_merge_into_total(self, session_factory):
+        """Deux processus fusionnent leurs sketches dans la même ligne 'total'"""
+        workers = [LatencySketchRecorder(session_factory) for _ in range(2)]
+        for worker, values in zip(workers, ([10.0] * 90, [200.0] * 10)):
+            for value in values:
+                worker.observe(value)
+            assert worker.flush()
+        workers[0].observe(500.0)
+
+        db = session_factory()
+        try:
+            percentiles = SketchStore.percentiles(db, workers[0].pending())
+            assert db.query(LatencySketch).filter_by(granularity='total').count() == 1
+        finally:
+            db.close()
+
+        assert percentiles['count'] == 101
+        assert percentiles['p50_ms'] == pytest.approx(10.0, rel=0.01)
+        assert percentiles['p99_ms'] == pytest.approx(200.0, rel=0.01)
+
+    def test_range_percentiles_use_hourly_sketches(self, session_factory):
+        """Les centiles d'une période ne fusionnent que les sketches horaires de cette période"""
+        now = datetime.now()
+        recorder = LatencySketchRecorder(session_factory)
+        for _ in range(50):
+            recorder.observe(500.0, now - timedelta(days=2))
+            recorder.observe(10.0, now)
+        assert recorder.flush()
+
+        db = session_factory()
+        try:
+            total = SketchStore.percentiles(db)
+            recent = SketchStore.percentiles(db, start=now - timedelta(hours=1), end=now)
+        finally:
+            db.close()
+
+        assert total['count'] == 100
+        assert total['p99_ms'] == pytest.approx(500.0, rel=0.01)
+        assert recent['count'] == 50
+        assert recent['p99_ms'] == pytest.approx(10.0, rel=0.01)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Tests pytest du cache d'instantanés du dashboard"""
+
+import asyncio
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.monitoring.snapshot_cache import DashboardSnapshotCache
+
+class CountingLoader:
+    """Loader lent qui compte ses appels"""
+
+    def __init__(self, delay_s=0.05):
+        self.calls = 0
+        self.delay_s = delay_s
+
+    async def __call__(self, time_range, mode):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return {"time_range": time_range, "mode": mode, "version": self.calls}
+
+class TestDashboardSnapshotCache:
+    """Tests du partage des rafraîchissements et du stale-while-revalidate"""
+
+    def test_concurrent_viewers_share_one_refresh(self):
+        """Des lecteurs simultanés ne déclenchent qu'une construction"""
+        async def scenario():
+            loader = CountingLoader()
+            cache = DashboardSnapshotCache(loader, ttl_s=60)
+            snapshots = await asyncio.gather(*[cache.get("24h", "buckets") for _ in range(10)])
+            again = await cache.get("24h", "buckets")
+            return loader, cache, snapshots, again
+
+        loader, cache, snapshots, again = asyncio.run(scenario())
+
+        assert loader.calls == 1
+        assert len({s.etag for s in snapshots}) == 1
+        assert again is snapshots[0]
+        assert cache.misses == 10 and cache.hits == 1
+
+    def test_stale_snapshot_served_while_refreshing(self):
+        """Un instantané périmé est servi immédiatement, le rafraîchissement se fait en arrière-plan"""
+        async def scenario():
+            loader = CountingLoader(delay_s=0.2)
+            cache = DashboardSnapshotCache(loader, ttl_s=0.01, max_stale_s=60)
+            first = await cache.get("1h", "raw")
+            await asyncio.sleep(0.02)
+
+            start = time.perf_counter()
+            stale = await cache.get("1h", "raw")
+            elapsed = time.perf_counter() - start
+
+            await asyncio.sleep(0.3)
+            refreshed = cache._snapshots[("1h", "raw")]
+            return first, stale, refreshed, elapsed
+
+        first, stale, refreshed, elapsed = asyncio.run(scenario())
+
+        assert stale is first
+        assert elapsed < 0.1
+        assert refreshed.data["version"] == 2
+        assert refreshed.etag != first.etag
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tests pytest du spool local des prédictions"""
+
+import itertools
+import shutil
+import pytest
+import sys
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import Base, PredictionFeedback
+from src.database.feedback_service import FeedbackService
+from src.database.spool import PredictionSpool
+from src.database.write_behind import PredictionLogWriter
+
+def make_record(result="cat"):
+    """Enregistrement de prédiction minimal"""
+    return FeedbackService.build_record(
+        inference_time_ms=7.5, success=True, prediction_result=result,
+        proba_cat=70.0, proba_dog=30.0, rgpd_consent=False
+    )
+
+def count_rows(session_factory):
+    db = session_factory()
+    try:
+        return db.query(PredictionFeedback).count()
+    finally:
+        db.close()
+
+class TestPredictionSpool:
+    """Tests de la mise en spool et du rejeu"""
+
+    def test_outage_spools_then_replays(self, empty_engine, tmp_path):
+        """Base indisponible (sans table) : les lots vont dans le spool, puis sont rejoués une fois la base revenue"""
+        session_factory = sessionmaker(bind=empty_engine)
+        spool = PredictionSpool(tmp_path, session_factory)
+        counter = itertools.count(1)
+        writer = PredictionLogWriter(session_factory, id_allocator=lambda n: [next(counter) for _ in range(n)],
+                                     spool=spool, retry_interval_s=60)
+        writer._refill_ids()
+        ids = [writer.log(make_record()) for _ in range(3)]
+
+        assert writer.flush() == 0
+        assert writer.database_bypassed
+        assert spool.spooled == 3 and writer.buffered == 0
+        assert spool.is_spooled(ids[0])
+
+        # Pendant le contournement, les lots suivants vont directement dans le spool
+        writer.log(make_record("dog"))
+        writer.flush()
+        assert spool.spooled == 4
+
+        Base.metadata.create_all(empty_engine)  # Retour de la base
+        assert spool.database_healthy()
+        assert spool.replay() == 4
+        assert count_rows(session_factory) == 4
+        assert spool.segments() == []
+        assert not spool.is_spooled(ids[0])
+
+    def test_spooled_ids_survive_restart(self, empty_engine, tmp_path):
+        """Après un redémarrage, les identifiants et request_uuid des segments existants sont toujours reconnus"""
+        session_factory = sessionmaker(bind=empty_engine)
+        PredictionSpool(tmp_path, session_factory).append([dict(make_record(), id=42, request_uuid="uuid-42")])
+
+        restarted = PredictionSpool(tmp_path, session_factory)
+        assert restarted.is_spooled(42) and restarted.is_spooled("uuid-42")
+
+        Base.metadata.create_all(empty_engine)
+        assert restarted.replay() == 1
+        assert not restarted.is_spooled(42) and not restarted.is_spooled("uuid-42")
+
+    def test_buffer_overflow_goes_to_spool(self, session_factory, tmp_path):
+        """Tampon plein : les plus anciens enregistrements sont placés dans le spool, pas abandonnés"""
+        spool = PredictionSpool(tmp_path, session_factory)
+        counter = itertools.count(1)
+        writer = PredictionLogWriter(session_factory, id_allocator=lambda n: [next(counter) for _ in range(n)],
+                                     max_buffer=2, spool=spool)
+        writer._refill_ids()
+        ids = [writer.log(make_record()) for _ in range(5)]
+
+        assert writer.buffered == 2 and writer.dropped == 0
+        assert spool.spooled == 3
+        assert all(spool.is_spooled(record_id) for record_id in ids[:3])
+        assert not any(writer.is_pending(record_id) for record_id in ids[:3])
+
+        writer.flush()
+        spool.replay()
+        assert count_rows(session_factory) == 5
+
+    def test_replay_is_idempotent(self, session_factory, tmp_path):
+        """Un segment rejoué deux fois n'insère pas de doublons"""
+        spool = PredictionSpool(tmp_path / "spool", session_factory)
+        records = [dict(make_record(), request_uuid=f"uuid-{i}") for i in range(3)]
+        spool.append(records)
+        backup = shutil.copy(spool.segments()[0], tmp_path / "copie.jsonl")
+
+        spool.replay()
+        shutil.copy(backup, spool.spool_dir / "spool-0-0000.jsonl")  # Segment rejoué une seconde fois
+        spool.replay()
+
+        assert count_rows(session_factory) == 3
+
+    def test_rejected_segment_does_not_block(self, session_factory, tmp_path):
+        """Un segment refusé par la base est mis de côté, les suivants sont rejoués"""
+        spool = PredictionSpool(tmp_path, session_factory)
+        spool.append([dict(make_record(), prediction_result="bird")])  # Viole la contrainte CHECK
+        spool.replay()
+        spool.append([make_record()])
+        spool.replay()
+
+        assert count_rows(session_factory) == 1
+        assert spool.rejected == 1
+        assert len(list((tmp_path / "rejected").glob("*.jsonl"))) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests pytest du pool de processus d'inférence"""
+
+import os
+import time
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.models.worker_pool import ModelWorkerPool
+
+class FakePredictor:
+    """Prédicteur factice : score = moyenne des pixels / 255, et PID du worker"""
+
+    def is_loaded(self):
+        return True
+
+    def predict_batch(self, images):
+        if images[0, 0, 0, 0] == 255:
+            os._exit(1)  # Simulation d'un crash du worker
+        return [{"raw_score": float(image.mean()) / 255, "pid": os.getpid()} for image in images]
+
+def fake_factory(model_path, model_version=None):
+    """Fabrique picklable utilisée par les processus workers"""
+    return FakePredictor()
+
+def wait_ready(pool, timeout=30):
+    """Attend que tous les workers soient prêts"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all(worker["ready"] for worker in pool.health()):
+            return
+        time.sleep(0.1)
+    pytest.fail("Workers non prêts")
+
+@pytest.fixture
+def pool():
+    """Pool de 2 workers factices"""
+    pool = ModelWorkerPool(
+        num_workers=2,
+        model_path=None,
+        max_batch_size=4,
+        image_size=(8, 8),
+        request_timeout_s=10,
+        health_interval_s=0.1,
+        predictor_factory=fake_factory,
+    )
+    pool.start()
+    wait_ready(pool)
+    yield pool
+    pool.close()
+
+class TestModelWorkerPool:
+    """Tests du pool de workers"""
+
+    def test_predict_through_shared_memory(self, pool):
+        """Les images transmises par mémoire partagée sont bien lues par le worker"""
+        images = np.stack([np.full((8, 8, 3), value, dtype=np.uint8) for value in (0, 51, 102)])
+        results = pool.predict_batch(images)
+
+        assert [round(r["raw_score"], 2) for r in results] == [0.0, 0.2, 0.4]
+        assert results[0]["pid"] != os.getpid()
+
+    def test_batch_too_large(self, pool):
+        """Un batch plus grand que la mémoire partagée est refusé"""
+        with pytest.raises(ValueError):
+            pool.predict_batch(np.zeros((5, 8, 8, 3), dtype=np.uint8))
+
+    def test_crashed_worker_is_respawned(self, pool):
+        """Un worker crashé est relancé automatiquement"""
+        with pytest.raises(RuntimeError):
+            pool.predict_batch(np.full((1, 8, 8, 3), 255, dtype=np.uint8))
+
+        wait_ready(pool)
+        assert sum(worker["restarts"] for worker in pool.health()) == 1
+        assert len(pool.predict_batch(np.zeros((2, 8, 8, 3), dtype=np.uint8))) == 2
+
+    def test_idle_worker_death_is_detected(self, pool):
+        """Un worker prêt qui meurt hors requête est relancé sans faire échouer de requête"""
+        victim = pool.health()[0]
+        os.kill(victim["pid"], 9)
+
+        deadline = time.time() + 10
+        while time.time() < deadline and pool.health()[0]["restarts"] == 0:
+            time.sleep(0.05)
+        assert pool.health()[0]["restarts"] == 1
+        assert "code" in pool.health()[0]["last_error"]
+
+        # Aucune requête n'est confiée au worker mort (ni avant ni après sa relance)
+        for _ in range(6):
+            assert len(pool.predict_batch(np.zeros((1, 8, 8, 3), dtype=np.uint8))) == 1
+        wait_ready(pool)
+        assert pool.health()[0]["pid"] != victim["pid"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Tests pytest de l'écriture différée des prédictions"""
+
+import itertools
+import pytest
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.models import PredictionFeedback
+from src.database.feedback_service import FeedbackService
+from src.database.write_behind import PredictionLogWriter
+
+def make_record(result="cat"):
+    """Enregistrement de prédiction minimal"""
+    return FeedbackService.build_record(
+        inference_time_ms=12.5, success=True, prediction_result=result,
+        proba_cat=80.0, proba_dog=20.0, rgpd_consent=True, filename="chat.jpg",
+        timings={"decode_ms": 1.25, "model_ms": 8.5}
+    )
+
+def count_rows(session_factory):
+    db = session_factory()
+    try:
+        return db.query(PredictionFeedback).count()
+    finally:
+        db.close()
+
+class TestPredictionLogWriter:
+    """Tests du tampon d'écriture et de l'attribution des identifiants"""
+
+    def test_ids_are_allocated_by_block(self, session_factory):
+        """Les identifiants sont réservés par blocs, sans aller-retour par enregistrement"""
+        blocks = []
+        counter = itertools.count(1)
+
+        def allocator(n):
+            blocks.append(n)
+            return [next(counter) for _ in range(n)]
+
+        writer = PredictionLogWriter(session_factory, id_allocator=allocator, id_block_size=4)
+        writer._refill_ids()
+        ids = [writer.log(make_record()) for _ in range(3)]
+        writer._refill_ids()  # Bloc à moitié consommé : réservation du bloc suivant
+        ids += [writer.log(make_record()) for _ in range(3)]
+
+        assert ids == [1, 2, 3, 4, 5, 6]
+        assert blocks == [4, 4]
+        assert count_rows(session_factory) == 0  # Rien n'est écrit avant le flush
+
+    def test_exhausted_ids_are_refilled_synchronously(self, session_factory):
+        """Bloc épuisé : la requête réserve le bloc suivant, l'identifiant n'est jamais absent"""
+        blocks = []
+        counter = itertools.count(1)
+
+        def allocator(n):
+            blocks.append(n)
+            return [next(counter) for _ in range(n)]
+
+        writer = PredictionLogWriter(session_factory, id_allocator=allocator, id_block_size=2)
+        ids = [writer.log(make_record()) for _ in range(3)]
+
+        assert ids == [1, 2, 3]
+        assert blocks == [2, 2]
+
+    def test_unavailable_database_falls_back_to_request_uuid(self, session_factory):
+        """Réservation impossible : pas d'identifiant, l'enregistrement est désigné par son request_uuid"""
+        def allocator(n):
+            raise RuntimeError("Base indisponible")
+
+        writer = PredictionLogWriter(session_factory, id_allocator=allocator)
+        record = dict(make_record(), request_uuid="uuid-1")
+
+        assert writer.log(record) is None
+        assert writer.last_error == "Base indisponible"
+        assert writer.is_pending("uuid-1")
+
+    def test_flush_writes_buffer(self, session_factory):
+        """Le flush écrit les enregistrements en lots et libère les identifiants en attente"""
+        counter = itertools.count(100)
+        writer = PredictionLogWriter(session_factory, id_allocator=lambda n: [next(counter) for _ in range(n)],
+                                     max_batch_size=3)
+        writer._refill_ids()
+        ids = [writer.log(make_record()) for _ in range(7)]
+        assert writer.is_pending(ids[0])
+
+        assert writer.flush() == 7
+        assert writer.flushes == 3  # 3 + 3 + 1
+        assert not writer.is_pending(ids[0])
+
+        db = session_factory()
+        record = db.get(PredictionFeedback, ids[-1])
+        assert record.filename == "chat.jpg"
+        assert record.model_ms == pytest.approx(8.5)
+        assert record.db_write_ms is not None
+        assert len(record.request_uuid) == 36
+        db.close()
+
+    def test_close_flushes_pending_records(self, session_factory):
+        """Les enregistrements en tampon sont écrits à l'arrêt"""
+        counter = itertools.count(1)
+        writer = PredictionLogWriter(session_factory, id_allocator=lambda n: [next(counter) for _ in range(n)],
+                                     flush_interval_s=60)
+        writer.start()
+        for _ in range(5):
+            writer.log(make_record("dog"))
+        writer.close()
+
+        assert count_rows(session_factory) == 5
+        assert writer.buffered == 0
+
+    def test_failed_flush_keeps_records(self, session_factory):
+        """Sans spool, un échec d'écriture conserve les enregistrements pour un nouvel essai"""
+        counter = itertools.count(1)
+        writer = PredictionLogWriter(session_factory, id_allocator=lambda n: [next(counter) for _ in range(n)])
+        writer._refill_ids()
+        writer.log(make_record())
+        writer.log(dict(make_record(), prediction_result="bird"))  # Viole la contrainte CHECK
+
+        assert writer.flush() == 0
+        assert writer.buffered == 2
+        assert writer.failed_flushes == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])